@@ -0,0 +1,88 @@
+"""
+Benchmark for account registration and login.
+
+Times N registrations followed by N logins with the username index,
+and compares them with the old linear scan over the attendee list.
+
+Run from the project folder:
+    python -m benchmarks.bench_accounts --users 100000
+"""
+
+import argparse                             # Command line options
+import os                                   # Used to run inside a temporary folder
+import tempfile                             # Keeps benchmark .pkl files out of the project
+import time                                 # High resolution timer
+
+from controller.controller import GreenWaveController
+from controller.passwords import PasswordHasher
+from model.models import *
+
+
+class LinearScanController(GreenWaveController):
+    """
+    Controller that uses the original linear scans, kept as a baseline.
+    """
+
+    def create_account(self, username, password, email):
+        for a in self.attendees:
+            if a.account.username == username:
+                raise ValueError("Username already exists")
+        attendee = self.new_attendee(username, password, email)
+        self.attendees.append(attendee)
+        self.record_change("attendees.pkl", self.attendees, attendee)
+
+    def login(self, username, password):
+        for a in self.attendees:
+            if a.account.username == username and self.passwords.verify(password, a.account.password):
+                self.logged_in = a
+                return
+        raise ValueError("Invalid login")
+
+
+def run(controller_class, users):
+    """
+    Registers and logs in `users` attendees and returns both durations.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        old_cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            # Cheapest hash setting: this benchmark measures lookups, not hashing
+            c = controller_class(passwords=PasswordHasher("pbkdf2_sha256", cost=0, cache_size=0))
+
+            start = time.perf_counter()
+            for i in range(users):
+                c.create_account(f"user{i}", "secret", f"user{i}@mail.com")
+            register_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for i in range(users):
+                c.login(f"user{i}", "secret")
+            login_time = time.perf_counter() - start
+
+            c.close()
+        finally:
+            os.chdir(old_cwd)
+    return register_time, login_time
+
+
+def report(label, users, register_time, login_time):
+    print(f"{label:<12} users={users:<7} "
+          f"register={register_time:8.3f}s ({register_time / users * 1e6:8.1f} us/op)  "
+          f"login={login_time:8.3f}s ({login_time / users * 1e6:8.1f} us/op)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registration and login benchmark")
+    parser.add_argument("--users", type=int, default=100000, help="number of attendees")
+    parser.add_argument("--baseline-users", type=int, default=10000,
+                        help="attendees for the linear scan baseline (quadratic, keep small)")
+    args = parser.parse_args()
+
+    report("indexed", args.users, *run(GreenWaveController, args.users))
+    if args.baseline_users:
+        report("linear scan", args.baseline_users, *run(LinearScanController, args.baseline_users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Sales analytics benchmark: dashboard queries answered from the
+precomputed rollups against scanning every sale event, and the memory
+used by the streaming CSV export against building the file as one string.
+
+Run from the project folder:
+    python -m benchmarks.bench_analytics --events 1000000
+"""
+
+import argparse                             # Command line options
+import random                               # Synthetic sales
+import time                                 # High resolution timer
+import tracemalloc                          # Peak memory of the exports
+from datetime import datetime, timedelta
+
+from controller.analytics import SalesAnalytics
+from model.models import SaleEvent
+
+
+def generate(n, days, seed=1):
+    """
+    Returns n purchase and upgrade events spread over the last `days` days.
+    """
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=days)
+    types = [("Single", 100), ("Double", 150), ("Full", 200)]
+    methods = ["credit", "debit", "invoice"]
+    events = []
+    for i in range(n):
+        moment = start + timedelta(seconds=days * 86400 * i / n)
+        if rng.random() < 0.2:
+            events.append(SaleEvent(moment, "upgrade", "Full", rng.choice(methods), 100, "Single"))
+        else:
+            name, price = rng.choice(types)
+            events.append(SaleEvent(moment, "purchase", name, rng.choice(methods), price))
+    return events
+
+
+def scan_summary(events, since):
+    """
+    The same dashboard figures computed by scanning the events.
+    """
+    sold = upgrades = revenue = 0
+    methods = {}
+    for e in events:
+        if e.time < since:
+            continue
+        if e.kind == "upgrade":
+            upgrades += 1
+        else:
+            sold += 1
+        revenue += e.amount
+        methods[e.payment_method] = methods.get(e.payment_method, 0) + e.amount
+    return sold, upgrades, revenue, sorted(methods.items(), key=lambda m: -m[1])
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def peak_kb(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sales analytics benchmark")
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    events = generate(args.events, args.days)
+
+    analytics = SalesAnalytics([])
+    start = time.perf_counter()
+    for i in range(0, len(events), 1000):
+        analytics.add(events[i:i + 1000])
+    record = time.perf_counter() - start
+    print(f"events={args.events}  record={record / args.events * 1e6:.2f} us/event (all rollups)")
+
+    since = datetime.now() - timedelta(days=14)
+    for label, func in (
+        ("summary (rollups)", lambda: analytics.summary()),
+        ("14-day trend (rollups)", lambda: analytics.trend("day", 14)),
+        ("24-hour trend (rollups)", lambda: analytics.trend("hour", 24)),
+        ("14-day figures (scan)", lambda: scan_summary(events, since))
+    ):
+        print(f"    {label:<24} {timed(func) * 1000:10.3f} ms")
+
+    stream = lambda: sum(len(chunk) for chunk in analytics.csv_chunks())
+    whole = lambda: len("".join(list(analytics.csv_chunks())))
+    print(f"    CSV export streamed      peak={peak_kb(stream):10.0f} KB")
+    print(f"    CSV export in memory     peak={peak_kb(whole):10.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
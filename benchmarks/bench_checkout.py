@@ -0,0 +1,109 @@
+"""
+Checkout benchmark: ticket purchases per second when every checkout is
+its own fsynced transaction, when many threads check out at once (group
+commit shares the fsyncs) and with checkout_many batches.
+
+After each run the data is reloaded from disk and checked: every attendee
+has a pass, and passes, payments and sale events all agree.
+
+Run from the project folder:
+    python -m benchmarks.bench_checkout --attendees 5000
+"""
+
+import argparse                             # Command line options
+import os                                   # Used to run inside a temporary folder
+import tempfile                             # Keeps benchmark .pkl files out of the project
+import threading                            # Concurrent checkouts
+import time                                 # High resolution timer
+
+from controller.controller import GreenWaveController
+from controller.passwords import PasswordHasher
+from controller.storage import PickleStorage
+
+
+def controller():
+    return GreenWaveController(PickleStorage("."), passwords=PasswordHasher("pbkdf2_sha256", cost=0))
+
+
+def count_fsyncs(c):
+    """
+    Counts the fsyncs of the controller's transaction log.
+    """
+    log = c.storage.transactions
+    counter = [0]
+    write = log._write
+
+    def counted(data, sync):
+        counter[0] += sync
+        return write(data, sync)
+
+    log._write = counted
+    return counter
+
+
+def run(label, attendees, checkout):
+    with tempfile.TemporaryDirectory() as folder:
+        old_cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            c = controller()
+            usernames = [f"user{i}" for i in range(attendees)]
+            c.add_attendees([c.new_attendee(u, "secret", "") for u in usernames])
+            people = [c.find_attendee(u) for u in usernames]
+            fsyncs = count_fsyncs(c)
+
+            start = time.perf_counter()
+            checkout(c, people)
+            seconds = time.perf_counter() - start
+            c.close()
+
+            # Reload everything from disk and check that it agrees
+            c = controller()
+            passes = sum(c.find_attendee(u).pass_ref is not None for u in usernames)
+            consistent = passes == attendees == len(c.payments) == len(c.analytics.events)
+            consistent = consistent and c.get_sales_analytics()["tickets_sold"] == attendees
+            c.close()
+        finally:
+            os.chdir(old_cwd)
+
+    print(f"{label:<22} {attendees / seconds:9.0f} checkouts/s  fsyncs={fsyncs[0]:6d}  consistent={consistent}")
+
+
+def one_by_one(c, people):
+    single = c.find_ticket_type("Single")
+    for a in people:
+        c.purchase_ticket(single, "credit", a, key="buy-" + a.account.username)
+
+
+def concurrent(threads):
+    def checkout(c, people):
+        workers = [threading.Thread(target=one_by_one, args=(c, people[i::threads])) for i in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+    return checkout
+
+
+def batched(size):
+    def checkout(c, people):
+        single = c.find_ticket_type("Single")
+        for i in range(0, len(people), size):
+            c.checkout_many([(a, single, "credit", "buy-" + a.account.username) for a in people[i:i + size]])
+    return checkout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkout benchmark")
+    parser.add_argument("--attendees", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=100, help="orders per checkout_many call")
+    args = parser.parse_args()
+
+    run("one by one", args.attendees, one_by_one)
+    run(f"{args.threads} threads", args.attendees, concurrent(args.threads))
+    run(f"batches of {args.batch}", args.attendees, batched(args.batch))
+
+
+if __name__ == "__main__":
+    main()
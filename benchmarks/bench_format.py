@@ -0,0 +1,65 @@
+"""
+Snapshot format benchmark: plain pickled object graphs (the format used
+before) against the versioned, checksummed flat-record format.
+
+Generates the synthetic data sets of bench_suite, then times saving
+(encoding) and loading (decoding) every data set in both formats and
+compares the file sizes.
+
+Run from the project folder:
+    python -m benchmarks.bench_format --attendees 200000
+"""
+
+import argparse                             # Command line options
+import pickle                               # The previous snapshot format
+import tempfile                             # Keeps benchmark data out of the project
+import time                                 # High resolution timer
+
+from benchmarks.bench_suite import generate
+from controller.dataformat import DATASET_CODECS, decode_snapshot, encode_snapshot
+from controller.storage import PickleStorage
+
+
+def best_of(repeat, func, *args):
+    """
+    Returns the fastest of `repeat` runs and the last result.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot format benchmark")
+    parser.add_argument("--attendees", type=int, default=200000)
+    parser.add_argument("--workshops", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        generate("pickle", folder, args.attendees, args.workshops, args.days)
+        storage = PickleStorage(folder)
+        datasets = {name: storage.load(name) for name in DATASET_CODECS}
+        storage.close()
+
+    for name, data in datasets.items():
+        codec = DATASET_CODECS[name]
+        old_save, old_bytes = best_of(args.repeat, pickle.dumps, data, pickle.HIGHEST_PROTOCOL)
+        old_load, _ = best_of(args.repeat, pickle.loads, old_bytes)
+        new_save, new_bytes = best_of(args.repeat, encode_snapshot, data, codec)
+        new_load, _ = best_of(args.repeat, decode_snapshot, new_bytes)
+
+        print(f"{name:<14} rows={len(data):<8}")
+        print(f"    pickle     save={old_save * 1000:9.1f} ms  load={old_load * 1000:9.1f} ms  "
+              f"size={len(old_bytes) / 1e6:8.2f} MB")
+        print(f"    format v1  save={new_save * 1000:9.1f} ms  load={new_load * 1000:9.1f} ms  "
+              f"size={len(new_bytes) / 1e6:8.2f} MB  ({len(new_bytes) / len(old_bytes):.0%} of pickle)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Memory benchmark for the model classes.
+
+Builds N attendees (each with a pass, payment and one reservation) using
+the slotted models with shared ticket types, and again using plain
+__dict__ classes where every ticket carries its own TicketType copy, as
+before. Each variant runs in a fresh process so the RSS numbers are clean.
+
+Run from the project folder:
+    python -m benchmarks.bench_memory --attendees 1000000
+"""
+
+import argparse                             # Command line options
+import pickle                               # Measures pickle sizes
+import resource                             # Peak RSS of the process
+import subprocess                           # Runs each variant in its own process
+import sys
+
+
+class LegacyAccount:
+    def __init__(self, username, password, email):
+        self.username = username
+        self.password = password
+        self.email = email
+
+
+class LegacyTicketType:
+    def __init__(self, name, price, exhibitions):
+        self.name = name
+        self.price = price
+        self.exhibitions = exhibitions
+
+
+class LegacyPayment:
+    def __init__(self, method, amount):
+        self.method = method
+        self.amount = amount
+
+
+class LegacyTicket:
+    def __init__(self, ticket_type, payment):
+        self.ticket_type = ticket_type
+        self.payment = payment
+
+
+class LegacyPass:
+    def __init__(self, ticket):
+        self.ticket_type = ticket.ticket_type
+        self.ticket = ticket
+
+
+class LegacyWorkshop:
+    def __init__(self, title, exhibition, capacity):
+        self.title = title
+        self.exhibition = exhibition
+        self.capacity = capacity
+
+
+class LegacyAttendee:
+    def __init__(self, account):
+        self.account = account
+        self.pass_ref = None
+        self.reservations = []
+
+
+def build(variant, n):
+    """
+    Creates n attendees with the chosen model classes.
+    """
+    if variant == "slots":
+        from model.models import Account, Attendee, Pass, Payment, Ticket, TicketType, Workshop
+        types = [TicketType.shared("Single", 100, ["A"]), TicketType.shared("Full", 200, ["A", "B", "C"])]
+        new_type = lambda t: t                              # Reference the shared type
+    else:
+        Account, Attendee, Pass, Payment, Ticket, TicketType, Workshop = (
+            LegacyAccount, LegacyAttendee, LegacyPass, LegacyPayment,
+            LegacyTicket, LegacyTicketType, LegacyWorkshop
+        )
+        types = [TicketType("Single", 100, ["A"]), TicketType("Full", 200, ["A", "B", "C"])]
+        new_type = lambda t: TicketType(t.name, t.price, list(t.exhibitions))  # Copy per ticket
+
+    workshop = Workshop("Solar Energy", "A", n)
+    attendees = []
+    for i in range(n):
+        a = Attendee(Account(f"user{i}", "secret", f"user{i}@mail.com"))
+        t = new_type(types[i % 2])
+        a.pass_ref = Pass(Ticket(t, Payment("credit", t.price)))
+        a.reservations.append(workshop)
+        attendees.append(a)
+    return attendees
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # Linux reports KiB
+
+
+def measure(variant, n):
+    """
+    Runs inside the child process and prints one result line.
+    """
+    before = peak_rss_mb()
+    attendees = build(variant, n)
+    after = peak_rss_mb()
+    size = len(pickle.dumps(attendees, protocol=pickle.HIGHEST_PROTOCOL))
+    one = len(pickle.dumps(attendees[0], protocol=pickle.HIGHEST_PROTOCOL))
+    print(f"{variant:<8} attendees={n:<8} rss={after - before:8.1f} MB  "
+          f"pickle={size / 1e6:8.1f} MB  single-record={one} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model memory benchmark")
+    parser.add_argument("--attendees", type=int, default=1000000)
+    parser.add_argument("--variant", choices=["slots", "legacy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        measure(args.variant, args.attendees)
+        return
+
+    for variant in ("legacy", "slots"):
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_memory",
+             "--attendees", str(args.attendees), "--variant", variant],
+            check=True
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Login throughput benchmark for each password hashing cost setting.
+
+For every algorithm/cost pair, registers a set of attendees and then runs
+logins from several threads at once, reporting logins per second both
+without and with the verification cache.
+
+Run from the project folder:
+    python -m benchmarks.bench_passwords --threads 8 --logins 200
+"""
+
+import argparse                             # Command line options
+import os                                   # Used to run inside a temporary folder
+import tempfile                             # Keeps benchmark .pkl files out of the project
+import threading                            # Concurrent login threads
+import time                                 # High resolution timer
+
+from controller.controller import GreenWaveController
+from controller.passwords import PasswordHasher
+from model.models import *
+
+SETTINGS = [
+    ("scrypt", 10), ("scrypt", 12), ("scrypt", 14),
+    ("pbkdf2_sha256", 14), ("pbkdf2_sha256", 17), ("pbkdf2_sha256", 19)
+]
+
+
+def logins_per_second(c, users, threads, logins):
+    """
+    Runs `logins` logins spread over `threads` threads and returns the rate.
+    """
+    def worker(offset):
+        for i in range(logins // threads):
+            c.authenticate(f"user{(offset + i * threads) % users}", "secret")
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return (logins // threads * threads) / (time.perf_counter() - start)
+
+
+def run(algorithm, cost, users, threads, logins):
+    with tempfile.TemporaryDirectory() as folder:
+        old_cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            hasher = PasswordHasher(algorithm, cost, cache_size=0)
+            c = GreenWaveController(passwords=hasher)
+            hashes = hasher.hash_many(["secret"] * users)
+            c.add_attendees([
+                Attendee(Account(f"user{i}", h, "")) for i, h in enumerate(hashes)
+            ])
+
+            uncached = logins_per_second(c, users, threads, logins)
+            hasher.cache_size = users                   # Turn the cache on
+            for i in range(users):                      # Warm it up: every user logs in once
+                c.authenticate(f"user{i}", "secret")
+            cached = logins_per_second(c, users, threads, logins)
+            c.close()
+        finally:
+            os.chdir(old_cwd)
+    print(f"{algorithm:<14} cost=2^{cost:<3} threads={threads:<3} "
+          f"uncached={uncached:10,.1f} logins/s   cached={cached:12,.1f} logins/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Password hashing login benchmark")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=200, help="logins per setting")
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    for algorithm, cost in SETTINGS:
+        run(algorithm, cost, args.users, args.threads, args.logins)
+
+
+if __name__ == "__main__":
+    main()
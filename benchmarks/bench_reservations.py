@@ -0,0 +1,101 @@
+"""
+Multi-threaded stress benchmark for workshop reservations.
+
+Many threads reserve and cancel random batches of workshops on one shared
+controller, then the seat counts are checked for overbooking.
+
+Run from the project folder:
+    python -m benchmarks.bench_reservations --threads 16 --ops 2000
+"""
+
+import argparse                             # Command line options
+import os                                   # Used to run inside a temporary folder
+import random                               # Random workshop batches
+import tempfile                             # Keeps benchmark .pkl files out of the project
+import threading                            # Worker threads
+import time                                 # High resolution timer
+
+from controller.controller import GreenWaveController
+from controller.passwords import PasswordHasher
+from model.models import *
+
+
+def worker(c, attendees, ops, seed, counts):
+    """
+    Reserves random batches and sometimes cancels one, counting the results.
+    Each thread uses its own attendees but competes with the others for seats.
+    """
+    rng = random.Random(seed)
+    reserved = failed = cancelled = 0
+    for _ in range(ops):
+        a = rng.choice(attendees)
+        held = c.get_reservations(a)
+        if held and rng.random() < 0.3:
+            c.cancel_reservations([rng.choice(held)], a)
+            cancelled += 1
+            continue
+        batch = rng.sample(c.workshops, rng.randint(1, 3))
+        try:
+            c.reserve_workshops(batch, a)
+            reserved += 1
+        except ValueError:
+            failed += 1
+    counts.append((reserved, failed, cancelled))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reservation stress benchmark")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=2000, help="operations per thread")
+    parser.add_argument("--workshops", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        old_cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            c = GreenWaveController(passwords=PasswordHasher("pbkdf2_sha256", cost=0))
+            for i in range(args.workshops):
+                c.add_workshop(f"Workshop {i}", "A", args.capacity)
+
+            full = c.ticket_types[-1]
+            attendees = []
+            for i in range(args.threads * 10):
+                c.create_account(f"user{i}", "secret", "")
+                a = c.find_attendee(f"user{i}")
+                a.pass_ref = Pass(Ticket(full, Payment("bench", full.price)))
+                attendees.append(a)
+
+            counts = []
+            threads = [
+                threading.Thread(target=worker, args=(c, attendees[seed::args.threads], args.ops, seed, counts))
+                for seed in range(args.threads)
+            ]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            c.close()
+        finally:
+            os.chdir(old_cwd)
+
+    # Every seat taken must belong to exactly one reservation
+    held = c.ledger.counts()
+    overbooked = sum(
+        1 for w in c.workshops
+        if w.capacity < 0 or held.get(w.title, 0) + w.capacity != w.seats
+    )
+
+    total = args.threads * args.ops
+    reserved = sum(r for r, _, _ in counts)
+    failed = sum(f for _, f, _ in counts)
+    cancelled = sum(x for _, _, x in counts)
+    print(f"threads={args.threads} ops={total} time={elapsed:.3f}s ({total / elapsed:,.0f} ops/s)")
+    print(f"reserved={reserved} full={failed} cancelled={cancelled} inconsistent_workshops={overbooked}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Snapshot benchmark: backups taken while checkouts keep running.
+
+Compares how long writes are held back by a plain copy of every data
+file (what pausing the app to back it up costs) against full and
+incremental snapshots, reports the bytes each stores, the checkout p99
+latency while snapshots are taken, and how long a restore takes.
+Every snapshot is restored and checked: passes, payments and sale
+events must agree.
+
+Run from the project folder:
+    python -m benchmarks.bench_snapshots --attendees 100000
+"""
+
+import argparse                             # Command line options
+import os                                   # Used to run inside a temporary folder
+import shutil                               # The plain copy being compared against
+import tempfile                             # Keeps benchmark .pkl files out of the project
+import threading                            # Checkouts run during the snapshots
+import time                                 # High resolution timer
+
+from controller.controller import GreenWaveController
+from controller.passwords import PasswordHasher
+from controller.snapshots import SnapshotStore
+from controller.storage import PickleStorage
+
+
+def controller(folder):
+    return GreenWaveController(PickleStorage(folder), passwords=PasswordHasher("pbkdf2_sha256", cost=0))
+
+
+def plain_copy(c, target):
+    """
+    Copies every data file with writes held back, like stopping the app for a backup.
+    Returns the seconds writes were held.
+    """
+    os.makedirs(target)
+    start = time.perf_counter()
+    with c.storage.frozen() as files:
+        for name, path in files:
+            shutil.copyfile(path, os.path.join(target, name))
+    return time.perf_counter() - start
+
+
+def p99(samples):
+    samples = sorted(samples)
+    return samples[int(len(samples) * 0.99)] if samples else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot benchmark")
+    parser.add_argument("--attendees", type=int, default=100000)
+    parser.add_argument("--snapshots", type=int, default=10, help="snapshots taken while checkouts run")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        data = os.path.join(folder, "data")
+        os.makedirs(data)
+        c = controller(data)
+        usernames = [f"user{i}" for i in range(args.attendees)]
+        c.add_attendees([c.new_attendee(u, "secret", "") for u in usernames])
+        single = c.find_ticket_type("Single")
+        half = args.attendees // 2
+        c.checkout_many([(c.find_attendee(u), single, "credit", None) for u in usernames[:half]])
+        c.storage.flush()
+
+        copy = os.path.join(folder, "copy")
+        held = plain_copy(c, copy)
+        size = sum(os.path.getsize(os.path.join(copy, name)) for name in os.listdir(copy))
+        print(f"attendees={args.attendees}  data={size / 1e6:.1f} MB")
+        print(f"    plain copy           writes held {held * 1000:9.2f} ms  stored {size:>12} bytes")
+
+        # Checkouts for the other half run while snapshots are taken
+        latencies = []
+
+        def worker(chunk):
+            for u in chunk:
+                start = time.perf_counter()
+                c.purchase_ticket(single, "credit", c.find_attendee(u))
+                latencies.append(time.perf_counter() - start)
+
+        rest = usernames[half:]
+        workers = [threading.Thread(target=worker, args=(rest[i::args.threads],)) for i in range(args.threads)]
+        for t in workers:
+            t.start()
+        for n in range(args.snapshots):
+            m = c.create_snapshot(incremental=n > 0)
+            print(f"    {m['kind']:<20} writes held {m['paused_ms']:9.2f} ms  stored {m['stored_bytes']:>12} bytes")
+        for t in workers:
+            t.join()
+        print(f"    checkout p99 during snapshots {p99(latencies) * 1000:.2f} ms")
+
+        c.close()
+
+        # Restore every kept snapshot and check it
+        store = SnapshotStore(None, os.path.join(data, "backups"))
+        for snapshot_id in store.ids():
+            target = os.path.join(folder, "restore-" + snapshot_id)
+            start = time.perf_counter()
+            store.restore(snapshot_id, target)
+            restore_time = time.perf_counter() - start
+            r = controller(target)
+            sold = sum(r.find_attendee(u).pass_ref is not None for u in usernames)
+            consistent = sold == len(r.payments) == len(r.analytics.events)
+            r.close()
+            print(f"    restore {snapshot_id}  {restore_time * 1000:8.1f} ms  sold={sold}  consistent={consistent}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Benchmark and load-generation suite for the controller layer (no GUI needed).
+
+For every data size, synthetic attendees, payments, workshops and sales
+reports are generated into a temporary folder, then a fresh process starts
+a GreenWaveController on that data and measures:
+  - startup time, the time of the first attendee lookup and of the first
+    access of every other data set (data sets load lazily)
+  - latency (mean, p50, p99) of create_account, login, purchase_ticket,
+    upgrade_ticket, reserve_workshops and update_sales_report
+  - size of every data file after the run
+  - peak memory of the process
+
+Results are written as JSON so runs can be compared for regressions:
+    python -m benchmarks.bench_suite --sizes 10000,100000 --output after.json
+    python -m benchmarks.bench_suite --compare before.json after.json
+"""
+
+import argparse                             # Command line options
+import datetime                             # Timestamp of the run
+import json                                 # Results file
+import os                                   # File sizes and temporary folder
+import platform                             # Machine description in the results
+import random                               # Synthetic data
+import resource                             # Peak RSS of the process
+import subprocess                           # Each size is measured in a fresh process
+import sys
+import tempfile                             # Keeps benchmark data out of the project
+import time                                 # High resolution timer
+
+from controller.controller import GreenWaveController
+from controller.passwords import PasswordHasher
+from controller.storage import PickleStorage, SQLiteStorage
+from model.models import *
+
+OPERATIONS = [
+    "create_account", "login", "purchase_ticket",
+    "upgrade_ticket", "reserve_workshops", "update_sales_report"
+]
+
+# Controller properties that load a data set on first access, in an order
+# where none of them loads one of the later ones
+DATA_SETS = ["payments", "sales", "analytics", "checkouts", "ledger", "waitlist", "workshops", "catalog"]
+
+
+def new_hasher():
+    # Cheapest hash setting: the suite measures the controller, not hashing
+    # (bench_passwords covers the hashing cost settings)
+    return PasswordHasher("pbkdf2_sha256", cost=0, cache_size=0)
+
+
+def new_storage(backend, folder):
+    if backend == "sqlite":
+        return SQLiteStorage(os.path.join(folder, "greenwave.db"))
+    return PickleStorage(folder)
+
+
+# -------------------------------
+# DATA GENERATION
+# -------------------------------
+
+def generate(backend, folder, attendees, workshops, days, seed=1):
+    """
+    Writes synthetic data sets: attendees (most with a ticket and some
+    reservations), their payments, workshops spread over the exhibitions
+    and one sales report per day.
+    """
+    rng = random.Random(seed)
+    ticket_types = [
+        TicketType.shared("Single", 100, ["A"]),
+        TicketType.shared("Double", 150, ["A", "B"]),
+        TicketType.shared("Full", 200, ["A", "B", "C"])
+    ]
+    methods = ["credit", "debit", "invoice"]
+    password = new_hasher().hash("secret")      # One hash shared by every synthetic user
+
+    # Workshops are large enough that the measured reservations never fill them
+    all_workshops = [
+        Workshop(f"Workshop {i}", "ABC"[i % 3], attendees + 100000)
+        for i in range(workshops)
+    ]
+    by_exhibition = {e: [w for w in all_workshops if w.exhibition == e] for e in "ABC"}
+
+    people, payments, reservations = [], [], []
+    for i in range(attendees):
+        a = Attendee(Account(f"user{i}", password, f"user{i}@mail.com"))
+        if rng.random() < 0.8:
+            t = rng.choice(ticket_types)
+            payment = Payment(rng.choice(methods), t.price)
+            a.pass_ref = Pass(Ticket(t, payment))
+            payments.append(payment)
+            reserved = set()
+            for _ in range(rng.randint(0, 2)):
+                w = rng.choice(by_exhibition[rng.choice(t.exhibitions)])
+                if w.title not in reserved:
+                    reserved.add(w.title)
+                    reservations.append(Reservation(a.account.username, w.title))
+                    w.capacity -= 1
+        people.append(a)
+
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    reports = []
+    for d in range(days):
+        r = SalesReport(start + datetime.timedelta(days=d), 0, 0)
+        for _ in range(rng.randint(10, 100)):
+            t = rng.choice(ticket_types)
+            method = rng.choice(methods)
+            r.tickets_sold += 1
+            r.total_sales += t.price
+            count, total = r.by_ticket_type.get(t.name, (0, 0))
+            r.by_ticket_type[t.name] = (count + 1, total + t.price)
+            count, total = r.by_payment_method.get(method, (0, 0))
+            r.by_payment_method[method] = (count + 1, total + t.price)
+        reports.append(r)
+
+    storage = new_storage(backend, folder)
+    storage.save("attendees.pkl", people)
+    storage.save("reservations.pkl", reservations)
+    storage.save("payments.pkl", payments)
+    storage.save("workshops.pkl", all_workshops)
+    storage.save("sales.pkl", reports)
+    storage.close()
+
+
+# -------------------------------
+# MEASUREMENT
+# -------------------------------
+
+def percentile(samples, p):
+    """
+    Nearest-rank percentile of a sorted list.
+    """
+    index = max(0, min(len(samples) - 1, round(p / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+def latency(samples):
+    """
+    Summarises a list of durations in seconds as microseconds.
+    """
+    samples = sorted(samples)
+    return {
+        "ops": len(samples),
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 2),
+        "p50_us": round(percentile(samples, 50) * 1e6, 2),
+        "p99_us": round(percentile(samples, 99) * 1e6, 2)
+    }
+
+
+def timed(samples, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    samples.append(time.perf_counter() - start)
+
+
+def file_sizes(folder):
+    return {
+        name: os.path.getsize(os.path.join(folder, name))
+        for name in sorted(os.listdir(folder))
+        if os.path.isfile(os.path.join(folder, name))
+    }
+
+
+def measure(backend, folder, ops, seed=2):
+    """
+    Runs inside a fresh process: starts the controller on the generated
+    data, replays `ops` new-user journeys and returns the results.
+    """
+    rng = random.Random(seed)
+    old_cwd = os.getcwd()
+    os.chdir(folder)                            # Any file written outside the storage stays here
+    try:
+        start = time.perf_counter()
+        c = GreenWaveController(new_storage(backend, folder), new_hasher())
+        startup = time.perf_counter() - start
+
+        # Data sets are loaded on first use: time the first login lookup separately
+        start = time.perf_counter()
+        c.find_attendee("user0")
+        first_lookup = time.perf_counter() - start
+
+        # Then load every other data set, so that startup plus these loads can
+        # be compared with runs that loaded everything up front
+        first_access = {}
+        for name in DATA_SETS:
+            start = time.perf_counter()
+            getattr(c, name)
+            first_access[name] = round(time.perf_counter() - start, 4)
+
+        single, full = c.find_ticket_type("Single"), c.find_ticket_type("Full")
+        samples = {name: [] for name in OPERATIONS}
+        for i in range(ops):
+            username = f"bench{i}"
+            timed(samples["create_account"], c.create_account, username, "secret", "")
+            timed(samples["login"], c.login, username, "secret")
+            a = c.logged_in
+            timed(samples["purchase_ticket"], c.purchase_ticket, single, "credit", a)
+            timed(samples["upgrade_ticket"], c.upgrade_ticket, full, a)
+            w = rng.choice(c.workshops)
+            timed(samples["reserve_workshops"], c.reserve_workshops, [w], a)
+            timed(samples["update_sales_report"], c.update_sales_report, 100, "Single", "credit")
+
+        start = time.perf_counter()
+        c.flush()
+        flush = time.perf_counter() - start
+        c.close()
+    finally:
+        os.chdir(old_cwd)
+
+    return {
+        "startup_s": round(startup, 4),
+        "first_lookup_s": round(first_lookup, 4),
+        "first_access_s": first_access,
+        "loaded_s": round(startup + first_lookup + sum(first_access.values()), 4),
+        "flush_s": round(flush, 4),
+        "operations": {name: latency(s) for name, s in samples.items()},
+        "file_bytes": file_sizes(folder),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # Linux reports KiB
+    }
+
+
+def run_child(*args):
+    """
+    Runs one phase of the suite in a fresh process and returns its JSON output.
+    """
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_suite", *map(str, args)],
+        check=True, stdout=subprocess.PIPE, text=True
+    ).stdout
+    return json.loads(out) if out.strip() else None
+
+
+def run_size(args, attendees):
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        run_child("--phase", "generate", "--folder", folder, "--backend", args.backend,
+                  "--attendees", attendees, "--workshops", args.workshops, "--days", args.days)
+        generate_time = time.perf_counter() - start
+        result = run_child("--phase", "measure", "--folder", folder,
+                           "--backend", args.backend, "--ops", args.ops)
+    result["attendees"] = attendees
+    result["generate_s"] = round(generate_time, 2)
+    return result
+
+
+def report(result):
+    print(f"attendees={result['attendees']:<8} startup={result['startup_s']:8.3f}s  "
+          f"loaded={result['loaded_s']:8.3f}s  "
+          f"peak_rss={result['peak_rss_mb']:8.1f} MB  "
+          f"files={sum(result['file_bytes'].values()) / 1e6:8.1f} MB")
+    for name, stats in result["operations"].items():
+        print(f"    {name:<20} p50={stats['p50_us']:10.1f} us  p99={stats['p99_us']:10.1f} us")
+
+
+# -------------------------------
+# COMPARING RUNS
+# -------------------------------
+
+def compare(before_path, after_path, threshold):
+    """
+    Prints the change of every metric between two result files and returns
+    the number of metrics that got slower or larger than `threshold` allows.
+    """
+    with open(before_path) as f:
+        before = {r["attendees"]: r for r in json.load(f)["results"]}
+    with open(after_path) as f:
+        after = {r["attendees"]: r for r in json.load(f)["results"]}
+
+    regressions = 0
+    for size in sorted(before.keys() & after.keys()):
+        b, a = before[size], after[size]
+        metrics = [("startup_s", b["startup_s"], a["startup_s"]),
+                   ("first_lookup_s", b.get("first_lookup_s", 0), a.get("first_lookup_s", 0)),
+                   # Runs from before lazy loading loaded everything during startup
+                   ("loaded_s", b.get("loaded_s", b["startup_s"]), a.get("loaded_s", a["startup_s"])),
+                   ("peak_rss_mb", b["peak_rss_mb"], a["peak_rss_mb"]),
+                   ("file_bytes", sum(b["file_bytes"].values()), sum(a["file_bytes"].values()))]
+        for name in OPERATIONS:
+            for stat in ("p50_us", "p99_us"):
+                metrics.append((f"{name}.{stat}", b["operations"][name][stat], a["operations"][name][stat]))
+
+        print(f"attendees={size}")
+        for name, old, new in metrics:
+            ratio = new / old if old else 1.0
+            flag = "  REGRESSION" if ratio > threshold else ""
+            regressions += bool(flag)
+            print(f"    {name:<32} {old:14,.2f} -> {new:14,.2f}  x{ratio:6.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Controller benchmark and load-generation suite")
+    parser.add_argument("--sizes", default="10000,100000", help="comma separated attendee counts")
+    parser.add_argument("--ops", type=int, default=1000, help="measured user journeys per size")
+    parser.add_argument("--workshops", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365, help="days of sales reports")
+    parser.add_argument("--backend", choices=["pickle", "sqlite"], default="pickle")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="ratio above which --compare reports a regression")
+    # Internal: one phase of one size, run in a child process
+    parser.add_argument("--phase", choices=["generate", "measure"], help=argparse.SUPPRESS)
+    parser.add_argument("--folder", help=argparse.SUPPRESS)
+    parser.add_argument("--attendees", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase == "generate":
+        generate(args.backend, args.folder, args.attendees, args.workshops, args.days)
+        return
+    if args.phase == "measure":
+        print(json.dumps(measure(args.backend, args.folder, args.ops)))
+        return
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        results.append(run_size(args, size))
+        report(results[-1])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "backend": args.backend,
+                "ops": args.ops,
+                "results": results
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
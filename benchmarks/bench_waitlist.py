@@ -0,0 +1,90 @@
+"""
+Waitlist benchmark: thousands of attendees queue for one full workshop,
+then seats are released by cancellations and by raising the capacity.
+
+Reports the cost of joining the queue, of promoting attendees one release
+at a time (inline) and in batches (background scheduler), and checks that
+Full ticket holders were promoted first and everyone else in join order.
+
+Run from the project folder:
+    python -m benchmarks.bench_waitlist --waiting 20000
+"""
+
+import argparse                             # Command line options
+import os                                   # Used to run inside a temporary folder
+import tempfile                             # Keeps benchmark .pkl files out of the project
+import time                                 # High resolution timer
+
+from controller.controller import GreenWaveController
+from controller.passwords import PasswordHasher
+
+
+def setup(waiting, seats):
+    """
+    Creates a full workshop with `seats` seats and `waiting` attendees on its waitlist.
+    Returns the controller, the workshop, the seat holders and the join time.
+    """
+    c = GreenWaveController(passwords=PasswordHasher("pbkdf2_sha256", cost=0))
+    w = c.add_workshop("Popular", "A", seats)
+    single, full = c.find_ticket_type("Single"), c.find_ticket_type("Full")
+
+    attendees = []
+    for i in range(seats + waiting):
+        c.create_account(f"user{i}", "secret", "")
+        a = c.find_attendee(f"user{i}")
+        c.purchase_ticket(full if i % 10 == 0 else single, "credit", a)
+        attendees.append(a)
+
+    holders = attendees[:seats]
+    for a in holders:
+        c.reserve_workshops([w], a)
+
+    start = time.perf_counter()
+    for a in attendees[seats:]:
+        c.join_waitlist([w], a)
+    return c, w, holders, time.perf_counter() - start
+
+
+def run(label, waiting, seats, releases, background):
+    with tempfile.TemporaryDirectory() as folder:
+        old_cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            c, w, holders, join_time = setup(waiting, seats)
+            order = c.get_waitlist_queue(w.title)       # Promotion order before any release
+            if background:
+                c.start_scheduler(delay=0.01)
+
+            # Release seats by cancelling, then add seats
+            start = time.perf_counter()
+            for a in holders[:releases]:
+                c.cancel_reservations([w], a)
+            c.set_workshop_capacity(w.title, w.seats + releases)
+            c.flush()
+            promote_time = time.perf_counter() - start
+
+            promoted = 2 * releases
+            roster = set(c.get_roster(w.title))
+            in_order = all(username in roster for username in order[:promoted])
+            c.close()
+        finally:
+            os.chdir(old_cwd)
+
+    print(f"{label:<10} waiting={waiting} join={join_time / waiting * 1e6:7.1f} us/attendee  "
+          f"promote {promoted} in {promote_time * 1000:8.1f} ms "
+          f"({promote_time / promoted * 1e6:7.1f} us each)  in_order={in_order}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Waitlist benchmark")
+    parser.add_argument("--waiting", type=int, default=20000, help="attendees on the waitlist")
+    parser.add_argument("--seats", type=int, default=1000)
+    parser.add_argument("--releases", type=int, default=500, help="seats cancelled (and seats added)")
+    args = parser.parse_args()
+
+    run("inline", args.waiting, args.seats, args.releases, background=False)
+    run("scheduler", args.waiting, args.seats, args.releases, background=True)
+
+
+if __name__ == "__main__":
+    main()
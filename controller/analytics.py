@@ -0,0 +1,190 @@
+import csv                                  # CSV export
+import io                                   # CSV rows are formatted in a small reusable buffer
+import threading                            # Sales are recorded from several threads
+from datetime import datetime, timedelta   # Time buckets
+
+GRANULARITIES = ("hour", "day", "week")
+
+
+def bucket_start(granularity, moment):
+    """
+    Returns the start of the hour, day or (Monday-based) week containing moment.
+    """
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = datetime(moment.year, moment.month, moment.day)
+    if granularity == "day":
+        return day
+    return day - timedelta(day.weekday())
+
+
+def bucket_label(granularity, start):
+    """
+    Formats a bucket start for display ("2024-05-01 14:00" or "2024-05-01").
+    """
+    return start.strftime("%Y-%m-%d %H:00" if granularity == "hour" else "%Y-%m-%d")
+
+
+def bucket_step(granularity):
+    return {"hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1)}[granularity]
+
+
+class Rollup:
+    """
+    Running totals of the sale events in one time bucket (or overall).
+    """
+
+    __slots__ = ("purchases", "upgrades", "revenue", "upgrade_revenue", "by_ticket_type", "by_payment_method")
+
+    def __init__(self):
+        self.purchases = 0                  # Tickets sold
+        self.upgrades = 0                   # Tickets upgraded (not counted as sold)
+        self.revenue = 0                    # Purchases and upgrades together
+        self.upgrade_revenue = 0
+        self.by_ticket_type = {}            # Ticket type -> [tickets sold, revenue]
+        self.by_payment_method = {}         # Payment method -> [events, revenue]
+
+    def add(self, e):
+        if e.kind == "upgrade":
+            self.upgrades += 1
+            self.upgrade_revenue += e.amount
+        else:
+            self.purchases += 1
+        self.revenue += e.amount
+
+        entry = self.by_ticket_type.setdefault(e.ticket_type, [0, 0])
+        entry[0] += e.kind != "upgrade"
+        entry[1] += e.amount
+        if e.payment_method is not None:
+            entry = self.by_payment_method.setdefault(e.payment_method, [0, 0])
+            entry[0] += 1
+            entry[1] += e.amount
+
+
+EMPTY = Rollup()                            # Returned for buckets without sales (never changed)
+
+
+class SalesAnalytics:
+    """
+    Sale events (purchases and upgrades) with hourly, daily and weekly
+    rollups kept up to date as each event is added, plus overall totals.
+    Dashboard queries read the rollups: totals, conversion and payment
+    method rankings never depend on the number of events, and a trend
+    costs one lookup per period shown. CSV exports are produced in chunks
+    so the whole file is never built in memory.
+    """
+
+    def __init__(self, events=()):
+        self.events = events                # List of SaleEvent (kept for storage and export)
+        self.rollups = {g: {} for g in GRANULARITIES}  # Granularity -> {bucket start: Rollup}
+        self.total = Rollup()
+        self.upgrade_paths = {}             # (from type, to type) -> upgrades
+        self.lock = threading.Lock()
+        for e in self.events:
+            self._apply(e)
+
+    def _apply(self, e):
+        for granularity, rollups in self.rollups.items():
+            key = bucket_start(granularity, e.time)
+            r = rollups.get(key)
+            if r is None:
+                r = rollups[key] = Rollup()
+            r.add(e)
+        self.total.add(e)
+        if e.kind == "upgrade":
+            path = (e.previous_type, e.ticket_type)
+            self.upgrade_paths[path] = self.upgrade_paths.get(path, 0) + 1
+
+    def add(self, events):
+        """
+        Appends events and updates every rollup. The caller holds the lock
+        (so the events can be saved in the same order).
+        """
+        self.events.extend(events)
+        for e in events:
+            self._apply(e)
+
+    # -------------------------------
+    # QUERIES
+    # -------------------------------
+
+    def summary(self):
+        """
+        Overall totals, upgrade conversion and payment methods ranked by revenue.
+        """
+        with self.lock:
+            t = self.total
+            methods = sorted(
+                ((name, count, revenue) for name, (count, revenue) in t.by_payment_method.items()),
+                key=lambda m: -m[2]
+            )
+            return {
+                "tickets_sold": t.purchases,
+                "upgrades": t.upgrades,
+                "revenue": t.revenue,
+                "upgrade_revenue": t.upgrade_revenue,
+                "upgrade_conversion": round(100 * t.upgrades / t.purchases, 1) if t.purchases else 0.0,
+                "upgrade_paths": dict(self.upgrade_paths),
+                "top_payment_methods": methods
+            }
+
+    def trend(self, granularity, periods, end=None):
+        """
+        Returns (bucket start, Rollup) for the last `periods` buckets up to
+        the one containing `end` (now by default), oldest first.
+        """
+        rollups = self.rollups[granularity]
+        step = bucket_step(granularity)
+        last = bucket_start(granularity, end or datetime.now())
+        with self.lock:
+            return [
+                (start, rollups.get(start, EMPTY))
+                for start in (last - step * n for n in range(periods - 1, -1, -1))
+            ]
+
+    # -------------------------------
+    # CSV EXPORT
+    # -------------------------------
+
+    def rows(self, granularity="events"):
+        """
+        Yields the CSV header and one row per event (or per non-empty
+        rollup bucket for "hour", "day" and "week"), oldest first.
+        """
+        if granularity == "events":
+            yield ("time", "kind", "ticket_type", "previous_type", "payment_method", "amount")
+            with self.lock:
+                count = len(self.events)        # Events added during the export are left out
+            for i in range(count):
+                e = self.events[i]
+                yield (e.time.isoformat(timespec="seconds"), e.kind, e.ticket_type,
+                       e.previous_type or "", e.payment_method or "", e.amount)
+            return
+
+        rollups = self.rollups[granularity]
+        yield ("start", "tickets_sold", "upgrades", "revenue", "upgrade_revenue")
+        with self.lock:
+            starts = sorted(rollups)
+        for start in starts:
+            with self.lock:
+                r = rollups[start]
+                row = (bucket_label(granularity, start), r.purchases, r.upgrades, r.revenue, r.upgrade_revenue)
+            yield row
+
+    def csv_chunks(self, granularity="events", rows_per_chunk=1000):
+        """
+        Yields the CSV export as text chunks of up to `rows_per_chunk` rows.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        n = 0
+        for row in self.rows(granularity):
+            writer.writerow(row)
+            n += 1
+            if n == rows_per_chunk:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                n = 0
+        if n:
+            yield buffer.getvalue()
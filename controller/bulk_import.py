@@ -0,0 +1,172 @@
+"""
+Bulk registration of attendees from CSV or JSONL files (group and corporate bookings).
+
+Each row needs username, password and email, and may add ticket_type
+(Single, Double or Full) and payment_method to buy a ticket at the same time.
+Rows are read one at a time and saved in batches; bad rows are reported
+and skipped without stopping the import.
+
+Run from the project folder:
+    python -m controller.bulk_import delegates.csv [--batch-size 1000] [--db greenwave.db]
+"""
+
+import argparse                             # Command line options
+import csv                                  # CSV input
+import json                                 # JSONL input
+from datetime import datetime               # Time of the imported ticket sales
+from controller.controller import GreenWaveController
+from controller.storage import SQLiteStorage
+from model.models import *
+
+
+class ImportResult:
+    """
+    Summary of a bulk import: how many rows were created and which failed.
+    """
+
+    def __init__(self):
+        self.created = 0                # Attendees registered
+        self.tickets = 0                # Tickets bought along with them
+        self.errors = []                # (row number, message) for every skipped row
+
+
+def read_rows(path):
+    """
+    Yields (row number, dict) for every record of a .csv or .jsonl file
+    without reading the whole file into memory.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl") or path.endswith(".json"):
+            for number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except ValueError:
+                        yield number, None          # Reported as an error by the importer
+        else:
+            for number, row in enumerate(csv.DictReader(f), start=2):  # Line 1 is the header
+                yield number, row
+
+
+def text(row, name):
+    """
+    Returns a field of a row as text ("" when it is missing).
+    Raises ValueError for values that are not text, e.g. numbers in JSONL.
+    """
+    value = row.get(name)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"{name} must be text")
+    return value
+
+
+class BulkImporter:
+    """
+    Validates rows and registers attendees through the controller in batches.
+    """
+
+    def __init__(self, controller, batch_size=1000):
+        self.controller = controller
+        self.batch_size = batch_size
+
+    def run(self, rows):
+        """
+        Imports all (row number, dict) pairs and returns an ImportResult.
+        """
+        result = ImportResult()
+        batch, payments, seen = [], [], set()
+
+        for number, row in rows:
+            try:
+                attendee, payment = self.build(row, seen)
+            except ValueError as e:
+                result.errors.append((number, str(e)))
+                continue
+
+            seen.add(attendee.account.username)
+            batch.append(attendee)
+            if payment is not None:
+                payments.append(payment)
+
+            if len(batch) >= self.batch_size:
+                self.commit(batch, payments, result)
+                batch, payments, seen = [], [], set()
+
+        if batch:
+            self.commit(batch, payments, result)
+        self.controller.sales.flush()
+        return result
+
+    def build(self, row, seen):
+        """
+        Turns one row into an Attendee (and Payment if a ticket is bought).
+        Raises ValueError describing what is wrong with the row.
+        """
+        if not isinstance(row, dict):
+            raise ValueError("Invalid record")
+
+        username = text(row, "username").strip()
+        password = text(row, "password")
+        email = text(row, "email").strip()
+        if not username or not password:
+            raise ValueError("Username and password are required")
+        if username in seen or self.controller.find_attendee(username) is not None:
+            raise ValueError(f"Username already exists: {username}")
+
+        # The password is hashed later, together with the rest of the batch
+        attendee = Attendee(Account(username, password, email))
+
+        payment = None
+        ticket_name = text(row, "ticket_type").strip()
+        if ticket_name:
+            ticket_type = self.controller.find_ticket_type(ticket_name)
+            if ticket_type is None:
+                raise ValueError(f"Unknown ticket type: {ticket_name}")
+            method = text(row, "payment_method").strip() or "invoice"
+            payment = Payment(method, ticket_type.price)
+            attendee.pass_ref = Pass(Ticket(ticket_type, payment))
+        return attendee, payment
+
+    def commit(self, batch, payments, result):
+        """
+        Hashes the batch's passwords in parallel, then saves the attendees,
+        payments and sales of the batch as one transaction (a batch that
+        fails to save is not imported at all).
+        """
+        hashes = self.controller.passwords.hash_many(a.account.password for a in batch)
+        for a, h in zip(batch, hashes):
+            a.account.password = h
+        now = datetime.now()
+        sales = [
+            SaleEvent(now, "purchase", a.pass_ref.ticket.ticket_type.name,
+                      a.pass_ref.ticket.payment.method, a.pass_ref.ticket.payment.amount,
+                      username=a.account.username)
+            for a in batch if a.pass_ref is not None
+        ]
+        self.controller.add_attendees(batch, payments, sales)
+        result.tickets += len(sales)
+        result.created += len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import attendees from CSV or JSONL")
+    parser.add_argument("file", help=".csv file with a header row, or .jsonl file")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--db", help="import into this SQLite database instead of the .pkl files")
+    args = parser.parse_args()
+
+    controller = GreenWaveController(SQLiteStorage(args.db) if args.db else None)
+    try:
+        result = BulkImporter(controller, args.batch_size).run(read_rows(args.file))
+    finally:
+        controller.close()
+
+    print(f"Created {result.created} attendees ({result.tickets} with tickets), "
+          f"{len(result.errors)} rows skipped")
+    for number, message in result.errors:
+        print(f"  row {number}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import threading                            # Seats change from several threads
+
+
+class WorkshopCatalog:
+    """
+    Indexes workshops by title and by exhibition, and keeps a separate
+    index of workshops that still have free seats. Reservations update
+    these indexes one workshop at a time, so queries such as "workshops
+    this ticket can join" cost O(result) instead of scanning every workshop.
+    Seat totals per exhibition are also kept up to date for the admin view.
+    """
+
+    def __init__(self, workshops):
+        self.by_title = {}                      # Title -> Workshop
+        self.by_exhibition = {}                 # Exhibition -> {title: Workshop}
+        self.available = {}                     # Exhibition -> {title: Workshop} with free seats
+        self.known_free = {}                    # Title -> free seats last seen by the catalog
+        self.known_seats = {}                   # Title -> total seats last seen by the catalog
+        self.total_seats = {}                   # Exhibition -> total seats
+        self.free_seats = {}                    # Exhibition -> free seats
+        self.lock = threading.Lock()
+        for w in workshops:
+            self.add(w)
+
+    def add(self, workshop):
+        """
+        Adds a new workshop to all indexes.
+        """
+        with self.lock:
+            exhibition = workshop.exhibition
+            self.by_title[workshop.title] = workshop
+            self.by_exhibition.setdefault(exhibition, {})[workshop.title] = workshop
+            self.available.setdefault(exhibition, {})
+            self.total_seats[exhibition] = self.total_seats.get(exhibition, 0) + workshop.seats
+            self.free_seats[exhibition] = self.free_seats.get(exhibition, 0) + workshop.capacity
+            self.known_free[workshop.title] = workshop.capacity
+            self.known_seats[workshop.title] = workshop.seats
+            if workshop.capacity > 0:
+                self.available[exhibition][workshop.title] = workshop
+
+    def update(self, workshop):
+        """
+        Brings the indexes up to date after the workshop's free or total seats changed.
+        """
+        with self.lock:
+            exhibition = workshop.exhibition
+            self.free_seats[exhibition] += workshop.capacity - self.known_free[workshop.title]
+            self.known_free[workshop.title] = workshop.capacity
+            self.total_seats[exhibition] += workshop.seats - self.known_seats[workshop.title]
+            self.known_seats[workshop.title] = workshop.seats
+            if workshop.capacity > 0:
+                self.available[exhibition][workshop.title] = workshop
+            else:
+                self.available[exhibition].pop(workshop.title, None)
+
+    # -------------------------------
+    # QUERIES
+    # -------------------------------
+
+    def find(self, title):
+        """
+        Returns the workshop with the given title, or None.
+        """
+        return self.by_title.get(title)
+
+    def exhibitions(self):
+        """
+        Returns the sorted names of all exhibitions that have workshops.
+        """
+        return sorted(self.by_exhibition)
+
+    def in_exhibition(self, exhibition):
+        """
+        Returns all workshops of one exhibition.
+        """
+        return list(self.by_exhibition.get(exhibition, {}).values())
+
+    def available_for(self, ticket_type, exhibition=None):
+        """
+        Returns the workshops with free seats that the ticket type can access,
+        optionally limited to one exhibition.
+        """
+        exhibitions = ticket_type.exhibitions if ticket_type is not None else self.exhibitions()
+        result = []
+        with self.lock:
+            for e in exhibitions:
+                if exhibition is None or e == exhibition:
+                    result.extend(self.available.get(e, {}).values())
+        return result
+
+    def summary(self):
+        """
+        Returns seat usage per exhibition for the admin dashboard:
+        {exhibition: {"workshops", "seats", "free", "reserved", "occupancy"}}
+        """
+        result = {}
+        with self.lock:
+            for e in sorted(self.by_exhibition):
+                seats = self.total_seats[e]
+                reserved = seats - self.free_seats[e]
+                result[e] = {
+                    "workshops": len(self.by_exhibition[e]),
+                    "seats": seats,
+                    "free": self.free_seats[e],
+                    "reserved": reserved,
+                    "occupancy": round(100 * reserved / seats, 1) if seats else 0.0
+                }
+        return result
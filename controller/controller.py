@@ -1,6 +1,20 @@
+import copy                                 # Attendees are saved with a new pass before it is applied
 import pickle                               # Used for saving and loading data persistently
-from datetime import date                  # Used to track daily sales report dates
+import os                                   # File sizes for the load metrics
+import threading                            # Locks shared state when serving several users
+import time                                 # Times data file loads and writes for the metrics
+from datetime import datetime               # Time of each sale for the analytics
 from model.models import *                 # Import all model classes (MVC pattern)
+from controller.storage import KEYS, PickleStorage  # Storage layer (journaled pickle files by default)
+from controller.writer import write_atomic  # Crash-safe whole-file writes
+from controller.passwords import PasswordHasher  # Salted password hashing
+from controller.catalog import WorkshopCatalog  # Workshops indexed by exhibition and free seats
+from controller.reservations import ReservationEngine, ReservationLedger  # Thread-safe seat reservations
+from controller.sessions import SessionError, SessionManager  # Many users at once
+from controller.sales import SalesLedger   # Date-keyed daily sales with batched saving
+from controller.waitlist import PromotionScheduler, Waitlist  # Queues for full workshops
+from controller.analytics import GRANULARITIES, SalesAnalytics  # Sale events with time rollups
+from controller.snapshots import SnapshotStore  # Point-in-time backups of the data files
 
 class GreenWaveController:
     """
@@ -8,31 +22,232 @@ class GreenWaveController:
     It connects the GUI (View) with the data classes (Model).
     """
 
-    def __init__(self):
-        # Load saved system data from pickle files
-        self.attendees = self.load_data("attendees.pkl")      # All registered attendees
-        self.payments = self.load_data("payments.pkl")        # All payment records
-        self.workshops = self.load_data("workshops.pkl")      # All workshops
-        self.sales_reports = self.load_data("sales.pkl")     # Daily sales reports
+    def __init__(self, storage=None, passwords=None, metrics=None):
+        start = time.perf_counter()
+
+        # Optional instrumentation (controller.metrics.Metrics); None turns it off
+        self.metrics = metrics
+
+        # Storage backend used for all saving and loading (pickle files by default)
+        self.storage = storage if storage is not None else PickleStorage()
+
+        # Hashes and verifies account passwords
+        self.passwords = passwords if passwords is not None else PasswordHasher()
 
         # Predefined ticket types available in the system
+        # (shared objects: loaded tickets and passes point back to these)
         self.ticket_types = [
-            TicketType("Single", 100, ["A"]),                 # Access to Exhibition A only
-            TicketType("Double", 150, ["A", "B"]),            # Access to Exhibitions A and B
-            TicketType("Full", 200, ["A", "B", "C"])          # Full access to all exhibitions
+            TicketType.shared("Single", 100, ["A"]),          # Access to Exhibition A only
+            TicketType.shared("Double", 150, ["A", "B"]),     # Access to Exhibitions A and B
+            TicketType.shared("Full", 200, ["A", "B", "C"])   # Full access to all exhibitions
         ]
 
-        # Stores the currently logged-in user
+        # Payments, workshops and sales are loaded on first access
+        # (see the properties under LAZY DATA SETS)
+        self.loaded = {}
+        self.load_lock = threading.RLock()
+
+        # Registered attendees; with sharded or SQLite storage they are read
+        # one at a time when first looked up, so this starts out empty
+        self.attendees = self.load_data("attendees.pkl")
+
+        # Username -> Attendee index for O(1) account lookups
+        # (with on-demand storage this only holds attendees read so far)
+        self.attendee_index = self.index_attendees(self.attendees)
+
+        # Stores the currently logged-in user of the GUI
         self.logged_in = None
 
-        # Create default workshops only if no workshops exist yet
-        if not self.workshops:
-            self.workshops = [
+        # Explicit sessions for serving many users from one controller
+        self.sessions = SessionManager()
+
+        # Locks for state shared between threads (accounts and payments)
+        self.accounts_lock = threading.Lock()
+        self.payments_lock = threading.Lock()
+        self.checkout_lock = threading.RLock()     # Idempotency keys and passes being changed
+        self.checkout_done = threading.Condition(self.checkout_lock)  # Notified when a checkout is saved
+        self.in_flight = set()                      # ("key", key) and ("attendee", username) being saved
+
+        # Promotes waitlisted attendees in the background once started
+        # (see start_scheduler); until then promotions happen right away
+        self.scheduler = None
+
+        # Time every public method and report background snapshot writes
+        if self.metrics is not None:
+            self.metrics.instrument(self)
+            self.storage.observe(lambda name, nbytes, seconds: self.metrics.record_io("snapshot", name, nbytes, seconds))
+
+        # Seconds spent in __init__ (reported at startup)
+        self.startup_time = time.perf_counter() - start
+        if self.metrics is not None:
+            self.metrics.observe("startup", self.startup_time)
+
+    # -------------------------------
+    # LAZY DATA SETS
+    # -------------------------------
+
+    def _lazy(self, name, load):
+        """
+        Returns the named data set, loading it the first time it is used.
+        """
+        value = self.loaded.get(name)
+        if value is None:
+            with self.load_lock:
+                value = self.loaded.get(name)
+                if value is None:
+                    value = self.loaded[name] = load()
+        return value
+
+    @property
+    def payments(self):
+        """
+        All payment records.
+        """
+        return self._lazy("payments", lambda: self.load_data("payments.pkl"))
+
+    @property
+    def workshops(self):
+        """
+        All workshops.
+        """
+        return self._lazy("workshops", self.load_workshops)
+
+    @property
+    def sales_reports(self):
+        """
+        Daily sales reports.
+        """
+        return self._lazy("sales_reports", lambda: self.load_data("sales.pkl"))
+
+    @property
+    def sales(self):
+        """
+        Daily sales indexed by date; changed reports are saved in batches.
+        """
+        return self._lazy("sales", lambda: SalesLedger(
+            self.sales_reports,
+            save=lambda r: self.record_change("sales.pkl", self.sales_reports, r)
+        ))
+
+    @property
+    def analytics(self):
+        """
+        Every purchase and upgrade, with hourly, daily and weekly rollups.
+        """
+        return self._lazy("analytics", lambda: SalesAnalytics(self.load_data("sales_events.pkl")))
+
+    @property
+    def checkouts(self):
+        """
+        Idempotency key -> SaleEvent of every checkout made with a key.
+        """
+        return self._lazy("checkouts", lambda: {e.key: e for e in self.analytics.events if e.key is not None})
+
+    @property
+    def snapshots(self):
+        """
+        Point-in-time backups, in a "backups" folder next to the data.
+        """
+        return self._lazy("snapshots", lambda: SnapshotStore(self.storage))
+
+    @property
+    def reservations(self):
+        """
+        Handles seat reservations safely across threads
+        (its ledger holds every reservation).
+        """
+        return self._lazy("reservations", lambda: ReservationEngine(self.load_ledger()))
+
+    @property
+    def ledger(self):
+        """
+        Every reservation, indexed by attendee and by workshop.
+        """
+        return self.reservations.ledger
+
+    @property
+    def waitlist(self):
+        """
+        Attendees queued for full workshops.
+        """
+        return self._lazy("waitlist", lambda: Waitlist(self.load_data("waitlist.pkl")))
+
+    @property
+    def catalog(self):
+        """
+        Workshop indexes (by title, by exhibition, with free seats).
+        """
+        return self._lazy("catalog", self.load_catalog)
+
+    def load_workshops(self):
+        """
+        Loads the workshops, creating the default ones if none exist yet.
+        Free seats are worked out from the reservation ledger rather than
+        read from the file, so they always agree with the saved reservations.
+        """
+        workshops = self.load_data("workshops.pkl")
+        if not workshops:
+            workshops = [
                 Workshop("Solar Energy", "A", 10),            # Workshop in Exhibition A
                 Workshop("Electric Vehicles", "B", 10),       # Workshop in Exhibition B
                 Workshop("Recycling Tech", "C", 10)           # Workshop in Exhibition C
             ]
-            self.save_data("workshops.pkl", self.workshops)  # Save default workshops
+            self.save_data("workshops.pkl", workshops)       # Save default workshops
+
+        reserved = self.ledger.counts()
+        for w in workshops:
+            taken = reserved.get(w.title, 0)
+            if getattr(w, "seats", None) is None:
+                w.seats = w.capacity + taken                # Saved before seat totals were stored
+            w.capacity = w.seats - taken
+        return workshops
+
+    def load_catalog(self):
+        """
+        Builds the workshop catalog.
+        """
+        return WorkshopCatalog(self.workshops)
+
+    def load_ledger(self):
+        """
+        Loads the reservation ledger. The first time, reservations that older
+        versions stored inside each attendee are moved into the ledger.
+        """
+        if self.storage.exists("reservations.pkl"):
+            return ReservationLedger(self.load_data("reservations.pkl"))
+        return ReservationLedger(self.migrate_reservations())
+
+    def migrate_reservations(self):
+        """
+        Collects the workshops each attendee reserved into Reservation records,
+        saves them, and removes the workshop copies from the attendees.
+        """
+        if "attendees.pkl" in self.storage.on_demand:
+            attendees = self.storage.load("attendees.pkl")
+        else:
+            attendees = self.attendees
+
+        # Attendees already read by SQLite storage are separate copies: clear those too
+        known = {id(a) for a in attendees}
+        extra = [a for a in self.attendees if id(a) not in known]
+
+        reservations, seen, changed = [], set(), []
+        for a in attendees + extra:
+            old = getattr(a, "reservations", None)
+            if not old:
+                continue
+            for w in old:
+                key = (a.account.username, w.title)
+                if key not in seen:
+                    seen.add(key)
+                    reservations.append(Reservation(*key))
+            a.reservations = []
+            changed.append(a)
+
+        self.save_data("reservations.pkl", reservations)
+        if changed:
+            self.save_data("attendees.pkl", attendees)
+        return reservations
 
     # -------------------------------
     # PICKLE SYSTEM
@@ -40,84 +255,411 @@ class GreenWaveController:
 
     def save_data(self, filename, data):
         """
-        Saves any Python object to a binary file using pickle.
+        Saves a whole data set through the storage backend.
+        Other files are written directly using pickle (temp file + rename).
         """
-        with open(filename, "wb") as f:
-            pickle.dump(data, f)
+        start = time.perf_counter()
+        if filename in KEYS:
+            nbytes = self.storage.save(filename, data)
+        else:
+            nbytes = write_atomic(filename, data)
+        self._observe_io("save", filename, nbytes, start)
 
     def load_data(self, filename):
         """
-        Loads and returns data from a binary pickle file.
-        If the file does not exist, an empty list is returned.
+        Loads and returns a data set from the storage backend.
+        Data sets the backend reads on demand start out empty.
+        If the file does not exist, an empty list is returned;
+        damaged files raise an error instead of being treated as empty.
         """
+        if filename in self.storage.on_demand:
+            return []
+        start = time.perf_counter()
+        if filename in KEYS:
+            data = self.storage.load(filename)
+            if self.metrics is not None:
+                self._observe_io("load", filename, self.storage.size(filename), start)
+            return data
         try:
             with open(filename, "rb") as f:
-                return pickle.load(f)
-        except:
+                data = pickle.load(f)
+        except FileNotFoundError:
             return []
+        self._observe_io("load", filename, os.path.getsize(filename), start)
+        return data
+
+    def record_change(self, filename, data, item):
+        """
+        Saves a single added or changed item through the storage backend.
+        """
+        start = time.perf_counter()
+        self._observe_io("write", filename, self.storage.put(filename, data, item), start)
+
+    def record_changes(self, filename, data, items):
+        """
+        Saves several added or changed items in one storage write.
+        """
+        start = time.perf_counter()
+        self._observe_io("write", filename, self.storage.put_many(filename, data, items), start)
+
+    def record_removal(self, filename, data, key):
+        """
+        Saves the removal of the item with the given key.
+        """
+        start = time.perf_counter()
+        self._observe_io("write", filename, self.storage.delete(filename, data, key), start)
+
+    def record_removals(self, filename, data, keys):
+        """
+        Saves the removal of several items in one storage write.
+        """
+        start = time.perf_counter()
+        self._observe_io("write", filename, self.storage.delete_many(filename, data, keys), start)
+
+    def _observe_io(self, operation, filename, nbytes, start):
+        """
+        Records the bytes and duration of a data file load or write
+        (only when metrics are turned on).
+        """
+        if self.metrics is not None:
+            self.metrics.record_io(operation, filename, nbytes or 0, time.perf_counter() - start)
+
+    def flush(self):
+        """
+        Runs pending promotions, saves pending sales and waits until all
+        data files are written.
+        """
+        if self.scheduler is not None:
+            self.scheduler.flush()
+        if "sales" in self.loaded:
+            self.sales.flush()
+        self.storage.flush()
+
+    def close(self):
+        """
+        Runs pending promotions, saves pending sales and closes the storage backend.
+        """
+        if self.scheduler is not None:
+            self.scheduler.close()
+        if "sales" in self.loaded:
+            self.sales.flush()
+        self.storage.close()
+        self.passwords.close()
 
     # -------------------------------
     # ACCOUNT MANAGEMENT
     # -------------------------------
 
+    def index_attendees(self, attendees):
+        """
+        Builds the username -> Attendee index from a list of attendees.
+        """
+        return {a.account.username: a for a in attendees}
+
+    def find_attendee(self, username):
+        """
+        Returns the attendee with the given username, or None.
+        Attendees not in memory yet are read from on-demand storage.
+        """
+        a = self.attendee_index.get(username)
+        if a is None and "attendees.pkl" in self.storage.on_demand:
+            a = self.storage.get("attendees.pkl", username)
+            if a is not None:
+                self.attendees.append(a)
+                self.attendee_index[username] = a
+        return a
+
+    def new_attendee(self, username, password, email):
+        """
+        Builds a new Attendee with its Account (not yet registered).
+        The password is stored as a salted hash.
+        """
+        acc = Account(username, self.passwords.hash(password), email)  # Create Account object
+        return Attendee(acc)                          # Wrap inside Attendee object
+
     def create_account(self, username, password, email):
         """
         Creates a new attendee account.
         Prevents duplicate usernames.
         """
-        for a in self.attendees:
-            if a.account.username == username:
+        if self.find_attendee(username) is not None:
+            raise ValueError("Username already exists")
+
+        # Hash outside the lock so registrations do not wait for each other
+        attendee = self.new_attendee(username, password, email)
+
+        with self.accounts_lock:
+            if self.find_attendee(username) is not None:
                 raise ValueError("Username already exists")
 
-        acc = Account(username, password, email)      # Create Account object
-        self.attendees.append(Attendee(acc))         # Wrap inside Attendee object
-        self.save_data("attendees.pkl", self.attendees)
+            self.attendees.append(attendee)
+            self.attendee_index[username] = attendee     # Keep index in sync
+            self.record_change("attendees.pkl", self.attendees, attendee)
+
+    def add_attendees(self, attendees, payments=(), sales=()):
+        """
+        Registers many new attendees, the payments for their tickets and the
+        SaleEvents of those tickets as one storage transaction, so a batch
+        that fails to save leaves no attendee without its payment or sale.
+        Usernames must already be checked.
+        """
+        start = time.perf_counter()
+        payments, sales, saved_reports = list(payments), list(sales), []
+
+        def prepare(staged):
+            changes = [("attendees.pkl", self.attendees, attendees)]
+            if payments or sales:
+                changes += self.sale_changes(sales, payments, [], staged, saved_reports)
+            return changes
+
+        def apply():
+            # accounts_lock is held by the caller until this has run
+            self.attendees.extend(attendees)
+            for a in attendees:
+                self.attendee_index[a.account.username] = a
+            if payments or sales:
+                self.apply_sales(sales, payments, [], saved_reports)
+
+        with self.accounts_lock:
+            nbytes = self.storage.wait(self.storage.begin(prepare, apply))
+        changed = (("attendees.pkl", attendees), ("payments.pkl", payments),
+                   ("sales.pkl", sales), ("sales_events.pkl", sales))
+        self._observe_io("commit", "+".join(name for name, items in changed if items), nbytes, start)
+
+    def extend_payments(self, payments):
+        """
+        Adds saved payments to the list in memory.
+        """
+        with self.payments_lock:
+            self.payments.extend(payments)
+
+    def authenticate(self, username, password):
+        """
+        Returns the attendee matching the credentials without logging in.
+        """
+        a = self.find_attendee(username)
+        if a is None or not self.passwords.verify(password, a.account.password):
+            raise ValueError("Invalid login")
+
+        # Upgrade plaintext passwords from old data files (and outdated hashes)
+        if self.passwords.needs_rehash(a.account.password):
+            a.account.password = self.passwords.hash(password)
+            self.record_change("attendees.pkl", self.attendees, a)
+        return a
 
     def login(self, username, password):
         """
         Authenticates user login and sets logged_in attendee.
         """
-        for a in self.attendees:
-            if a.account.username == username and a.account.password == password:
-                self.logged_in = a
-                return
-        raise ValueError("Invalid login")
+        self.logged_in = self.authenticate(username, password)
 
-    def delete_logged_in_account(self):
+    def delete_logged_in_account(self, attendee=None):
         """
-        Deletes the currently logged-in user account.
+        Deletes the currently logged-in user account (or the given attendee),
+        cancels its reservations and takes it off every waitlist.
         """
-        self.attendees.remove(self.logged_in)
-        self.save_data("attendees.pkl", self.attendees)
-        self.logged_in = None
+        attendee = attendee or self.logged_in
+        reserved = self.get_reservations(attendee)
+        if reserved:
+            self.cancel_reservations(reserved, attendee)    # Give the seats back
+        waiting = [w for w, _ in self.get_waitlist(attendee)]
+        if waiting:
+            self.leave_waitlist(waiting, attendee)
+        with self.accounts_lock:
+            self.attendees.remove(attendee)
+            del self.attendee_index[attendee.account.username]
+            self.record_removal("attendees.pkl", self.attendees, attendee.account.username)
+        self.sessions.close_user(attendee.account.username)
+        if attendee is self.logged_in:
+            self.logged_in = None
 
     # -------------------------------
     # TICKETS
     # -------------------------------
 
-    def purchase_ticket(self, ticket_type, payment_method):
+    def find_ticket_type(self, name):
         """
-        Handles ticket purchase process.
-        Creates a payment, ticket, and assigns a pass to the attendee.
+        Returns the ticket type with the given name, or None.
         """
-        payment = Payment(payment_method, ticket_type.price)  # Create payment record
-        ticket = Ticket(ticket_type, payment)                 # Create ticket object
+        for t in self.ticket_types:
+            if t.name == name:
+                return t
+        return None
 
-        self.logged_in.pass_ref = Pass(ticket)                # Assign pass to user
-        self.payments.append(payment)                         # Store payment
-        self.save_data("payments.pkl", self.payments)         # Save all payments
+    def purchase_ticket(self, ticket_type, payment_method, attendee=None, key=None):
+        """
+        Handles ticket purchase process.
+        Creates a payment, ticket, and assigns a pass to the attendee
+        (the logged-in user unless another attendee is given), saved as one
+        checkout (see checkout_many). Returns the SaleEvent of the purchase.
+        """
+        return self.checkout_many([(attendee or self.logged_in, ticket_type, payment_method, key)])[0]
 
-        self.update_sales_report(ticket_type.price)           # Update daily sales
+    def checkout_many(self, orders):
+        """
+        Buys tickets for many (attendee, ticket type, payment method, key)
+        orders and saves them all with one storage transaction, so a burst
+        of sales costs a single fsync. `key` is an optional idempotency key
+        chosen by the client: an order whose key was already checked out
+        returns the earlier SaleEvent instead of charging again.
+        Returns one SaleEvent per order.
+        """
+        now = datetime.now()
+        claimed = {("attendee", a.account.username) for a, _, _, _ in orders}
+        claimed |= {("key", key) for _, _, _, key in orders if key is not None}
+        results, work, new_keys = [], [], {}
+        with self.checkout_lock:
+            self.wait_for_checkouts(claimed)
+            for attendee, ticket_type, payment_method, key in orders:
+                event = self.find_checkout(key, attendee, "purchase", new_keys)
+                if event is None:
+                    event = SaleEvent(now, "purchase", ticket_type.name, payment_method, ticket_type.price,
+                                      username=attendee.account.username, key=key)
+                    payment = Payment(payment_method, ticket_type.price)
+                    work.append((attendee, event, Pass(Ticket(ticket_type, payment)), payment))
+                    if key is not None:
+                        new_keys[key] = event
+                results.append(event)
+            self.in_flight |= claimed
+        try:
+            self.commit_sales(work)
+        finally:
+            self.release_checkouts(claimed)
+        return results
 
-    def upgrade_ticket(self, new_ticket_type):
+    def upgrade_ticket(self, new_ticket_type, attendee=None, key=None):
         """
         Upgrades the attendee ticket and only charges the price difference.
+        Saved as one checkout like a purchase; returns its SaleEvent.
+        """
+        attendee = attendee or self.logged_in
+        claimed = {("attendee", attendee.account.username)} | ({("key", key)} if key is not None else set())
+        with self.checkout_lock:
+            self.wait_for_checkouts(claimed)
+            event = self.find_checkout(key, attendee, "upgrade")
+            if event is not None:
+                return event
+            old_pass = attendee.pass_ref
+            old_type = old_pass.ticket_type
+            payment = old_pass.ticket.payment
+            event = SaleEvent(
+                datetime.now(), "upgrade", new_ticket_type.name, payment.method if payment else None,
+                new_ticket_type.price - old_type.price, old_type.name, attendee.account.username, key
+            )
+            upgraded = Pass(old_pass.ticket)
+            upgraded.ticket_type = new_ticket_type          # Same ticket and payment, new access
+            self.in_flight |= claimed
+        try:
+            self.commit_sales([(attendee, event, upgraded, None)])
+        finally:
+            self.release_checkouts(claimed)
+        return event
+
+    def wait_for_checkouts(self, claimed):
+        """
+        Waits (holding checkout_lock) until no checkout with any of the
+        claimed idempotency keys or attendees is still being saved, so a
+        retry sees how the first attempt ended.
+        """
+        self.checkout_done.wait_for(lambda: not claimed & self.in_flight)
+
+    def release_checkouts(self, claimed):
+        """
+        Lets checkouts waiting for the claimed keys and attendees go ahead.
+        """
+        with self.checkout_lock:
+            self.in_flight -= claimed
+            self.checkout_done.notify_all()
+
+    def find_checkout(self, key, attendee, kind, new_keys=None):
+        """
+        Returns the sale already made with an idempotency key (or earlier
+        in the same batch, see new_keys), or None.
+        Reusing a key for another attendee or kind of sale is an error.
+        """
+        if key is None:
+            return None
+        event = (new_keys or {}).get(key) or self.checkouts.get(key)
+        if event is not None and (event.username != attendee.account.username or event.kind != kind):
+            raise ValueError("Idempotency key already used for another checkout")
+        return event
+
+    def commit_sales(self, work):
+        """
+        Saves sales as one storage transaction, then applies them.
+        `work` holds (attendee, SaleEvent, new pass, new payment) per sale,
+        with None for whatever does not change. The payments, passes
+        (attendees), sale events and daily reports are saved together and
+        nothing changes in memory until they are durable, so if saving
+        fails the error is raised and no trace is left. Idempotency keys
+        are registered once the sales are saved.
+        Upgrades add revenue to the daily report but are not counted as tickets sold.
+        """
+        if not work:
+            return
+        start = time.perf_counter()
+        events = [e for _, e, _, _ in work]
+        payments = [p for _, _, _, p in work if p is not None]
+        passes = [(a, new_pass) for a, _, new_pass, _ in work if new_pass is not None]
+        saved_reports = []
+
+        nbytes = self.storage.wait(self.storage.begin(
+            lambda staged: self.sale_changes(events, payments, passes, staged, saved_reports),
+            lambda: self.apply_sales(events, payments, passes, saved_reports)
+        ))
+        with self.checkout_lock:
+            for e in events:
+                if e.key is not None:
+                    self.checkouts[e.key] = e
+        changed = (("payments.pkl", payments), ("attendees.pkl", passes),
+                   ("sales.pkl", events), ("sales_events.pkl", events))
+        self._observe_io("commit", "+".join(name for name, items in changed if items), nbytes, start)
+
+    def sale_changes(self, events, payments, passes, staged, saved_reports):
+        """
+        Returns the (name, data, items) changes that save sales without
+        touching the data in memory: attendees are copied with their new
+        pass, and daily reports with the sales added on top of the copies
+        `staged` by earlier transactions that are not applied yet.
+        The report copies are also added to saved_reports.
         """
-        old_price = self.logged_in.pass_ref.ticket_type.price
-        diff = new_ticket_type.price - old_price
+        attendees = {}
+        for a, new_pass in passes:
+            saved = attendees.get(a.account.username) or copy.copy(a)
+            saved.pass_ref = new_pass
+            attendees[a.account.username] = saved
 
-        self.logged_in.pass_ref.ticket_type = new_ticket_type  # Update ticket type
-        self.update_sales_report(diff)                         # Update revenue
+        reports = {}
+        for e in events:
+            day = e.time.date()
+            if day not in reports:
+                reports[day] = self.sales.copy(day, staged.get(("sales.pkl", day)))
+            SalesLedger.add_sale(reports[day], e.amount, e.ticket_type, e.payment_method, int(e.kind == "purchase"))
+        for day, r in reports.items():
+            staged[("sales.pkl", day)] = r
+        saved_reports.extend(reports.values())
+
+        return [
+            ("payments.pkl", self.payments, payments),
+            ("attendees.pkl", self.attendees, list(attendees.values())),
+            ("sales.pkl", self.sales_reports, list(reports.values())),
+            ("sales_events.pkl", self.analytics.events, events)
+        ]
+
+    def apply_sales(self, events, payments, passes, saved_reports):
+        """
+        Puts saved sales into memory (called once they are durable).
+        """
+        for a, new_pass in passes:
+            a.pass_ref = new_pass
+        self.extend_payments(payments)
+        for e in events:
+            self.sales.record(e.amount, e.ticket_type, e.payment_method, e.time.date(),
+                              int(e.kind == "purchase"), save=False)
+        for r in saved_reports:
+            self.sales.resave_if_changed(r)
+        with self.analytics.lock:
+            self.analytics.add(events)
 
     # -------------------------------
     # WORKSHOPS
@@ -129,24 +671,371 @@ class GreenWaveController:
         """
         return self.workshops
 
-    def reserve_workshops(self, selected):
+    def add_workshop(self, title, exhibition, capacity):
         """
-        Reserves selected workshops for the logged-in user.
-        Ensures ticket access and capacity limits.
+        Adds a new workshop. Titles must be unique.
+        """
+        if self.catalog.find(title) is not None:
+            raise ValueError("Workshop already exists")
+        w = Workshop(title, exhibition, capacity)
+        self.workshops.append(w)
+        self.catalog.add(w)
+        self.record_change("workshops.pkl", self.workshops, w)
+        return w
+
+    def get_exhibitions(self):
+        """
+        Returns the sorted names of all exhibitions that have workshops.
         """
-        allowed = self.logged_in.pass_ref.ticket_type.exhibitions
+        return self.catalog.exhibitions()
 
+    def get_available_workshops(self, ticket_type, exhibition=None):
+        """
+        Returns the workshops with free seats that a ticket type can access.
+        """
+        return self.catalog.available_for(ticket_type, exhibition)
+
+    def query_workshops(self, exhibition=None, search="", offset=0, limit=20, ticket_type=None):
+        """
+        Returns one page of workshops and the total number that match.
+        Workshops can be filtered by exhibition and by text in the title,
+        or limited to those with free seats that a ticket type can access.
+        """
+        if ticket_type is not None:
+            workshops = self.catalog.available_for(ticket_type, exhibition)
+        elif exhibition:
+            workshops = self.catalog.in_exhibition(exhibition)
+        else:
+            workshops = self.workshops
+
+        if search:
+            search = search.lower()
+            workshops = [w for w in workshops if search in w.title.lower()]
+        return workshops[offset:offset + limit], len(workshops)
+
+    def set_workshop_capacity(self, title, seats):
+        """
+        Changes the total seats of a workshop (never below the seats already
+        reserved). Added seats go to the workshop's waitlist.
+        """
+        w = self.find_workshop(title)
+        if w is None:
+            raise ValueError("Workshop not found")
+        self.reservations.resize(w, seats)
+        self.catalog.update(w)
+        self.record_change("workshops.pkl", self.workshops, w)
+        self.release_seats([title])
+
+    def find_workshop(self, title):
+        """
+        Returns the workshop with the given title, or None.
+        """
+        return self.catalog.find(title)
+
+    def get_workshop_summary(self):
+        """
+        Returns seat usage per exhibition (workshops, seats, free, reserved, occupancy %).
+        """
+        return self.catalog.summary()
+
+    def canonical_workshops(self, selected):
+        """
+        Maps the selected workshops (or copies of them) to the catalog's objects.
+        """
+        workshops = []
         for w in selected:
+            canonical = self.find_workshop(w.title)
+            if canonical is None:
+                raise ValueError("Workshop not found")
+            workshops.append(canonical)
+        return workshops
+
+    def reserve_workshops(self, selected, attendee=None):
+        """
+        Reserves selected workshops for the logged-in user (or the given attendee).
+        Ensures ticket access and capacity limits.
+        Either all selected workshops are reserved or none are. Seats freed
+        while others are on a workshop's waitlist go to them, not to newcomers.
+        """
+        attendee = attendee or self.logged_in
+        allowed = attendee.pass_ref.ticket_type.exhibitions
+        workshops = self.canonical_workshops(selected)
+
+        for w in workshops:
             if w.exhibition not in allowed:
                 raise ValueError("Workshop not allowed")
 
-            if w.capacity <= 0:
-                raise ValueError("Workshop full")
+        # Raises if any is full (or has a waitlist) or is already reserved
+        self.reservations.reserve(
+            attendee.account.username, workshops, self.save_reservations, self.waitlist.length
+        )
+
+        for w in workshops:
+            self.catalog.update(w)
+
+    def cancel_reservations(self, selected, attendee=None):
+        """
+        Cancels the selected reservations of the logged-in user (or the given attendee)
+        and gives the seats back to the workshops.
+        """
+        attendee = attendee or self.logged_in
+        workshops = self.canonical_workshops(selected)
+
+        self.reservations.cancel(attendee.account.username, workshops, self.save_cancellations)
 
-            w.capacity -= 1                                  # Reduce available seats
-            self.logged_in.reservations.append(w)            # Save reservation
+        for w in workshops:
+            self.catalog.update(w)
+        self.release_seats(w.title for w in workshops)     # Offer the seats to the waitlists
 
-        self.save_data("workshops.pkl", self.workshops)
+    def save_reservations(self, added):
+        """
+        Saves new reservations (called while their workshops are locked).
+        """
+        with self.ledger.lock:
+            self.record_changes("reservations.pkl", self.ledger.data(), added)
+
+    def save_cancellations(self, removed):
+        """
+        Saves cancelled reservations with one write (called while their
+        workshops are locked), so either all or none of them are saved.
+        """
+        with self.ledger.lock:
+            self.record_removals("reservations.pkl", self.ledger.data(), removed)
+
+    def get_reservations(self, attendee=None):
+        """
+        Returns the workshops reserved by the logged-in user (or the given attendee).
+        """
+        attendee = attendee or self.logged_in
+        titles = self.ledger.titles_for(attendee.account.username)
+        return [w for w in map(self.find_workshop, titles) if w is not None]
+
+    def get_roster(self, title):
+        """
+        Returns the usernames of everyone who reserved the workshop.
+        """
+        return self.ledger.roster(title)
+
+    # -------------------------------
+    # WAITLIST
+    # -------------------------------
+
+    def waitlist_priority(self, attendee):
+        """
+        Full ticket holders are promoted before everyone else.
+        """
+        return 0 if attendee.pass_ref.ticket_type.name == "Full" else 1
+
+    def join_waitlist(self, selected, attendee=None):
+        """
+        Queues the logged-in user (or the given attendee) for the selected
+        workshops, which must be full or already have a queue.
+        Either the attendee joins every queue or none.
+        """
+        attendee = attendee or self.logged_in
+        username = attendee.account.username
+        allowed = attendee.pass_ref.ticket_type.exhibitions
+        workshops = self.canonical_workshops(selected)
+
+        with self.waitlist.lock:
+            for w in workshops:
+                if w.exhibition not in allowed:
+                    raise ValueError("Workshop not allowed")
+                if self.ledger.has(username, w.title):
+                    raise ValueError("Workshop already reserved")
+                if w.capacity > 0 and not self.waitlist.length(w.title):
+                    raise ValueError("Workshop has free seats")
+                if self.waitlist.has(username, w.title):
+                    raise ValueError("Already on the waitlist")
+
+            priority = self.waitlist_priority(attendee)
+            entries = [self.waitlist.join(username, w.title, priority) for w in workshops]
+            self.record_changes("waitlist.pkl", self.waitlist.data(), entries)
+
+        # A seat may have been released while joining: give it out now
+        self.release_seats(w.title for w in workshops)
+
+    def leave_waitlist(self, selected, attendee=None):
+        """
+        Takes the logged-in user (or the given attendee) off the selected waitlists.
+        """
+        attendee = attendee or self.logged_in
+        username = attendee.account.username
+        with self.waitlist.lock:
+            for w in selected:
+                if not self.waitlist.has(username, w.title):
+                    raise ValueError("Not on the waitlist")
+            for w in selected:
+                key = self.waitlist.leave(username, w.title)
+                self.record_removal("waitlist.pkl", self.waitlist.data(), key)
+
+    def get_waitlist(self, attendee=None):
+        """
+        Returns (workshop, place in the queue) for every waitlist the
+        logged-in user (or the given attendee) is on.
+        """
+        attendee = attendee or self.logged_in
+        username = attendee.account.username
+        return [
+            (self.find_workshop(title), self.waitlist.position(username, title))
+            for title in self.waitlist.titles_for(username)
+        ]
+
+    def get_waitlist_queue(self, title):
+        """
+        Returns the usernames waiting for the workshop, in promotion order.
+        """
+        return [e.username for e in self.waitlist.queue(title)]
+
+    def release_seats(self, titles):
+        """
+        Hands released or added seats of the workshops to their waitlists:
+        in the background when the scheduler runs, otherwise right away.
+        """
+        titles = [t for t in titles if self.waitlist.length(t)]
+        if not titles:
+            return
+        if self.scheduler is not None:
+            self.scheduler.release(titles)
+        else:
+            self.promote_waitlists(titles)
+
+    def start_scheduler(self, delay=0.05):
+        """
+        Moves waitlist promotions to a background thread that handles
+        seats released within `delay` seconds of each other as one batch.
+        """
+        if self.scheduler is None:
+            self.scheduler = PromotionScheduler(self.promote_waitlists, delay)
+
+    def promote_waitlists(self, titles):
+        """
+        Fills the free seats of each workshop from its waitlist and returns
+        the new reservations. Attendees who can no longer join (deleted
+        account, ticket without access) are dropped from the queue. Each
+        workshop's promotions are saved with one write per data file.
+        If promoting a workshop fails, nobody gets its seats and the
+        entries taken from its queue are put back before the error is raised.
+        """
+        promoted = []
+        for title in titles:
+            w = self.find_workshop(title)
+            if w is None:
+                continue
+            taken = []                                  # Entries removed from the queue
+            try:
+                added = self.reservations.fill(w, self.waitlist_candidates(title, taken), self.save_reservations)
+            except Exception:
+                self.waitlist.restore(taken)            # fill() gave the seats back
+                raise
+            if taken:
+                with self.waitlist.lock:
+                    for e in taken:
+                        self.record_removal("waitlist.pkl", self.waitlist.data(), (e.username, e.title))
+            if added:
+                self.catalog.update(w)
+                promoted += added
+        return promoted
+
+    def waitlist_candidates(self, title, taken):
+        """
+        Yields the usernames of the workshop's waitlist in promotion order,
+        removing each entry from the queue (and adding it to `taken`).
+        """
+        while True:
+            e = self.waitlist.pop(title)
+            if e is None:
+                return
+            taken.append(e)
+            a = self.find_attendee(e.username)
+            w = self.find_workshop(title)
+            if a is None or a.pass_ref is None or w.exhibition not in a.pass_ref.ticket_type.exhibitions:
+                continue
+            yield e.username
+
+    # -------------------------------
+    # SESSIONS
+    # Session-scoped versions of the operations above, used when one
+    # controller serves many users instead of the single logged_in slot.
+    # -------------------------------
+
+    def open_session(self, username, password):
+        """
+        Logs an attendee in and returns a new session token.
+        """
+        return self.sessions.open(self.authenticate(username, password)).token
+
+    def open_admin_session(self, username, password):
+        """
+        Logs the administrator in and returns a new session token.
+        """
+        if not self.validate_admin(username, password):
+            raise SessionError("Invalid Admin Login")
+        return self.sessions.open(is_admin=True).token
+
+    def close_session(self, token):
+        """
+        Logs out the session.
+        """
+        self.sessions.close(token)
+
+    def session_attendee(self, token):
+        """
+        Returns the attendee logged in with the given session token.
+        """
+        session = self.sessions.get(token)
+        if session.attendee is None:
+            raise SessionError("Not logged in")
+        return session.attendee
+
+    def require_admin(self, token):
+        """
+        Raises SessionError unless the token belongs to an admin session.
+        """
+        if not self.sessions.get(token).is_admin:
+            raise SessionError("Admin login required")
+
+    def session_delete_account(self, token):
+        """
+        Deletes the session's account (see delete_logged_in_account).
+        """
+        self.delete_logged_in_account(self.session_attendee(token))
+
+    def session_purchase_ticket(self, token, ticket_type, payment_method, key=None):
+        """
+        Buys a ticket for the session's attendee and returns its SaleEvent.
+        """
+        return self.purchase_ticket(ticket_type, payment_method, self.session_attendee(token), key)
+
+    def session_upgrade_ticket(self, token, new_ticket_type, key=None):
+        """
+        Upgrades the ticket of the session's attendee and returns its SaleEvent.
+        """
+        return self.upgrade_ticket(new_ticket_type, self.session_attendee(token), key)
+
+    def session_reserve_workshops(self, token, selected):
+        """
+        Reserves the selected workshops for the session's attendee.
+        """
+        self.reserve_workshops(selected, self.session_attendee(token))
+
+    def session_cancel_reservations(self, token, selected):
+        """
+        Cancels the selected reservations of the session's attendee.
+        """
+        self.cancel_reservations(selected, self.session_attendee(token))
+
+    def session_join_waitlist(self, token, selected):
+        """
+        Queues the session's attendee for the selected workshops (see join_waitlist).
+        """
+        self.join_waitlist(selected, self.session_attendee(token))
+
+    def session_leave_waitlist(self, token, selected):
+        """
+        Takes the session's attendee off the selected waitlists.
+        """
+        self.leave_waitlist(selected, self.session_attendee(token))
 
     # -------------------------------
     # ADMIN
@@ -164,19 +1053,93 @@ class GreenWaveController:
         """
         return self.sales_reports
 
-    def update_sales_report(self, amount):
+    def query_sales_reports(self, offset=0, limit=20):
+        """
+        Returns one page of daily sales reports (newest first) and the total count.
+        """
+        total = len(self.sales_reports)
+        start = max(total - offset - limit, 0)
+        end = max(total - offset, 0)
+        return self.sales_reports[start:end][::-1], total
+
+    def update_sales_report(self, amount, ticket_type_name=None, payment_method=None, tickets=1):
         """
         Updates today's sales report or creates a new one if it does not exist.
         """
-        today = date.today()
+        self.sales.record(amount, ticket_type_name, payment_method, tickets=tickets)
 
-        for r in self.sales_reports:
-            if r.date == today:
-                r.tickets_sold += 1
-                r.total_sales += amount
-                self.save_data("sales.pkl", self.sales_reports)
-                return
+    def get_sales_summary(self, start, end):
+        """
+        Returns ticket and revenue totals for the days from start to end,
+        broken down by ticket type and payment method.
+        """
+        return self.sales.summary(start, end)
+
+    def get_week_summary(self):
+        """
+        Returns the sales summary of the current week.
+        """
+        return self.sales.week_summary()
+
+    def get_month_summary(self):
+        """
+        Returns the sales summary of the current month.
+        """
+        return self.sales.month_summary()
+
+    def get_sales_analytics(self):
+        """
+        Returns overall sales, upgrade conversion and payment methods ranked by revenue.
+        """
+        return self.analytics.summary()
+
+    def get_sales_trend(self, granularity="day", periods=14):
+        """
+        Returns (period start, rollup) for the last `periods` hours, days or weeks.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError("Unknown granularity")
+        return self.analytics.trend(granularity, periods)
+
+    def sales_csv_chunks(self, granularity="events"):
+        """
+        Returns an iterator over the CSV export (every event, or one row per
+        hour, day or week) in text chunks, for streaming.
+        """
+        if granularity != "events" and granularity not in GRANULARITIES:
+            raise ValueError("Unknown granularity")
+        return self.analytics.csv_chunks(granularity)
+
+    def export_sales_csv(self, path, granularity="events"):
+        """
+        Streams the CSV export into a file, one chunk at a time.
+        """
+        chunks = self.sales_csv_chunks(granularity)
+        start = time.perf_counter()
+        nbytes = 0
+        with open(path, "w", newline="") as f:
+            for chunk in chunks:
+                nbytes += f.write(chunk)
+        self._observe_io("write", os.path.basename(path), nbytes, start)
 
-        # Create new sales report for today if none exists
-        self.sales_reports.append(SalesReport(today, 1, amount))
-        self.save_data("sales.pkl", self.sales_reports)
+    # -------------------------------
+    # BACKUPS
+    # -------------------------------
+
+    def create_snapshot(self, incremental=False):
+        """
+        Saves pending sales, then takes a point-in-time snapshot of every
+        data file while sales carry on (see SnapshotStore). Returns its manifest.
+        """
+        if "sales" in self.loaded:
+            self.sales.flush()
+        start = time.perf_counter()
+        manifest = self.snapshots.create(incremental)
+        self._observe_io("snapshot", "backup", manifest["stored_bytes"], start)
+        return manifest
+
+    def list_snapshots(self):
+        """
+        Returns (id, time, kind, stored bytes, ms writes were held back) per snapshot, oldest first.
+        """
+        return self.snapshots.list()
@@ -0,0 +1,427 @@
+"""
+Versioned on-disk format for data snapshots and journal records.
+
+Snapshot file:  header + payload
+    header   "GWDS", format version (uint16), payload length (uint64), CRC32 (uint32)
+    payload  pickle (highest protocol) of (kind, columns): every data set is
+             flattened into plain records by its codec, with ticket types and
+             workshops stored once in a table and referenced by index.
+
+Journal file:   "GWJ1", then one frame per record
+    frame    payload length (uint32), CRC32 (uint32), pickled record
+
+Files written before this format (plain pickles) are still read. A snapshot
+or journal frame whose checksum does not match raises DataFormatError
+instead of being treated as empty; only a torn last journal record (the
+expected result of a crash while appending) is dropped.
+"""
+
+import pickle                               # Payload encoding
+import struct                               # Fixed-size headers
+import zlib                                 # CRC32 checksums
+from array import array                     # Compact numeric columns
+from datetime import datetime               # Sale event timestamps
+from model.models import *
+
+SNAPSHOT_MAGIC = b"GWDS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHQI")   # Magic, version, payload length, CRC32
+
+JOURNAL_MAGIC = b"GWJ1"
+FRAME_HEADER = struct.Struct("<II")         # Payload length, CRC32
+
+
+class DataFormatError(ValueError):
+    """
+    Raised when a data file is corrupt or was written by a newer version.
+    """
+
+
+# -------------------------------
+# CODECS
+# Each codec turns a list of model objects into flat columns and back.
+# -------------------------------
+
+class TypeTable:
+    """
+    Gives every distinct ticket type or workshop one index in a table,
+    so records can reference it instead of repeating it.
+    """
+
+    def __init__(self, row):
+        self.row = row                      # Object -> tuple stored in the table
+        self.index = {}                     # Key -> index
+        self.rows = []
+
+    def ref(self, obj, key):
+        if obj is None:
+            return -1
+        i = self.index.get(key)
+        if i is None:
+            i = self.index[key] = len(self.rows)
+            self.rows.append(self.row(obj))
+        return i
+
+
+def ticket_type_row(t):
+    return (t.name, t.price, list(t.exhibitions))
+
+
+def workshop_row(w):
+    return (w.title, w.exhibition, w.capacity, getattr(w, "seats", None))
+
+
+def new_workshop(row):
+    title, exhibition, capacity, seats = row
+    w = Workshop(title, exhibition, capacity)
+    w.seats = seats                         # Kept as None for files saved before seat totals
+    return w
+
+
+class AttendeeCodec:
+    """
+    (username, password, email, pass, reservations) per attendee, where pass is
+    (ticket type, pass type, payment method, amount) as table indexes and
+    reservations is a tuple of workshop table indexes (only set on attendees
+    saved before the reservation ledger).
+    """
+
+    kind = "attendees"
+
+    def encode(self, attendees):
+        types = TypeTable(ticket_type_row)
+        workshops = TypeTable(workshop_row)
+        records = []
+        for a in attendees:
+            p = a.pass_ref
+            pass_record = None
+            if p is not None:
+                ticket = p.ticket
+                payment = ticket.payment
+                pass_record = (
+                    types.ref(ticket.ticket_type, ticket.ticket_type.name),
+                    types.ref(p.ticket_type, p.ticket_type.name),
+                    payment.method if payment is not None else None,
+                    payment.amount if payment is not None else None
+                )
+            reservations = tuple(workshops.ref(w, w.title) for w in a.reservations)
+            acc = a.account
+            records.append((acc.username, acc.password, acc.email, pass_record, reservations))
+        return types.rows, workshops.rows, records
+
+    def decode(self, columns):
+        type_rows, workshop_rows, records = columns
+        types = [load_ticket_type(*row) for row in type_rows]
+        workshops = [new_workshop(row) for row in workshop_rows]
+        attendees = []
+        for username, password, email, pass_record, reservations in records:
+            a = Attendee(Account(username, password, email))
+            if pass_record is not None:
+                ticket_type, pass_type, method, amount = pass_record
+                payment = Payment(method, amount) if method is not None else None
+                a.pass_ref = Pass(Ticket(types[ticket_type], payment))
+                a.pass_ref.ticket_type = types[pass_type]
+            a.reservations = [workshops[i] for i in reservations]
+            attendees.append(a)
+        return attendees
+
+
+class PaymentCodec:
+    """
+    Columnar: a table of payment methods, one method index and one amount per payment.
+    """
+
+    kind = "payments"
+
+    def encode(self, payments):
+        methods = {}
+        method_ids = array("I")
+        amounts = array("d")
+        for p in payments:
+            method_ids.append(methods.setdefault(p.method, len(methods)))
+            amounts.append(p.amount)
+        return list(methods), method_ids.tobytes(), amounts.tobytes()
+
+    def decode(self, columns):
+        method_names, method_bytes, amount_bytes = columns
+        method_ids = array("I")
+        method_ids.frombytes(method_bytes)
+        amounts = array("d")
+        amounts.frombytes(amount_bytes)
+        if len(method_ids) != len(amounts):
+            raise DataFormatError("Payment columns have different lengths")
+        return [
+            Payment(method_names[m], int(x) if x.is_integer() else x)
+            for m, x in zip(method_ids, amounts)
+        ]
+
+
+class WorkshopCodec:
+    """
+    (title, exhibition, capacity, seats) per workshop.
+    """
+
+    kind = "workshops"
+
+    def encode(self, workshops):
+        return [workshop_row(w) for w in workshops]
+
+    def decode(self, rows):
+        return [new_workshop(row) for row in rows]
+
+
+class SalesCodec:
+    """
+    (date, tickets sold, total sales, by ticket type, by payment method) per day.
+    """
+
+    kind = "sales"
+
+    def encode(self, reports):
+        return [
+            (r.date, r.tickets_sold, r.total_sales,
+             dict(getattr(r, "by_ticket_type", None) or {}),
+             dict(getattr(r, "by_payment_method", None) or {}))
+            for r in reports
+        ]
+
+    def decode(self, rows):
+        return [SalesReport(*row) for row in rows]
+
+
+class ReservationCodec:
+    """
+    Columnar: a table of workshop titles, then one username and one
+    title index per reservation.
+    """
+
+    kind = "reservations"
+
+    def encode(self, reservations):
+        titles = {}
+        usernames = []
+        title_ids = array("I")
+        for r in reservations:
+            usernames.append(r.username)
+            title_ids.append(titles.setdefault(r.title, len(titles)))
+        return list(titles), usernames, title_ids.tobytes()
+
+    def decode(self, columns):
+        titles, usernames, title_bytes = columns
+        title_ids = array("I")
+        title_ids.frombytes(title_bytes)
+        if len(title_ids) != len(usernames):
+            raise DataFormatError("Reservation columns have different lengths")
+        return [Reservation(u, titles[t]) for u, t in zip(usernames, title_ids)]
+
+
+class WaitlistCodec:
+    """
+    Columnar: a table of workshop titles, then one username, title index,
+    priority and join number per waitlist entry.
+    """
+
+    kind = "waitlist"
+
+    def encode(self, entries):
+        titles = {}
+        usernames = []
+        title_ids = array("I")
+        priorities = array("B")
+        numbers = array("Q")
+        for e in entries:
+            usernames.append(e.username)
+            title_ids.append(titles.setdefault(e.title, len(titles)))
+            priorities.append(e.priority)
+            numbers.append(e.number)
+        return list(titles), usernames, title_ids.tobytes(), priorities.tobytes(), numbers.tobytes()
+
+    def decode(self, columns):
+        titles, usernames, title_bytes, priority_bytes, number_bytes = columns
+        title_ids, priorities, numbers = array("I"), array("B"), array("Q")
+        title_ids.frombytes(title_bytes)
+        priorities.frombytes(priority_bytes)
+        numbers.frombytes(number_bytes)
+        if not len(usernames) == len(title_ids) == len(priorities) == len(numbers):
+            raise DataFormatError("Waitlist columns have different lengths")
+        return [
+            WaitlistEntry(u, titles[t], p, n)
+            for u, t, p, n in zip(usernames, title_ids, priorities, numbers)
+        ]
+
+
+class SaleEventCodec:
+    """
+    Columnar: tables of ticket type and payment method names, then per event
+    a timestamp, kind, ticket type index, previous type index, payment
+    method index and amount (-1 marks a missing name), followed by the
+    username and idempotency key lists (missing in older files).
+    """
+
+    kind = "sale_events"
+    kinds = ("purchase", "upgrade")
+
+    def encode(self, events):
+        names = {}
+        methods = {}
+        times, amounts = array("d"), array("d")
+        kinds = array("B")
+        types, previous, method_ids = array("i"), array("i"), array("i")
+        ref = lambda table, name: -1 if name is None else table.setdefault(name, len(table))
+        usernames, keys = [], []
+        for e in events:
+            usernames.append(e.username)
+            keys.append(e.key)
+            times.append(e.time.timestamp())
+            kinds.append(self.kinds.index(e.kind))
+            types.append(ref(names, e.ticket_type))
+            previous.append(ref(names, e.previous_type))
+            method_ids.append(ref(methods, e.payment_method))
+            amounts.append(e.amount)
+        return (list(names), list(methods), times.tobytes(), kinds.tobytes(), types.tobytes(),
+                previous.tobytes(), method_ids.tobytes(), amounts.tobytes(), usernames, keys)
+
+    def decode(self, columns):
+        names, methods = columns[0], columns[1]
+        arrays = [array(code) for code in ("d", "B", "i", "i", "i", "d")]
+        for a, data in zip(arrays, columns[2:8]):
+            a.frombytes(data)
+        count = len(arrays[0])
+        usernames, keys = columns[8:10] if len(columns) > 8 else ([None] * count, [None] * count)
+        if len({len(a) for a in arrays + [usernames, keys]}) > 1:
+            raise DataFormatError("Sale event columns have different lengths")
+        name = lambda table, i: table[i] if i >= 0 else None
+        return [
+            SaleEvent(datetime.fromtimestamp(t), self.kinds[k], name(names, ty), name(methods, m),
+                      int(x) if x.is_integer() else x, name(names, p), u, key)
+            for t, k, ty, p, m, x, u, key in zip(*arrays, usernames, keys)
+        ]
+
+
+class ObjectCodec:
+    """
+    Any other list is stored as pickled objects.
+    """
+
+    kind = "objects"
+
+    def encode(self, items):
+        return list(items)
+
+    def decode(self, items):
+        return items
+
+
+CODECS = {codec.kind: codec for codec in (
+    AttendeeCodec(), PaymentCodec(), WorkshopCodec(), SalesCodec(), ReservationCodec(),
+    WaitlistCodec(), SaleEventCodec(), ObjectCodec()
+)}
+
+# Codec used for each data set (named after its original pickle file)
+DATASET_CODECS = {
+    "attendees.pkl": CODECS["attendees"],
+    "payments.pkl": CODECS["payments"],
+    "workshops.pkl": CODECS["workshops"],
+    "sales.pkl": CODECS["sales"],
+    "reservations.pkl": CODECS["reservations"],
+    "waitlist.pkl": CODECS["waitlist"],
+    "sales_events.pkl": CODECS["sale_events"]
+}
+
+
+# -------------------------------
+# SNAPSHOTS
+# -------------------------------
+
+def encode_snapshot(items, codec=None):
+    """
+    Returns the bytes of a snapshot file holding items.
+    """
+    codec = codec or CODECS["objects"]
+    payload = pickle.dumps((codec.kind, codec.encode(items)), protocol=pickle.HIGHEST_PROTOCOL)
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(payload), zlib.crc32(payload))
+    return header + payload
+
+
+def decode_snapshot(data, path="snapshot"):
+    """
+    Returns the list stored in a snapshot file's bytes (either format).
+    Raises DataFormatError if the file is damaged.
+    """
+    if not data.startswith(SNAPSHOT_MAGIC):
+        try:
+            return pickle.loads(data)               # Plain pickle from an older version
+        except Exception as e:
+            raise DataFormatError(f"{path} is corrupt: {e}") from e
+
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise DataFormatError(f"{path} is corrupt: header is truncated")
+    magic, version, length, crc = SNAPSHOT_HEADER.unpack_from(data)
+    if version > SNAPSHOT_VERSION:
+        raise DataFormatError(f"{path} was written by a newer version (format {version})")
+    payload = data[SNAPSHOT_HEADER.size:]
+    if len(payload) != length:
+        raise DataFormatError(f"{path} is corrupt: expected {length} bytes, found {len(payload)}")
+    if zlib.crc32(payload) != crc:
+        raise DataFormatError(f"{path} is corrupt: checksum mismatch")
+
+    try:
+        kind, columns = pickle.loads(payload)
+        return CODECS[kind].decode(columns)
+    except DataFormatError:
+        raise
+    except Exception as e:
+        raise DataFormatError(f"{path} is corrupt: {e}") from e
+
+
+# -------------------------------
+# JOURNAL RECORDS
+# -------------------------------
+
+def encode_record(record):
+    """
+    Returns one journal frame holding the record.
+    """
+    payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+    return FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_journal(f, size, path="journal"):
+    """
+    Returns all records of an open journal file and the byte size they cover.
+    A torn last record is left out; a damaged record anywhere else raises
+    DataFormatError. Journals written before the framed format are read
+    record by record until the first unreadable one.
+    """
+    records = []
+    if f.read(len(JOURNAL_MAGIC)) != JOURNAL_MAGIC:
+        f.seek(0)
+        valid_size = 0
+        while True:
+            try:
+                records.append(pickle.load(f))
+            except Exception:
+                break                               # End of file or torn record
+            valid_size = f.tell()
+        return records, valid_size
+
+    valid_size = f.tell()
+    while True:
+        header = f.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            break                                   # End of file or torn header
+        length, crc = FRAME_HEADER.unpack(header)
+        payload = f.read(length)
+        last = f.tell() >= size
+        if len(payload) < length:
+            break                                   # Torn record at the end
+        if zlib.crc32(payload) != crc:
+            if last:
+                break                               # Partly written last record
+            raise DataFormatError(f"{path} is corrupt at byte {valid_size}: checksum mismatch")
+        try:
+            records.append(pickle.loads(payload))
+        except Exception as e:
+            raise DataFormatError(f"{path} is corrupt at byte {valid_size}: {e}") from e
+        valid_size = f.tell()
+    return records, valid_size
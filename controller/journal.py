@@ -0,0 +1,289 @@
+import os                                   # Used for renaming and removing journal files
+import threading                            # Keeps records from different threads apart
+from controller.writer import write_atomic  # Temp file + rename snapshot writes
+from controller.dataformat import (         # Versioned, checksummed file format
+    JOURNAL_MAGIC, decode_snapshot, encode_record, encode_snapshot, read_journal
+)
+
+
+class Journal:
+    """
+    Write-ahead journal for a single pickle data file.
+    Instead of rewriting the whole list on every change, each change is
+    appended to "<filename>.journal" as one small record. On startup the
+    journal is replayed on top of the snapshot, and once it grows as long
+    as the data itself it is compacted back into the snapshot file.
+
+    With a BackgroundWriter, compaction renames the journal to
+    "<filename>.journal.<generation>" and the snapshot is written on the
+    writer thread; rotated journals are removed once a snapshot covering
+    them is on disk.
+
+    Snapshots are written with the codec's versioned format and journal
+    records as checksummed frames (see controller.dataformat).
+    """
+
+    def __init__(self, filename, key=None, compact_every=1000, writer=None, codec=None):
+        self.filename = filename                    # Snapshot file (e.g. attendees.pkl)
+        self.journal_name = filename + ".journal"   # Append-only journal next to it
+        self.key = key                              # Returns an item's key (None = append-only list)
+        self.compact_every = compact_every          # Minimum records before compacting
+        self.writer = writer                        # BackgroundWriter (None = write snapshots inline)
+        self.codec = codec                          # Flattens the data set for snapshots (None = plain objects)
+        self.pending = 0                            # Records written since last compaction
+        self.generation = 0                         # Number of the last rotated journal
+        self.rotated = []                           # Generations of rotated journals still on disk
+        self._file = None                           # Open append handle for the journal
+        self.lock = threading.RLock()               # One writer at a time
+
+    # -------------------------------
+    # LOADING
+    # -------------------------------
+
+    def load(self):
+        """
+        Reads the snapshot and replays every journal record on top of it
+        (rotated journals first, oldest first, then the current one).
+        A torn record at the end (e.g. after a crash) is discarded.
+        """
+        data = self._read_snapshot()
+
+        # Map each key to its position so replay is one dict lookup per record
+        if self.key:
+            positions = {self.key(item): i for i, item in enumerate(data)}
+        else:
+            positions = {i: i for i in range(len(data))}
+
+        self.rotated = self._find_rotated()
+        self.generation = self.rotated[-1] if self.rotated else 0
+
+        records = []
+        for generation in self.rotated:
+            records += self._read_records(self.rotated_name(generation))[0]
+        current, valid_size = self._read_records(self.journal_name)
+        records += current
+
+        removed = False
+        for op, key, item in records:
+            if op == "put":
+                if key in positions:
+                    data[positions[key]] = item
+                else:
+                    positions[key] = len(data)
+                    data.append(item)
+            elif op == "delete":
+                i = positions.pop(key, None)
+                if i is not None:
+                    data[i] = None
+                    removed = True
+
+        if removed:
+            data = [item for item in data if item is not None]
+
+        # Cut off a partially written record so new appends stay readable
+        if os.path.exists(self.journal_name) and os.path.getsize(self.journal_name) != valid_size:
+            with open(self.journal_name, "r+b") as f:
+                f.truncate(valid_size)
+
+        self.pending = len(records)
+        return data
+
+    def rotated_name(self, generation):
+        return f"{self.journal_name}.{generation}"
+
+    def _find_rotated(self):
+        """
+        Returns the generations of rotated journals left on disk, oldest first.
+        """
+        folder = os.path.dirname(self.journal_name) or "."
+        prefix = os.path.basename(self.journal_name) + "."
+        found = []
+        for name in os.listdir(folder):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                found.append(int(name[len(prefix):]))
+        return sorted(found)
+
+    def files(self):
+        """
+        Returns the paths of the snapshot and journal files that exist on disk.
+        """
+        paths = [self.filename, self.journal_name]
+        paths += [self.rotated_name(g) for g in self._find_rotated()]
+        return [p for p in paths if os.path.exists(p)]
+
+    def locks(self):
+        """
+        Returns the locks that hold back every write to the journal's files.
+        """
+        return [self.lock]
+
+    def _read_snapshot(self):
+        """
+        Loads the snapshot list. A missing file gives an empty list;
+        a damaged one raises DataFormatError.
+        """
+        try:
+            with open(self.filename, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        return decode_snapshot(data, self.filename)
+
+    def _read_records(self, path):
+        """
+        Returns all complete records of a journal file and the byte size they cover.
+        """
+        try:
+            with open(path, "rb") as f:
+                return read_journal(f, os.path.getsize(path), path)
+        except FileNotFoundError:
+            return [], 0
+
+    # -------------------------------
+    # WRITING
+    # -------------------------------
+
+    def put(self, data, item):
+        """
+        Records that item was added or changed in data.
+        For append-only lists the item must already be appended to data.
+        """
+        key = self.key(item) if self.key else len(data) - 1
+        return self._append(("put", key, item), data)
+
+    def put_many(self, data, items):
+        """
+        Records several added or changed items with a single write.
+        For append-only lists the items must already be appended to data.
+        """
+        return self._append_many(self.records(data, items), data)
+
+    def records(self, data, items, first=None):
+        """
+        Returns the journal records that put_many would write for items.
+        For append-only lists `first` is the position of the first item
+        (by default the items are the last ones of data).
+        """
+        if self.key:
+            return [("put", self.key(item), item) for item in items]
+        if first is None:
+            first = len(data) - len(items)
+        return [("put", first + i, item) for i, item in enumerate(items)]
+
+    def write_records(self, records, data=None):
+        """
+        Appends records built by records(). Without data (recovery at
+        startup, before the data set is loaded) the journal is never compacted.
+        """
+        return self._append_many(records, data)
+
+    def delete(self, data, key):
+        """
+        Records that the item with the given key was removed from data.
+        """
+        return self._append(("delete", key, None), data)
+
+    def delete_many(self, data, keys):
+        """
+        Records the removal of several items with a single write.
+        """
+        return self._append_many([("delete", key, None) for key in keys], data)
+
+    def _append(self, record, data):
+        """
+        Appends one record and compacts once the journal is as long as the data,
+        which keeps the cost of each write constant on average.
+        """
+        return self._append_many([record], data)
+
+    def _append_many(self, records, data):
+        """
+        Appends records with one flush, then compacts if the journal is long enough.
+        Returns the number of bytes written.
+        """
+        with self.lock:
+            if self._file is None:
+                self._open()
+            start = self._file.tell()
+            self._file.write(b"".join(encode_record(record) for record in records))
+            self._file.flush()
+            nbytes = self._file.tell() - start
+
+            self.pending += len(records)
+            if data is not None and self.pending >= max(self.compact_every, len(data)):
+                nbytes += self.compact(data)
+            return nbytes
+
+    def _open(self):
+        """
+        Opens the journal for appending; a new file starts with the format header.
+        A journal written by an older version is rotated first, so old and
+        new records are never mixed in one file.
+        """
+        if os.path.exists(self.journal_name) and os.path.getsize(self.journal_name) > 0:
+            with open(self.journal_name, "rb") as f:
+                old_format = f.read(len(JOURNAL_MAGIC)) != JOURNAL_MAGIC
+            if old_format:
+                self.generation = max([self.generation] + self._find_rotated()) + 1
+                os.replace(self.journal_name, self.rotated_name(self.generation))
+                self.rotated.append(self.generation)
+        self._file = open(self.journal_name, "ab")
+        if self._file.tell() == 0:
+            self._file.write(JOURNAL_MAGIC)
+
+    def compact(self, data):
+        """
+        Writes the full list as a new snapshot and empties the journal.
+        The snapshot is written to a temp file first so a crash never leaves
+        a half-written data file behind.
+        Returns the bytes written here (0 when the writer thread saves the snapshot).
+        """
+        with self.lock:
+            self.close()
+            self.pending = 0
+
+            if self.writer is None:
+                nbytes = write_atomic(self.filename, data, self.encode)
+                # Replaying old records over the new snapshot is harmless, so the
+                # journals can safely be removed after the snapshot is in place
+                # (removed rather than emptied, so backup links keep their records)
+                if os.path.exists(self.journal_name):
+                    os.remove(self.journal_name)
+                self._remove_rotated(self.generation)
+                return nbytes
+
+            # Start a fresh journal and let the writer thread save the snapshot
+            self.generation += 1
+            if os.path.exists(self.journal_name):
+                os.replace(self.journal_name, self.rotated_name(self.generation))
+                self.rotated.append(self.generation)
+            generation = self.generation
+            self.writer.submit(self.filename, list(data), lambda: self._remove_rotated(generation), self.encode)
+            return 0
+
+    def encode(self, data):
+        """
+        Returns the snapshot file bytes for data.
+        """
+        return encode_snapshot(data, self.codec)
+
+    def _remove_rotated(self, generation):
+        """
+        Deletes rotated journals up to the given generation (their changes
+        are all part of a snapshot that is now on disk).
+        """
+        with self.lock:
+            while self.rotated and self.rotated[0] <= generation:
+                try:
+                    os.remove(self.rotated_name(self.rotated.pop(0)))
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        """
+        Closes the journal file handle.
+        """
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
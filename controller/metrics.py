@@ -0,0 +1,202 @@
+import cProfile                             # Optional profiling of the controller
+import functools                            # Keeps wrapped method names
+import io                                   # Profile reports are built as text
+import os                                   # Atomic rename of exported files
+import pstats                               # Formats profile reports
+import threading                            # Metrics are updated from several threads
+import time                                 # High resolution timer
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Histogram:
+    """
+    Counts durations into fixed buckets and keeps their total,
+    so percentiles can be estimated without storing every sample.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # The last bucket holds everything slower
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """
+        Returns the upper bound of the bucket holding the p-th percentile.
+        """
+        if not self.count:
+            return 0.0
+        target = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+
+class Metrics:
+    """
+    Opt-in instrumentation for the controller: a timing histogram for every
+    controller method, bytes and durations of every data file load and write,
+    and an optional cProfile capture. Pass an instance to GreenWaveController
+    to turn it on; without one the controller runs uninstrumented.
+    """
+
+    def __init__(self, export_path="metrics.prom", profile_path="greenwave.prof"):
+        self.export_path = export_path          # Default file for Prometheus text snapshots
+        self.profile_path = profile_path        # Default file for raw cProfile data
+        self.timings = {}                       # Method name -> Histogram
+        self.io = {}                            # (operation, file) -> [count, bytes, seconds]
+        self.profiler = None                    # Running cProfile.Profile, if any
+        self.lock = threading.Lock()
+
+    # -------------------------------
+    # RECORDING
+    # -------------------------------
+
+    def observe(self, name, seconds):
+        """
+        Adds one call of the named operation to its histogram.
+        """
+        with self.lock:
+            histogram = self.timings.get(name)
+            if histogram is None:
+                histogram = self.timings[name] = Histogram()
+            histogram.observe(seconds)
+
+    def record_io(self, operation, filename, nbytes, seconds):
+        """
+        Adds one load or write of a data file.
+        """
+        with self.lock:
+            entry = self.io.setdefault((operation, filename), [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += nbytes
+            entry[2] += seconds
+
+    def instrument(self, obj):
+        """
+        Replaces every public method of obj (on this instance only)
+        with a wrapper that times each call.
+        """
+        for name in dir(type(obj)):
+            if name.startswith("_") or not callable(getattr(type(obj), name)):
+                continue
+            setattr(obj, name, self.timed(name, getattr(obj, name)))
+
+    def timed(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(name, time.perf_counter() - start)
+        return wrapper
+
+    # -------------------------------
+    # PROFILING
+    # -------------------------------
+
+    def start_profile(self):
+        """
+        Starts a cProfile capture of the calling thread (the GUI thread).
+        """
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop_profile(self, limit=25):
+        """
+        Stops the capture and returns the slowest functions as text.
+        The raw profile is also saved to profile_path (for pstats, snakeviz, ...).
+        """
+        if self.profiler is None:
+            return ""
+        self.profiler.disable()
+        profiler, self.profiler = self.profiler, None
+        if self.profile_path:
+            profiler.dump_stats(self.profile_path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    # -------------------------------
+    # REPORTING
+    # -------------------------------
+
+    def summary(self):
+        """
+        Returns (operations, files) rows for the admin dashboard:
+        operations: (name, calls, mean ms, p50 ms, p99 ms, max ms), slowest total first
+        files: (operation, file, count, bytes, total ms)
+        """
+        with self.lock:
+            operations = [
+                (name, h.count, 1000 * h.total / h.count, 1000 * h.percentile(50),
+                 1000 * h.percentile(99), 1000 * h.max)
+                for name, h in sorted(self.timings.items(), key=lambda e: -e[1].total)
+            ]
+            files = [
+                (operation, filename, count, nbytes, 1000 * seconds)
+                for (operation, filename), (count, nbytes, seconds) in sorted(self.io.items())
+            ]
+        return operations, files
+
+    def prometheus(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP greenwave_operation_seconds Duration of controller operations.",
+            "# TYPE greenwave_operation_seconds histogram"
+        ]
+        with self.lock:
+            for name, h in sorted(self.timings.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.counts):
+                    cumulative += n
+                    lines.append(f'greenwave_operation_seconds_bucket{{operation="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'greenwave_operation_seconds_bucket{{operation="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'greenwave_operation_seconds_sum{{operation="{name}"}} {h.total:.9f}')
+                lines.append(f'greenwave_operation_seconds_count{{operation="{name}"}} {h.count}')
+
+            for metric, index, kind, text in (
+                ("greenwave_file_operations_total", 0, "counter", "Loads and writes of data files."),
+                ("greenwave_file_bytes_total", 1, "counter", "Bytes loaded or written per data file."),
+                ("greenwave_file_seconds_total", 2, "counter", "Time spent loading or writing data files.")
+            ):
+                lines.append(f"# HELP {metric} {text}")
+                lines.append(f"# TYPE {metric} {kind}")
+                for (operation, filename), entry in sorted(self.io.items()):
+                    value = f"{entry[index]:.9f}" if index == 2 else entry[index]
+                    lines.append(f'{metric}{{operation="{operation}",file="{filename}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=None):
+        """
+        Writes a Prometheus text snapshot to path or export_path (temp file
+        + rename, so a collector never reads a half-written file).
+        Returns the path written.
+        """
+        path = path or self.export_path
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+        return path
@@ -0,0 +1,44 @@
+"""
+Imports the existing .pkl data files (and their journals) into an SQLite database.
+
+Run from the project folder:
+    python -m controller.migrate greenwave.db
+"""
+
+import argparse                             # Command line options
+from controller.storage import KEYS, PickleStorage, SQLiteStorage
+
+
+def migrate(db_path, folder="."):
+    """
+    Copies every pickle data set in `folder` into the SQLite database
+    and returns the number of rows imported per data set.
+    """
+    source = PickleStorage(folder)
+    target = SQLiteStorage(db_path)
+    counts = {}
+    try:
+        for name in KEYS:
+            if not source.exists(name):
+                continue                        # Never saved (e.g. reservations before the ledger)
+            data = source.load(name)
+            target.save(name, data)             # One transaction per data set
+            counts[name] = len(data)
+    finally:
+        source.close()
+        target.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import GreenWave pickle files into SQLite")
+    parser.add_argument("database", help="SQLite database file to create or update")
+    parser.add_argument("--folder", default=".", help="folder containing the .pkl files")
+    args = parser.parse_args()
+
+    for name, count in migrate(args.database, args.folder).items():
+        print(f"{name}: {count} rows imported")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import base64                               # Salts and hashes are stored as text
+import hashlib                              # scrypt and PBKDF2 key derivation
+import hmac                                 # Constant-time comparison
+import os                                   # Random salts and CPU count
+import threading                            # Protects the verification cache
+from collections import OrderedDict        # LRU order of the verification cache
+from concurrent.futures import ThreadPoolExecutor  # Hashing runs on a bounded pool of threads
+
+# Default cost for each algorithm, as a power of two
+# (scrypt: n = 2**cost, PBKDF2: iterations = 2**cost)
+DEFAULT_COST = {"scrypt": 14, "pbkdf2_sha256": 19}
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+class PasswordHasher:
+    """
+    Salted password hashing with a configurable work factor.
+    Hashes are stored as "algorithm$cost$salt$hash". Anything else in
+    Account.password is treated as a legacy plaintext password.
+
+    hashlib releases the GIL while hashing, so hashing runs on a pool of
+    one thread per CPU: logins from many request threads proceed in
+    parallel, while the pool caps how many expensive hashes run at once.
+
+    Successful verifications are remembered in a small in-memory LRU cache
+    (a keyed HMAC of the password, never the password itself), so repeated
+    logins of the same user skip the expensive hash.
+    """
+
+    def __init__(self, algorithm="scrypt", cost=None, workers=None, cache_size=10000):
+        if algorithm not in DEFAULT_COST:
+            raise ValueError(f"Unknown password algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.cost = cost if cost is not None else DEFAULT_COST[algorithm]
+        self.pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+
+        self.cache_size = cache_size
+        self.cache = OrderedDict()              # Stored hash -> HMAC of the verified password
+        self.cache_key = os.urandom(32)         # Per-process secret for the cache HMACs
+        self.cache_lock = threading.Lock()
+
+    # -------------------------------
+    # HASHING
+    # -------------------------------
+
+    def derive(self, password, algorithm, cost, salt):
+        """
+        Runs the key derivation function and returns the raw hash.
+        """
+        if algorithm == "scrypt":
+            n = 2 ** cost
+            return hashlib.scrypt(password.encode(), salt=salt, n=n, r=8, p=1,
+                                  maxmem=256 * n * 8 + 1024 * 1024, dklen=32)
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, 2 ** cost)
+
+    def _hash(self, password):
+        salt = os.urandom(16)
+        digest = self.derive(password, self.algorithm, self.cost, salt)
+        return f"{self.algorithm}${self.cost}${_b64(salt)}${_b64(digest)}"
+
+    def hash(self, password):
+        """
+        Returns the stored form of a new password.
+        """
+        return self.pool.submit(self._hash, password).result()
+
+    def hash_many(self, passwords):
+        """
+        Hashes many passwords in parallel (used by bulk imports).
+        """
+        return list(self.pool.map(self._hash, passwords))
+
+    # -------------------------------
+    # VERIFYING
+    # -------------------------------
+
+    @staticmethod
+    def parse(stored):
+        """
+        Splits a stored hash into (algorithm, cost, salt, hash),
+        or returns None for a legacy plaintext password.
+        """
+        parts = stored.split("$") if isinstance(stored, str) else []
+        if len(parts) != 4 or parts[0] not in DEFAULT_COST or not parts[1].isdigit():
+            return None
+        try:
+            return parts[0], int(parts[1]), base64.b64decode(parts[2]), base64.b64decode(parts[3])
+        except ValueError:
+            return None
+
+    def _verify(self, password, stored):
+        parsed = self.parse(stored)
+        if parsed is None:
+            return hmac.compare_digest(str(password).encode(), str(stored).encode())
+        algorithm, cost, salt, digest = parsed
+        return hmac.compare_digest(self.derive(password, algorithm, cost, salt), digest)
+
+    def verify(self, password, stored):
+        """
+        Checks a password against its stored form (hash or legacy plaintext).
+        """
+        tag = hmac.new(self.cache_key, str(password).encode(), "sha256").digest()
+        with self.cache_lock:
+            cached = self.cache.get(stored)
+            if cached is not None:
+                self.cache.move_to_end(stored)
+        if cached is not None and hmac.compare_digest(cached, tag):
+            return True
+
+        ok = self.submit_verify(password, stored).result()
+        if ok and self.cache_size and self.parse(stored) is not None:
+            with self.cache_lock:
+                self.cache[stored] = tag
+                self.cache.move_to_end(stored)
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return ok
+
+    def submit_verify(self, password, stored):
+        """
+        Starts verifying on the pool and returns a Future with the result.
+        """
+        return self.pool.submit(self._verify, password, stored)
+
+    def needs_rehash(self, stored):
+        """
+        True for plaintext passwords and hashes made with other settings.
+        """
+        parsed = self.parse(stored)
+        return parsed is None or parsed[0] != self.algorithm or parsed[1] != self.cost
+
+    def close(self):
+        self.pool.shutdown(wait=True)
@@ -0,0 +1,245 @@
+import threading                            # Per-workshop locks for concurrent reservations
+from model.models import Reservation
+
+
+class ReservationLedger:
+    """
+    Every reservation, keyed by (username, workshop title), with an index in
+    each direction: "my reservations" and "who is in this workshop" both
+    cost O(result). Attendees and workshops are referenced by key only, so
+    no workshop data is copied into attendee records.
+    """
+
+    def __init__(self, reservations=()):
+        self.items = {}                         # (username, title) -> Reservation
+        self.by_attendee = {}                   # Username -> {title: Reservation}, in reservation order
+        self.by_workshop = {}                   # Title -> {username: Reservation}
+        self.lock = threading.RLock()
+        for r in reservations:
+            self._add(r)
+
+    def _add(self, r):
+        self.items[(r.username, r.title)] = r
+        self.by_attendee.setdefault(r.username, {})[r.title] = r
+        self.by_workshop.setdefault(r.title, {})[r.username] = r
+
+    def add(self, username, title):
+        """
+        Records a new reservation and returns it.
+        """
+        with self.lock:
+            r = Reservation(username, title)
+            self._add(r)
+            return r
+
+    def remove(self, username, title):
+        """
+        Removes a reservation and returns its key.
+        """
+        with self.lock:
+            del self.items[(username, title)]
+            titles = self.by_attendee[username]
+            del titles[title]
+            if not titles:
+                del self.by_attendee[username]
+            usernames = self.by_workshop[title]
+            del usernames[username]
+            if not usernames:
+                del self.by_workshop[title]
+            return (username, title)
+
+    def restore(self, reservations):
+        """
+        Puts removed Reservation objects back (used when saving their removal failed).
+        """
+        with self.lock:
+            for r in reservations:
+                self._add(r)
+
+    def get(self, username, title):
+        """
+        Returns the attendee's Reservation for the workshop, or None.
+        """
+        return self.items.get((username, title))
+
+    def has(self, username, title):
+        return (username, title) in self.items
+
+    def titles_for(self, username):
+        """
+        Returns the titles of the attendee's reserved workshops.
+        """
+        with self.lock:
+            return list(self.by_attendee.get(username, ()))
+
+    def roster(self, title):
+        """
+        Returns the usernames of everyone holding a seat in the workshop.
+        """
+        with self.lock:
+            return list(self.by_workshop.get(title, ()))
+
+    def counts(self):
+        """
+        Returns title -> number of reservations.
+        """
+        with self.lock:
+            return {title: len(usernames) for title, usernames in self.by_workshop.items()}
+
+    def data(self):
+        """
+        Live view of all reservations, passed to the storage layer
+        (only read while holding the lock).
+        """
+        return self.items.values()
+
+
+class ReservationEngine:
+    """
+    Reserves and releases workshop seats safely from several threads.
+    Each workshop has its own lock, and a batch of workshops is reserved
+    all-or-nothing: either every seat is taken or none is.
+    Seats are recorded in the reservation ledger; seats released later
+    can be handed to waiting attendees with fill().
+    """
+
+    def __init__(self, ledger):
+        self.ledger = ledger                    # ReservationLedger holding every seat taken
+        self.locks = {}                         # Workshop title -> Lock
+        self.locks_guard = threading.Lock()     # Protects creation of new locks
+
+    def lock_for(self, workshop):
+        """
+        Returns the lock of a workshop, creating it on first use.
+        """
+        lock = self.locks.get(workshop.title)
+        if lock is None:
+            with self.locks_guard:
+                lock = self.locks.setdefault(workshop.title, threading.Lock())
+        return lock
+
+    def acquire(self, workshops):
+        """
+        Locks all given workshops in title order so two batches can never deadlock.
+        Returns the locks in the order they were taken.
+        """
+        locks = [self.lock_for(w) for w in sorted(workshops, key=lambda w: w.title)]
+        for lock in locks:
+            lock.acquire()
+        return locks
+
+    def release(self, locks):
+        """
+        Releases locks taken by acquire.
+        """
+        for lock in reversed(locks):
+            lock.release()
+
+    def reserve(self, username, workshops, save=None, waiting=None):
+        """
+        Takes one seat in every workshop for the attendee and returns the
+        new Reservation objects. Raises ValueError without changing anything
+        if any workshop is full or already reserved by the attendee.
+        A workshop for which waiting(title) is not zero counts as full:
+        its free seats are kept for the attendees queued for it.
+        `save` is called with the new reservations while the workshops are
+        still locked, so saved changes of one seat are always in order;
+        if it fails, the seats are taken back before the error is raised.
+        """
+        workshops = list({w.title: w for w in workshops}.values())  # Ignore duplicates
+        locks = self.acquire(workshops)
+        try:
+            for w in workshops:
+                if self.ledger.has(username, w.title):
+                    raise ValueError("Workshop already reserved")
+                if w.capacity <= 0 or (waiting is not None and waiting(w.title)):
+                    raise ValueError("Workshop full")
+
+            added = []
+            try:
+                for w in workshops:
+                    w.capacity -= 1                         # Reduce available seats
+                    added.append(self.ledger.add(username, w.title))
+                if save is not None:
+                    save(added)
+            except Exception:
+                for w, r in zip(workshops, added):          # Nothing was saved: take the seats back
+                    self.ledger.remove(r.username, r.title)
+                    w.capacity += 1
+                raise
+            return added
+        finally:
+            self.release(locks)
+
+    def cancel(self, username, workshops, save=None):
+        """
+        Cancels the attendee's reservation for every workshop, frees the seats
+        and returns the removed (username, title) keys (also passed to `save`).
+        Raises ValueError without changing anything if one was not reserved;
+        if `save` fails, the reservations are put back before the error is raised.
+        """
+        workshops = list({w.title: w for w in workshops}.values())
+        locks = self.acquire(workshops)
+        try:
+            for w in workshops:
+                if not self.ledger.has(username, w.title):
+                    raise ValueError("Workshop not reserved")
+
+            held = [self.ledger.get(username, w.title) for w in workshops]
+            removed = []
+            try:
+                for w in workshops:
+                    removed.append(self.ledger.remove(username, w.title))
+                    w.capacity += 1                         # Release the seat
+                if save is not None:
+                    save(removed)
+            except Exception:
+                self.ledger.restore(held[:len(removed)])    # Seats are still held on disk
+                for w in workshops[:len(removed)]:
+                    w.capacity -= 1
+                raise
+            return removed
+        finally:
+            self.release(locks)
+
+    def fill(self, workshop, usernames, save=None):
+        """
+        Gives free seats of the workshop to attendees taken one at a time
+        from the `usernames` iterator, until the workshop is full or the
+        iterator runs out (so no more names are taken than there are seats).
+        Attendees who already hold a seat are skipped. Returns the new
+        Reservation objects, which are passed to `save` while still locked.
+        If taking a name or saving fails, the seats given so far are taken
+        back before the error is raised.
+        """
+        with self.lock_for(workshop):
+            added = []
+            try:
+                while workshop.capacity > 0:
+                    username = next(usernames, None)
+                    if username is None:
+                        break
+                    if self.ledger.has(username, workshop.title):
+                        continue
+                    workshop.capacity -= 1
+                    added.append(self.ledger.add(username, workshop.title))
+                if added and save is not None:
+                    save(added)
+            except Exception:
+                for r in added:
+                    self.ledger.remove(r.username, r.title)
+                    workshop.capacity += 1
+                raise
+            return added
+
+    def resize(self, workshop, seats):
+        """
+        Changes the total seats of the workshop, keeping every seat already
+        reserved. Raises ValueError if fewer seats than reservations are asked for.
+        """
+        with self.lock_for(workshop):
+            taken = workshop.seats - workshop.capacity
+            if seats < taken:
+                raise ValueError("Capacity below reserved seats")
+            workshop.seats = seats
+            workshop.capacity = seats - taken
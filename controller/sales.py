@@ -0,0 +1,175 @@
+import threading                            # Sales can be recorded from several threads
+import time                                 # Used to debounce saving
+from datetime import date, timedelta       # Day-based keys and ranges
+from model.models import SalesReport
+
+
+class SalesLedger:
+    """
+    Date-keyed store of the daily SalesReport objects.
+    Recording a sale is a single dict lookup, and changed reports are saved
+    in batches (every `batch_size` sales or `interval` seconds) instead of
+    after every sale. Range queries add up one report per day in the range,
+    so the admin views never rescan individual payments.
+    """
+
+    def __init__(self, reports, save, batch_size=50, interval=2.0, clock=time.monotonic):
+        self.reports = reports                      # List of SalesReport (kept for storage and GUI)
+        self.by_date = {}                           # Date -> SalesReport
+        for r in reports:
+            self.normalize(r)
+            self.by_date[r.date] = r
+        self.save = save                            # Callback that persists one report
+        self.batch_size = batch_size
+        self.interval = interval
+        self.clock = clock
+        self.dirty = {}                             # Reports changed since the last flush
+        self.pending = 0                            # Sales recorded since the last flush
+        self.last_flush = clock()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def normalize(report):
+        """
+        Adds the breakdown fields to reports saved by older versions.
+        """
+        if getattr(report, "by_ticket_type", None) is None:
+            report.by_ticket_type = {}
+        if getattr(report, "by_payment_method", None) is None:
+            report.by_payment_method = {}
+
+    # -------------------------------
+    # RECORDING
+    # -------------------------------
+
+    def record(self, amount, ticket_type=None, payment_method=None, day=None, tickets=1, save=True):
+        """
+        Adds one sale to the report of the given day (today by default)
+        and returns the report. Upgrades pass tickets=0: they add revenue
+        but no ticket sold. With save=False the caller saves the report.
+        """
+        day = day or date.today()
+        with self.lock:
+            r = self.by_date.get(day)
+            if r is None:
+                r = SalesReport(day, 0, 0)
+                self.reports.append(r)
+                self.by_date[day] = r
+
+            self.add_sale(r, amount, ticket_type, payment_method, tickets)
+            if save:
+                self.dirty[day] = r
+                self.pending += 1
+                if self.pending >= self.batch_size or self.clock() - self.last_flush >= self.interval:
+                    self._flush()
+            return r
+
+    @classmethod
+    def add_sale(cls, r, amount, ticket_type=None, payment_method=None, tickets=1):
+        """
+        Adds one sale to a report (the ledger's own reports only under the lock).
+        """
+        r.tickets_sold += tickets
+        r.total_sales += amount
+        if ticket_type is not None:
+            cls._add(r.by_ticket_type, ticket_type, amount, tickets)
+        if payment_method is not None:
+            cls._add(r.by_payment_method, payment_method, amount, tickets)
+
+    @staticmethod
+    def _add(breakdown, name, amount, tickets):
+        count, total = breakdown.get(name, (0, 0))
+        breakdown[name] = (count + tickets, total + amount)
+
+    def copy(self, day, report=None):
+        """
+        Returns a copy of `report` (by default the day's report, or a new
+        empty one) that sales can be added to without changing the ledger.
+        """
+        with self.lock:
+            r = report or self.by_date.get(day)
+            if r is None:
+                return SalesReport(day, 0, 0)
+            return SalesReport(day, r.tickets_sold, r.total_sales, dict(r.by_ticket_type), dict(r.by_payment_method))
+
+    def resave_if_changed(self, saved):
+        """
+        Queues the day's report for the next batch if it no longer matches
+        the copy `saved` (a sale was recorded elsewhere in the meantime).
+        """
+        with self.lock:
+            r = self.by_date.get(saved.date)
+            if r is not None and (r.tickets_sold, r.total_sales, r.by_ticket_type, r.by_payment_method) != \
+                    (saved.tickets_sold, saved.total_sales, saved.by_ticket_type, saved.by_payment_method):
+                self.dirty[r.date] = r
+
+    def flush(self):
+        """
+        Saves every report changed since the last flush.
+        """
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        for r in self.dirty.values():
+            self.save(r)
+        self.dirty.clear()
+        self.pending = 0
+        self.last_flush = self.clock()
+
+    # -------------------------------
+    # QUERIES
+    # -------------------------------
+
+    def get(self, day):
+        """
+        Returns the report of one day, or None.
+        """
+        return self.by_date.get(day)
+
+    def in_range(self, start, end):
+        """
+        Returns the reports from start to end (inclusive), oldest first.
+        Walks whichever is shorter: the days in the range or the stored reports.
+        """
+        days = (end - start).days + 1
+        if days <= 0:
+            return []
+        if days <= len(self.by_date):
+            found = (self.by_date.get(start + timedelta(n)) for n in range(days))
+            return [r for r in found if r is not None]
+        return sorted((r for d, r in self.by_date.items() if start <= d <= end), key=lambda r: r.date)
+
+    def summary(self, start, end):
+        """
+        Returns totals and per ticket type / payment method breakdowns
+        for the days from start to end (inclusive).
+        """
+        result = {"tickets_sold": 0, "total_sales": 0, "by_ticket_type": {}, "by_payment_method": {}}
+        with self.lock:
+            for r in self.in_range(start, end):
+                result["tickets_sold"] += r.tickets_sold
+                result["total_sales"] += r.total_sales
+                for field in ("by_ticket_type", "by_payment_method"):
+                    merged = result[field]
+                    for name, (count, total) in getattr(r, field).items():
+                        old_count, old_total = merged.get(name, (0, 0))
+                        merged[name] = (old_count + count, old_total + total)
+        return result
+
+    def week_summary(self, day=None):
+        """
+        Summary of the Monday-to-Sunday week containing the day (today by default).
+        """
+        day = day or date.today()
+        start = day - timedelta(day.weekday())
+        return self.summary(start, start + timedelta(6))
+
+    def month_summary(self, day=None):
+        """
+        Summary of the calendar month containing the day (today by default).
+        """
+        day = day or date.today()
+        start = day.replace(day=1)
+        next_month = (start + timedelta(32)).replace(day=1)
+        return self.summary(start, next_month - timedelta(1))
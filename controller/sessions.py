@@ -0,0 +1,111 @@
+import secrets                              # Unguessable session tokens
+import threading                            # Sessions are shared between worker threads
+import time                                 # Idle expiry is based on a monotonic clock
+from collections import OrderedDict        # Keeps sessions in least-recently-used order
+
+
+class SessionError(ValueError):
+    """
+    Raised when a session token is missing, unknown or expired.
+    """
+
+
+class Session:
+    """
+    Session represents one logged-in user (attendee or administrator).
+    """
+
+    def __init__(self, token, attendee, is_admin, now):
+        self.token = token              # Token the client sends with every request
+        self.attendee = attendee        # Logged-in Attendee (None for the admin)
+        self.is_admin = is_admin        # True for administrator sessions
+        self.created = now              # When the session was opened
+        self.last_seen = now            # Last time the session was used
+
+
+class SessionManager:
+    """
+    Keeps track of all active sessions so one controller can serve many users.
+    Sessions expire after `idle_timeout` seconds without use, and at most
+    `max_sessions` are kept; beyond that the least recently used is dropped.
+    """
+
+    def __init__(self, idle_timeout=30 * 60, max_sessions=10000, clock=time.monotonic):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.sessions = OrderedDict()           # Token -> Session, oldest use first
+        self.by_username = {}                   # Username -> set of tokens
+        self.lock = threading.Lock()
+
+    def open(self, attendee=None, is_admin=False):
+        """
+        Starts a new session and returns it.
+        """
+        now = self.clock()
+        session = Session(secrets.token_urlsafe(24), attendee, is_admin, now)
+        with self.lock:
+            self._expire(now)
+            while len(self.sessions) >= self.max_sessions:
+                self._remove(next(iter(self.sessions)))     # Drop least recently used
+            self.sessions[session.token] = session
+            if attendee is not None:
+                self.by_username.setdefault(attendee.account.username, set()).add(session.token)
+        return session
+
+    def get(self, token):
+        """
+        Returns the live session for a token and marks it as used.
+        Raises SessionError if it does not exist or has expired.
+        """
+        now = self.clock()
+        with self.lock:
+            session = self.sessions.get(token)
+            if session is None:
+                raise SessionError("Not logged in")
+            if now - session.last_seen > self.idle_timeout:
+                self._remove(token)
+                raise SessionError("Session expired")
+            session.last_seen = now
+            self.sessions.move_to_end(token)
+            return session
+
+    def close(self, token):
+        """
+        Ends a session. Unknown tokens are ignored.
+        """
+        with self.lock:
+            if token in self.sessions:
+                self._remove(token)
+
+    def close_user(self, username):
+        """
+        Ends every session of the given attendee.
+        """
+        with self.lock:
+            for token in list(self.by_username.get(username, ())):
+                self._remove(token)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def _expire(self, now):
+        """
+        Removes idle sessions. They sit at the front of the LRU order,
+        so this stops at the first session that is still active.
+        """
+        while self.sessions:
+            token, session = next(iter(self.sessions.items()))
+            if now - session.last_seen <= self.idle_timeout:
+                break
+            self._remove(token)
+
+    def _remove(self, token):
+        session = self.sessions.pop(token)
+        if session.attendee is not None:
+            username = session.attendee.account.username
+            tokens = self.by_username.get(username)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self.by_username[username]
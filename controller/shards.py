@@ -0,0 +1,201 @@
+import os                                   # Shard file names and removing the old single file
+import threading                            # Shards are loaded from several request threads
+import zlib                                 # Stable hash of the key (hash() changes per process)
+from controller.journal import Journal     # Every shard is a journaled pickle file
+
+
+class ShardedJournal:
+    """
+    Splits one keyed data set (attendees) over several journaled pickle
+    files, "<name>.<n>.pkl", chosen by a stable hash of the key. A shard is
+    only read the first time one of its keys is needed, so a login loads
+    one shard instead of every attendee.
+
+    The number of shards is stored in "<name>.pkl.shards". A data set saved
+    as a single file by older versions is split into shards on first use.
+    Offers the same write methods as Journal, plus get() by key.
+    """
+
+    def __init__(self, filename, key, shards=32, writer=None, codec=None):
+        self.filename = filename                    # Original single file (e.g. attendees.pkl)
+        self.marker = filename + ".shards"          # Holds the shard count once split
+        self.key = key                              # Returns an item's key
+        self.writer = writer
+        self.codec = codec                          # Snapshot layout passed on to every shard
+        self.lock = threading.RLock()
+
+        if os.path.exists(self.marker):
+            with open(self.marker) as f:
+                shards = int(f.read())              # Keys must keep going to the same shard
+        self.count = shards
+        self.journals = [
+            Journal(self.shard_name(i), key=key, writer=writer, codec=codec) for i in range(shards)
+        ]
+        self.data = [None] * shards                 # Items of each loaded shard
+        self.positions = [None] * shards            # Key -> index in data, per loaded shard
+        self.migrated = False
+
+    def shard_name(self, i):
+        base, ext = os.path.splitext(self.filename)
+        return f"{base}.{i}{ext}"
+
+    def shard_of(self, key):
+        return zlib.crc32(str(key).encode()) % self.count
+
+    # -------------------------------
+    # LOADING
+    # -------------------------------
+
+    def _migrate(self):
+        """
+        Splits the old single file into shards the first time the data set
+        is used. The shard files are complete before the marker is written,
+        and the old files are only removed after that, so a crash at any
+        point leaves either the old file or the shards readable.
+        """
+        if self.migrated:
+            return
+        if not os.path.exists(self.marker):
+            old = Journal(self.filename, key=self.key, codec=self.codec)
+            old_files = old.files()
+            if old_files:
+                shards = [[] for _ in range(self.count)]
+                for item in old.load():
+                    shards[self.shard_of(self.key(item))].append(item)
+                for i, items in enumerate(shards):
+                    Journal(self.shard_name(i), key=self.key, codec=self.codec).compact(items)  # Written inline
+                    self._set(i, items)
+
+            tmp = self.marker + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(str(self.count))
+            os.replace(tmp, self.marker)
+
+            for path in old_files:
+                os.remove(path)
+        self.migrated = True
+
+    def _set(self, i, items):
+        self.data[i] = items
+        self.positions[i] = {self.key(item): p for p, item in enumerate(items)}
+
+    def _shard(self, i):
+        """
+        Returns the items of shard i, reading it on first use.
+        """
+        with self.lock:
+            self._migrate()
+            if self.data[i] is None:
+                self._set(i, self.journals[i].load())
+            return self.data[i]
+
+    def load(self):
+        """
+        Reads every shard and returns all items as one list.
+        """
+        items = []
+        for i in range(self.count):
+            items += self._shard(i)
+        return items
+
+    def get(self, key):
+        """
+        Returns the item with the given key (reading only its shard), or None.
+        """
+        i = self.shard_of(key)
+        with self.lock:
+            data = self._shard(i)
+            p = self.positions[i].get(key)
+            return data[p] if p is not None else None
+
+    def files(self):
+        """
+        Returns the paths of all shard files and the marker that exist on disk
+        (or of the old single file if it has not been split yet).
+        """
+        paths = [path for journal in self.journals for path in journal.files()]
+        if os.path.exists(self.marker):
+            paths.append(self.marker)
+        else:
+            paths += Journal(self.filename, key=self.key).files()
+        return paths
+
+    def locks(self):
+        return [self.lock] + [lock for journal in self.journals for lock in journal.locks()]
+
+    # -------------------------------
+    # WRITING
+    # (`data` is the caller's list and is ignored: shards keep their own)
+    # -------------------------------
+
+    def _store(self, i, item):
+        key = self.key(item)
+        data, positions = self._shard(i), self.positions[i]
+        if key in positions:
+            data[positions[key]] = item
+        else:
+            positions[key] = len(data)
+            data.append(item)
+
+    def put(self, data, item):
+        i = self.shard_of(self.key(item))
+        with self.lock:
+            self._store(i, item)
+            return self.journals[i].put(self.data[i], item)
+
+    def put_many(self, data, items):
+        return self.write_records(self.records(data, items))
+
+    def records(self, data, items):
+        return [("put", self.key(item), item) for item in items]
+
+    def write_records(self, records, data=None):
+        """
+        Appends put records, one write per shard touched (reading those
+        shards first, so recovered records also update loaded data).
+        """
+        groups = {}
+        for record in records:
+            groups.setdefault(self.shard_of(record[1]), []).append(record)
+        nbytes = 0
+        with self.lock:
+            for i, group in groups.items():
+                for _, _, item in group:
+                    self._store(i, item)
+                nbytes += self.journals[i].write_records(group, self.data[i])
+        return nbytes
+
+    def delete(self, data, key):
+        i = self.shard_of(key)
+        with self.lock:
+            data, positions = self._shard(i), self.positions[i]
+            p = positions.pop(key, None)
+            if p is not None:
+                # Move the last item into the gap so removal stays O(1)
+                last = data.pop()
+                if p < len(data):
+                    data[p] = last
+                    positions[self.key(last)] = p
+            return self.journals[i].delete(data, key)
+
+    def delete_many(self, data, keys):
+        return sum(self.delete(data, key) for key in keys)
+
+    def compact(self, data):
+        """
+        Replaces the whole data set: every shard gets a fresh snapshot.
+        """
+        shards = [[] for _ in range(self.count)]
+        for item in data:
+            shards[self.shard_of(self.key(item))].append(item)
+        nbytes = 0
+        with self.lock:
+            self._migrate()
+            for i, items in enumerate(shards):
+                self._set(i, items)
+                nbytes += self.journals[i].compact(items)
+        return nbytes
+
+    def close(self):
+        for journal in self.journals:
+            journal.close()
@@ -0,0 +1,319 @@
+"""
+Point-in-time snapshots of the data files, and restoring them.
+
+While the app is running, take snapshots through the controller
+(create_snapshot, the admin dashboard or POST /admin/snapshots) so sales
+carry on. With the app stopped they can also be taken from the command line:
+    python -m controller.snapshots create [--incremental]
+    python -m controller.snapshots list
+    python -m controller.snapshots restore <snapshot id> <empty folder>
+"""
+
+import argparse                             # Command line options
+import json                                 # Snapshot manifests
+import os                                   # Hard links, file identities and sizes
+import shutil                               # Copying and removing snapshot folders
+import threading                            # One snapshot at a time
+import time                                 # How long writes were held back
+import zlib                                 # Checks that a journal only grew since the last snapshot
+from datetime import datetime               # Snapshot ids and times
+from controller.storage import PickleStorage, SQLiteStorage
+
+MANIFEST = "manifest.json"
+CHUNK = 1 << 20                             # Bytes copied at a time
+
+
+def growing(name):
+    """
+    True for files appended to in place (current journals); every other
+    data file is only ever replaced whole or removed.
+    """
+    return name.endswith(".journal")
+
+
+def link_or_copy(source, target):
+    """
+    Hard links source to target (instant, no extra space), or copies it
+    when the two folders are on different file systems.
+    """
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def copy_bytes(source, target, length, crc=0):
+    """
+    Copies up to `length` bytes between open files.
+    Returns the bytes copied and the running CRC32.
+    """
+    copied = 0
+    while copied < length:
+        chunk = source.read(min(CHUNK, length - copied))
+        if not chunk:
+            break                               # Shorter than when it was noted (torn tail cut at load)
+        target.write(chunk)
+        crc = zlib.crc32(chunk, crc)
+        copied += len(chunk)
+    return copied, crc
+
+
+def prefix_crc(f, length):
+    """
+    Returns the CRC32 of the first `length` bytes of an open file (None if it is shorter).
+    """
+    crc, left = 0, length
+    while left:
+        chunk = f.read(min(CHUNK, left))
+        if not chunk:
+            return None
+        crc = zlib.crc32(chunk, crc)
+        left -= len(chunk)
+    return crc
+
+
+class SnapshotStore:
+    """
+    Point-in-time snapshots of a storage backend's data files, one sub
+    folder of `folder` per snapshot (named by the time it was taken).
+
+    Taking a snapshot holds back writes only while every data file is
+    noted: snapshot files are hard linked (they are only ever replaced
+    whole, so the link keeps this version) and the length of each current
+    journal is recorded, with the file kept open. The journals are copied
+    up to those lengths after writes have resumed, so sales never wait
+    for the copy. With SQLite the database is copied with the online
+    backup API instead.
+
+    Each file in a manifest is a list of parts (snapshot id, length) that
+    are joined on restore. A full snapshot stores every file itself. An
+    incremental one refers to the previous snapshot's parts for files that
+    did not change and stores only the bytes appended to each journal
+    since then. After every `full_every` incremental snapshots the next
+    one is full again, so chains stay short.
+
+    Only the newest `keep` snapshots (and the older ones they refer to)
+    are kept.
+    """
+
+    def __init__(self, storage, folder=None, keep=10, full_every=10):
+        self.storage = storage
+        self.folder = folder or os.path.join(storage.folder, "backups")
+        self.keep = keep
+        self.full_every = full_every
+        self.lock = threading.Lock()
+
+    # -------------------------------
+    # TAKING SNAPSHOTS
+    # -------------------------------
+
+    def create(self, incremental=False):
+        """
+        Takes a snapshot and returns its manifest. Snapshots beyond the
+        retention limit are removed afterwards.
+        """
+        with self.lock:
+            os.makedirs(self.folder, exist_ok=True)
+            previous = self.latest() if incremental else None
+            if previous is not None and previous["chain"] >= self.full_every:
+                previous = None                     # Start a new chain with a full snapshot
+            old_files = previous["files"] if previous else {}
+
+            snapshot_id = self._new_id()
+            tmp = os.path.join(self.folder, snapshot_id + ".tmp")
+            os.makedirs(tmp)
+            files, journals, stored = {}, [], 0
+
+            start = time.perf_counter()
+            with self.storage.frozen() as data_files:
+                for name, path in data_files:
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if growing(name):
+                        journals.append((name, open(path, "rb"), st))
+                        continue
+                    old = old_files.get(name)
+                    if old is not None and old["file"] == [st.st_ino, st.st_size, st.st_mtime_ns]:
+                        files[name] = old           # Unchanged since the previous snapshot
+                    else:
+                        link_or_copy(path, os.path.join(tmp, name))
+                        files[name] = {"file": [st.st_ino, st.st_size, st.st_mtime_ns],
+                                       "parts": [[snapshot_id, st.st_size]]}
+                        stored += st.st_size
+            paused = time.perf_counter() - start
+
+            for name, f, st in journals:
+                with f:
+                    files[name] = entry = self._copy_journal(f, st, old_files.get(name), snapshot_id, tmp, name)
+                    stored += sum(n for sid, n in entry["parts"] if sid == snapshot_id)
+
+            manifest = {
+                "id": snapshot_id,
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "kind": "incremental" if previous else "full",
+                "base": previous["id"] if previous else None,
+                "chain": previous["chain"] + 1 if previous else 0,
+                "paused_ms": round(paused * 1000, 3),
+                "stored_bytes": stored,
+                "files": files
+            }
+            with open(os.path.join(tmp, MANIFEST), "w") as out:
+                json.dump(manifest, out)
+            os.replace(tmp, os.path.join(self.folder, snapshot_id))  # Complete snapshots only
+            self.prune()
+            return manifest
+
+    def _copy_journal(self, f, st, old, snapshot_id, tmp, name):
+        """
+        Stores a journal up to the length it had when the snapshot was taken.
+        If the previous snapshot holds the start of this same file, only the
+        bytes appended since are stored.
+        """
+        parts, crc, offset = [], 0, 0
+        if old is not None and old["file"][0] == st.st_ino and old["file"][1] <= st.st_size:
+            if prefix_crc(f, old["file"][1]) == old["crc"]:
+                parts, crc, offset = list(old["parts"]), old["crc"], old["file"][1]
+            else:
+                f.seek(0)
+        length = offset
+        if st.st_size > offset:
+            with open(os.path.join(tmp, name), "wb") as out:
+                copied, crc = copy_bytes(f, out, st.st_size - offset, crc)
+            if copied:
+                parts.append([snapshot_id, copied])
+            length += copied
+        return {"file": [st.st_ino, length, st.st_mtime_ns], "crc": crc, "parts": parts}
+
+    def _new_id(self):
+        snapshot_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        while os.path.exists(os.path.join(self.folder, snapshot_id)):
+            snapshot_id += "x"
+        return snapshot_id
+
+    # -------------------------------
+    # LISTING AND RETENTION
+    # -------------------------------
+
+    def ids(self):
+        """
+        Returns the ids of all complete snapshots, oldest first.
+        """
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(
+            name for name in os.listdir(self.folder)
+            if os.path.exists(os.path.join(self.folder, name, MANIFEST))
+        )
+
+    def manifest(self, snapshot_id):
+        """
+        Returns the manifest of one snapshot.
+        """
+        try:
+            with open(os.path.join(self.folder, snapshot_id, MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Snapshot not found: {snapshot_id}")
+
+    def latest(self):
+        ids = self.ids()
+        return self.manifest(ids[-1]) if ids else None
+
+    def list(self):
+        """
+        Returns (id, time, kind, stored bytes, ms writes were held back) per snapshot, oldest first.
+        """
+        return [
+            (m["id"], m["time"], m["kind"], m["stored_bytes"], m["paused_ms"])
+            for m in (self.manifest(snapshot_id) for snapshot_id in self.ids())
+        ]
+
+    def prune(self):
+        """
+        Removes snapshots older than the newest `keep` that none of those
+        refer to, and folders left by snapshots that never completed.
+        """
+        ids = self.ids()
+        kept = ids[-self.keep:] if self.keep > 0 else []
+        needed = set(kept)
+        for snapshot_id in kept:
+            for entry in self.manifest(snapshot_id)["files"].values():
+                needed.update(sid for sid, _ in entry["parts"])
+        for name in os.listdir(self.folder):
+            if name not in needed and (name in ids or name.endswith(".tmp")):
+                shutil.rmtree(os.path.join(self.folder, name), ignore_errors=True)
+
+    # -------------------------------
+    # RESTORING
+    # -------------------------------
+
+    def restore(self, snapshot_id, target):
+        """
+        Writes the data files of a snapshot into the `target` folder, which
+        must be empty; start the app there (or move the files into place
+        while it is stopped). Files stored whole are hard linked,
+        so restoring takes about as long as copying the journals.
+        Returns the number of files restored.
+        """
+        files = self.manifest(snapshot_id)["files"]
+        os.makedirs(target, exist_ok=True)
+        if os.listdir(target):
+            raise ValueError("Restore folder is not empty")
+
+        for name, entry in files.items():
+            path = os.path.join(target, name)
+            parts = entry["parts"]
+            if len(parts) == 1 and not growing(name):
+                link_or_copy(os.path.join(self.folder, parts[0][0], name), path)
+                continue
+            # Journals are appended to after the restore, so they are always copied
+            with open(path + ".tmp", "wb") as out:
+                for sid, length in parts:
+                    with open(os.path.join(self.folder, sid, name), "rb") as part:
+                        copy_bytes(part, out, length)
+            os.replace(path + ".tmp", path)
+        return len(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot and restore GreenWave data files")
+    parser.add_argument("--folder", default=".", help="folder containing the .pkl files")
+    parser.add_argument("--db", help="SQLite database instead of the .pkl files")
+    parser.add_argument("--backups", help="snapshot folder (default: backups next to the data)")
+    parser.add_argument("--keep", type=int, default=10, help="number of snapshots to keep")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="take a snapshot")
+    create.add_argument("--incremental", action="store_true", help="only store what changed since the last one")
+    commands.add_parser("list", help="list the snapshots")
+    restore = commands.add_parser("restore", help="write a snapshot's data files into an empty folder")
+    restore.add_argument("snapshot")
+    restore.add_argument("target")
+    args = parser.parse_args()
+    data_folder = os.path.dirname(os.path.abspath(args.db)) if args.db else args.folder
+    backups = args.backups or os.path.join(data_folder, "backups")
+
+    if args.command == "restore":
+        try:
+            count = SnapshotStore(None, backups).restore(args.snapshot, args.target)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"{count} files restored to {args.target}")
+        return
+
+    storage = SQLiteStorage(args.db) if args.db else PickleStorage(args.folder, background=False)
+    try:
+        store = SnapshotStore(storage, backups, args.keep)
+        if args.command == "create":
+            m = store.create(args.incremental)
+            print(f"{m['kind']} snapshot {m['id']}: {m['stored_bytes']} bytes stored")
+        else:
+            for snapshot_id, taken, kind, stored, paused in store.list():
+                print(f"{snapshot_id}  {taken}  {kind:<11} {stored:>12} bytes  writes held {paused} ms")
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
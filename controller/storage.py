@@ -0,0 +1,435 @@
+import contextlib                           # Holding every journal lock at once (frozen)
+import os                                   # Used to build file paths inside the data folder
+import pickle                               # Items are stored as pickled objects
+import sqlite3                              # Standard library SQLite database
+import threading                            # Serialises writes to the shared connection
+from controller.journal import Journal     # Append-only journal for pickle files
+from controller.shards import ShardedJournal  # Attendees split over several journaled files
+from controller.dataformat import DATASET_CODECS  # Compact snapshot layout of each data set
+from controller.writer import BackgroundWriter  # Writes snapshots off the calling thread
+from controller.transactions import TransactionLog  # Atomic writes across data sets
+
+# -------------------------------
+# STORAGE LAYER
+# The controller saves and loads its data sets through one of these
+# storage classes. Data sets are named after their original pickle files.
+# -------------------------------
+
+# Function returning the unique key of an item in each data set
+# (None means the data set is an append-only list)
+KEYS = {
+    "attendees.pkl": lambda a: a.account.username,
+    "payments.pkl": None,
+    "workshops.pkl": lambda w: w.title,
+    "sales.pkl": lambda r: r.date,
+    "reservations.pkl": lambda r: (r.username, r.title),
+    "waitlist.pkl": lambda e: (e.username, e.title),
+    "sales_events.pkl": None
+}
+
+TRANSACTION_LOG = "transactions.journal"     # Changes spanning several data sets (see commit)
+
+
+class PickleStorage:
+    """
+    Default storage: one pickle snapshot plus one append-only journal
+    per data set, all kept in the given folder. Full snapshots are written
+    by a background thread unless `background` is False.
+
+    Attendees are split over `shards` files by username hash and each
+    shard is read when one of its usernames is first looked up
+    (shards=1 keeps them in a single attendees.pkl loaded up front).
+
+    Changes to several data sets are made atomic by a transaction log;
+    transactions a crash left half applied are finished on startup.
+    """
+
+    def __init__(self, folder=".", background=True, shards=32, sync=True):
+        self.folder = folder
+        self.writer = BackgroundWriter() if background else None
+        self.journals = {
+            name: Journal(os.path.join(folder, name), key=key, writer=self.writer, codec=DATASET_CODECS[name])
+            for name, key in KEYS.items()
+        }
+        self.on_demand = set()                      # Data sets read per row instead of up front
+        if shards > 1:
+            name = "attendees.pkl"
+            self.journals[name] = ShardedJournal(
+                os.path.join(folder, name), KEYS[name], shards, self.writer, DATASET_CODECS[name]
+            )
+            self.on_demand.add(name)
+
+        self.transactions = TransactionLog(os.path.join(folder, TRANSACTION_LOG), sync=sync)
+        for txid, changes in self.transactions.recovered:
+            for name, records in changes:
+                self.journals[name].write_records(records)
+            self.transactions.done([txid])
+
+    def load(self, name):
+        """
+        Returns the whole data set as a list.
+        """
+        return self.journals[name].load()
+
+    def exists(self, name):
+        """
+        Returns True if the data set has ever been saved.
+        """
+        return bool(self.journals[name].files())
+
+    def get(self, name, key):
+        """
+        Returns the item with the given key from a sharded data set
+        (reading its shard if needed). Other pickle files are not read
+        per row, so all their rows are loaded up front.
+        """
+        if name in self.on_demand:
+            return self.journals[name].get(key)
+        return None
+
+    def size(self, name):
+        """
+        Returns the bytes the data set takes on disk (snapshot and journals).
+        """
+        return sum(os.path.getsize(p) for p in self.journals[name].files())
+
+    def observe(self, callback):
+        """
+        Calls callback(name, bytes, seconds) after every background snapshot write.
+        """
+        if self.writer is not None:
+            self.writer.observer = lambda path, nbytes, seconds: callback(os.path.basename(path), nbytes, seconds)
+
+    def put(self, name, data, item):
+        """
+        Appends a single added or changed item to the data set's journal.
+        Like every write method, returns the number of bytes written.
+        """
+        return self.journals[name].put(data, item)
+
+    def put_many(self, name, data, items):
+        """
+        Appends several added or changed items with one write.
+        """
+        return self.journals[name].put_many(data, items)
+
+    def delete(self, name, data, key):
+        """
+        Appends the removal of the item with the given key.
+        """
+        return self.journals[name].delete(data, key)
+
+    def delete_many(self, name, data, keys):
+        """
+        Appends the removal of several items with one write.
+        """
+        return self.journals[name].delete_many(data, keys)
+
+    def begin(self, prepare, apply=None):
+        """
+        Starts saving changes to several data sets as one transaction and
+        returns a ticket for wait(). Call wait() after releasing any locks,
+        so that concurrent transactions can share one fsync.
+
+        prepare(staged) returns the (name, data, items) changes. It runs on
+        the thread writing the batch, in order, and must not change data
+        (see TransactionLog.begin for `staged`); items of append-only data
+        sets go after those of earlier transactions. Once every change is
+        in the fsynced transaction log, apply() puts the items into data and
+        the changes are written to the data sets' journals, so after a crash
+        either none or all of them are applied.
+        """
+        built = []
+
+        def build(staged):
+            for name, data, items in prepare(staged):
+                if not items:
+                    continue
+                journal = self.journals[name]
+                if KEYS[name] is None:
+                    first = staged.get(("position", name), len(data))
+                    staged[("position", name)] = first + len(items)
+                    built.append((name, data, journal.records(data, items, first)))
+                else:
+                    built.append((name, data, journal.records(data, items)))
+            return [(name, records) for name, _, records in built]
+
+        def run():
+            if apply is not None:
+                apply()
+            return sum(self.journals[name].write_records(records, data) for name, data, records in built)
+
+        return self.transactions.begin(build, run)
+
+    def wait(self, ticket):
+        """
+        Blocks until the transaction is on disk and applied; returns the bytes written.
+        """
+        return self.transactions.wait(ticket)
+
+    def commit(self, changes, apply=None):
+        """
+        Saves a list of (name, data, items) changes as one transaction (see begin).
+        """
+        return self.wait(self.begin(lambda staged: changes, apply))
+
+    def save(self, name, data):
+        """
+        Rewrites the whole data set as a fresh snapshot.
+        """
+        return self.journals[name].compact(data)
+
+    def flush(self):
+        """
+        Waits until every queued snapshot is on disk.
+        """
+        if self.writer is not None:
+            self.writer.flush()
+
+    @contextlib.contextmanager
+    def frozen(self):
+        """
+        Holds back every write while the block runs (reads carry on) and
+        yields (name in the folder, path) for every data file. Data files
+        are only ever appended to (current journals) or replaced whole, so
+        links taken and lengths noted inside the block describe one
+        consistent point in time (see controller.snapshots).
+        """
+        with contextlib.ExitStack() as stack:
+            for journal in self.journals.values():
+                for lock in journal.locks():
+                    stack.enter_context(lock)
+            stack.enter_context(self.transactions.file_lock)
+            paths = [path for journal in self.journals.values() for path in journal.files()]
+            paths.append(self.transactions.path)
+            yield [(os.path.relpath(path, self.folder), path) for path in paths]
+
+    def close(self):
+        """
+        Writes queued snapshots and closes all open journal files.
+        """
+        if self.writer is not None:
+            self.writer.close()
+        for journal in self.journals.values():
+            journal.close()
+        self.transactions.close()
+
+
+# SQLite table layout for each data set:
+# (table name, key column, function returning the indexed column values)
+TABLES = {
+    "attendees.pkl": ("attendees", "username", lambda a: {"username": a.account.username}),
+    "payments.pkl": ("payments", "id", lambda p: {"method": p.method, "amount": p.amount}),
+    "workshops.pkl": ("workshops", "title", lambda w: {"title": w.title, "exhibition": w.exhibition}),
+    "sales.pkl": ("sales", "date", lambda r: {"date": str(r.date)}),
+    "reservations.pkl": ("reservations", "key", lambda r: {
+        "key": str((r.username, r.title)), "username": r.username, "title": r.title
+    }),
+    "waitlist.pkl": ("waitlist", "key", lambda e: {
+        "key": str((e.username, e.title)), "title": e.title
+    }),
+    "sales_events.pkl": ("sales_events", "id", lambda e: {"time": e.time.isoformat(), "kind": e.kind})
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attendees (username TEXT PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS payments (id INTEGER PRIMARY KEY AUTOINCREMENT, method TEXT, amount REAL, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS workshops (title TEXT PRIMARY KEY, exhibition TEXT, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS sales (date TEXT PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS reservations (key TEXT PRIMARY KEY, username TEXT, title TEXT, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS waitlist (key TEXT PRIMARY KEY, title TEXT, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS sales_events (id INTEGER PRIMARY KEY AUTOINCREMENT, time TEXT, kind TEXT, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS datasets (name TEXT PRIMARY KEY);
+CREATE INDEX IF NOT EXISTS workshops_exhibition ON workshops (exhibition);
+CREATE INDEX IF NOT EXISTS reservations_username ON reservations (username);
+CREATE INDEX IF NOT EXISTS reservations_title ON reservations (title);
+CREATE INDEX IF NOT EXISTS waitlist_title ON waitlist (title);
+CREATE INDEX IF NOT EXISTS sales_events_time ON sales_events (time);
+"""
+
+
+class SQLiteStorage:
+    """
+    SQLite storage: every data set is a table with an indexed key column.
+    Attendees and payments are read one row at a time when needed,
+    and every change is a single-row transaction.
+    """
+
+    def __init__(self, path="greenwave.db"):
+        self.path = path
+        self.folder = os.path.dirname(os.path.abspath(path))
+        self.on_demand = {"attendees.pkl", "payments.pkl"}
+        self.lock = threading.Lock()
+        self.commit_lock = threading.Lock()        # Applies transactions in the order they were written
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")      # Readers never block the writer
+        self.conn.execute("PRAGMA synchronous=NORMAL")    # Safe with WAL and much faster
+        tables = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.conn.executescript(SCHEMA)
+        if "datasets" not in tables:
+            # Database from before data sets were recorded: its tables were all saved
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO datasets (name) VALUES (?)",
+                    [(name,) for name, (table, _, _) in TABLES.items() if table in tables]
+                )
+        self.existing = {row[0] for row in self.conn.execute("SELECT name FROM datasets")}
+
+    def load(self, name):
+        """
+        Returns the whole data set as a list, in insertion order.
+        """
+        table = TABLES[name][0]
+        with self.lock:
+            rows = self.conn.execute(f"SELECT data FROM {table} ORDER BY rowid").fetchall()
+        return [pickle.loads(row[0]) for row in rows]
+
+    def exists(self, name):
+        """
+        Returns True if the data set has ever been saved
+        (data sets added in newer versions may still need migrating).
+        """
+        return name in self.existing
+
+    def get(self, name, key):
+        """
+        Returns the single item with the given key, or None.
+        """
+        table, key_column, _ = TABLES[name]
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT data FROM {table} WHERE {key_column} = ?", (str(key),)
+            ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def size(self, name):
+        """
+        Returns the bytes of all pickled rows of the data set.
+        """
+        table = TABLES[name][0]
+        with self.lock:
+            return self.conn.execute(f"SELECT COALESCE(SUM(LENGTH(data)), 0) FROM {table}").fetchone()[0]
+
+    def observe(self, callback):
+        """
+        Every write is synchronous, so there are no background writes to report.
+        """
+
+    def put(self, name, data, item):
+        """
+        Inserts or replaces one item in its own transaction.
+        Like every write method, returns the number of bytes written.
+        """
+        with self.lock, self.conn:
+            return self._insert(name, item)
+
+    def put_many(self, name, data, items):
+        """
+        Inserts or replaces several items in one transaction.
+        """
+        with self.lock, self.conn:
+            return sum(self._insert(name, item) for item in items)
+
+    def begin(self, prepare, apply=None):
+        """
+        Inserts or replaces the items of several data sets (the (name, data,
+        items) changes returned by prepare) in one transaction right away,
+        then calls apply(); SQLite commits are cheap in WAL mode, so there
+        is nothing to batch. Returns the bytes written as the ticket for wait().
+        """
+        with self.commit_lock:
+            changes = prepare({})
+            with self.lock, self.conn:
+                nbytes = sum(self._insert(name, item) for name, _, items in changes for item in items)
+            if apply is not None:
+                apply()
+            return nbytes
+
+    def wait(self, ticket):
+        return ticket
+
+    def commit(self, changes, apply=None):
+        return self.wait(self.begin(lambda staged: changes, apply))
+
+    def delete(self, name, data, key):
+        """
+        Deletes the item with the given key.
+        """
+        table, key_column, _ = TABLES[name]
+        with self.lock, self.conn:
+            self.conn.execute(f"DELETE FROM {table} WHERE {key_column} = ?", (str(key),))
+        return 0
+
+    def delete_many(self, name, data, keys):
+        """
+        Deletes the items with the given keys in one transaction.
+        """
+        table, key_column, _ = TABLES[name]
+        with self.lock, self.conn:
+            self.conn.executemany(f"DELETE FROM {table} WHERE {key_column} = ?", [(str(key),) for key in keys])
+        return 0
+
+    def save(self, name, data):
+        """
+        Replaces the whole table with the given items in one transaction.
+        """
+        table = TABLES[name][0]
+        with self.lock, self.conn:
+            self._mark_saved(name)
+            self.conn.execute(f"DELETE FROM {table}")
+            return sum(self._insert(name, item) for item in data)
+
+    def flush(self):
+        """
+        Every change is already committed, so there is nothing to wait for.
+        """
+
+    @contextlib.contextmanager
+    def frozen(self):
+        """
+        Yields (name, path) of a consistent copy of the database, made with
+        SQLite's online backup API over a separate connection: it reads one
+        WAL snapshot, so writes carry on meanwhile.
+        """
+        copy = self.path + ".snapshot"
+        source, target = sqlite3.connect(self.path), sqlite3.connect(copy)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        try:
+            yield [(os.path.basename(self.path), copy)]
+        finally:
+            os.remove(copy)
+
+    def _mark_saved(self, name):
+        """
+        Records that the data set exists; the caller holds the lock and the transaction.
+        """
+        if name not in self.existing:
+            self.conn.execute("INSERT OR IGNORE INTO datasets (name) VALUES (?)", (name,))
+            self.existing.add(name)
+
+    def _insert(self, name, item):
+        """
+        Writes one row and returns its size; the caller holds the lock and the transaction.
+        """
+        table, _, columns = TABLES[name]
+        self._mark_saved(name)
+        values = columns(item)
+        values["data"] = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        names = ", ".join(values)
+        marks = ", ".join("?" for _ in values)
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO {table} ({names}) VALUES ({marks})",
+            tuple(values.values())
+        )
+        return len(values["data"])
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,204 @@
+import os                                   # fsync and truncating a torn tail
+import pickle                               # Changes are pickled when a transaction begins
+import sys                                  # Errors are reported on stderr
+import threading                            # Commits from many threads share one fsync
+import traceback
+from controller.dataformat import JOURNAL_MAGIC, encode_record, read_journal
+
+
+class TransactionLog:
+    """
+    Durable log that makes a change to several data sets atomic.
+    A transaction is one checksummed ("begin", id, changes) frame that is
+    written and fsynced before the changes reach the data sets' own
+    journals, followed by a ("done", id) frame once they have.
+
+    Transactions without a done frame (the process stopped in between)
+    are listed in `recovered` on the next start so they can be applied
+    again. That is harmless for the ones that did get through: every
+    change is a put of a whole item at its key or list position.
+
+    begin() only queues a transaction. The first thread to wait() for one
+    builds and writes every queued transaction with a single fsync and
+    then applies them in order (group commit), so under load many commits
+    share one fsync. Nothing is applied before it is durable.
+    The log is emptied once it has grown past `max_size` bytes and every
+    transaction in it is done.
+    """
+
+    def __init__(self, path, max_size=1 << 20, sync=True):
+        self.path = path
+        self.max_size = max_size
+        self.sync = sync                            # fsync each batch (False trades durability for speed)
+        self.queue = []                             # (id, prepare callback, apply callback) not written yet
+        self.results = {}                           # Id -> bytes written, or the error that stopped it
+        self.next_id = 0                            # Last transaction id handed out
+        self.in_flight = set()                      # Written but not applied (kept when the log is emptied)
+        self.unmarked = []                          # Applied, but writing their done frames failed
+        self.writing = False                        # True while one thread writes and applies a batch
+        self.cond = threading.Condition()
+        self.file_lock = threading.Lock()           # Held while the file is written (see PickleStorage.frozen)
+        self.recovered = self._read()               # [(id, changes)] left unfinished by the last run
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(JOURNAL_MAGIC)
+            self._file.flush()
+        self.size = self._file.tell()
+
+    def _read(self):
+        """
+        Returns the unfinished transactions in the log, oldest first,
+        and cuts off a torn frame at the end.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                frames, valid_size = read_journal(f, os.path.getsize(self.path), self.path)
+        except FileNotFoundError:
+            return []
+
+        begun = {}
+        for frame in frames:
+            if frame[0] == "begin":
+                begun[frame[1]] = pickle.loads(frame[2])
+            else:
+                begun.pop(frame[1], None)
+            self.next_id = max(self.next_id, frame[1])
+        self.in_flight = set(begun)
+
+        if os.path.getsize(self.path) != valid_size:
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_size)
+        return list(begun.items())
+
+    # -------------------------------
+    # COMMITTING
+    # -------------------------------
+
+    def begin(self, prepare, apply):
+        """
+        Queues a transaction and returns its id without writing anything.
+        The thread writing the batch calls prepare(staged) for each
+        transaction in id order to get the changes to log; `staged` is a
+        dict shared by the batch, where a transaction leaves what later
+        ones must build on while nothing is applied yet. Once the batch is
+        durable apply() is called (in id order) to write the changes to the
+        data sets; it returns the bytes it wrote.
+        """
+        with self.cond:
+            self.next_id += 1
+            txid = self.next_id
+            self.queue.append((txid, prepare, apply))
+        return txid
+
+    def wait(self, txid):
+        """
+        Blocks until the transaction is durable and applied, and returns the
+        bytes written for it. Raises the error if it could not be written.
+        """
+        with self.cond:
+            while txid not in self.results:
+                if self.writing:
+                    self.cond.wait()
+                    continue
+                batch, self.queue = self.queue, []
+                self.writing = True
+                self.cond.release()
+                try:
+                    results = self._run(batch)
+                finally:
+                    self.cond.acquire()
+                    self.writing = False
+                    self.cond.notify_all()
+                self.results.update(results)
+            result = self.results.pop(txid)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _run(self, batch):
+        """
+        Builds and writes a batch of transactions with one fsync, then
+        applies them in order. Returns {id: bytes written or error}.
+        """
+        results, frames, staged = {}, [], {}
+        for txid, prepare, apply in batch:
+            try:
+                payload = pickle.dumps(prepare(staged), protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                results[txid] = e
+                continue
+            frames.append((txid, encode_record(("begin", txid, payload)), apply))
+
+        try:
+            self._write(b"".join(frame for _, frame, _ in frames), self.sync)
+        except OSError as e:
+            results.update((txid, e) for txid, _, _ in frames)
+            return results
+
+        applied = []
+        for txid, frame, apply in frames:
+            results[txid] = len(frame)
+            try:
+                results[txid] += apply()
+                applied.append(txid)
+            except Exception:
+                # Committed but not applied: finished from the log on the next start
+                print(f"Could not apply transaction {txid}:", file=sys.stderr)
+                traceback.print_exc()
+                self.in_flight.add(txid)
+        try:
+            self.done(applied)
+        except OSError:
+            # Marked done with the next batch, before later changes could be
+            # overwritten by applying these again on the next start
+            traceback.print_exc()
+        return results
+
+    def done(self, txids):
+        """
+        Marks transactions as fully applied to the data sets, and empties the
+        log if it is large and nothing in it is left unfinished.
+        Only called by the thread running a batch (or during startup).
+        """
+        txids = self.unmarked + list(txids)
+        self.unmarked = txids
+        self._write(b"".join(encode_record(("done", txid)) for txid in txids), False)
+        self.unmarked = []
+        self.in_flight.difference_update(txids)
+        if self.size > self.max_size and not self.in_flight:
+            with self.file_lock:
+                # A new file rather than emptying this one, so backup links keep their frames
+                self._file.close()
+                os.remove(self.path)
+                self._file = open(self.path, "wb")
+                self._file.write(JOURNAL_MAGIC)
+                self._file.flush()
+                self.size = len(JOURNAL_MAGIC)
+
+    def _write(self, data, sync):
+        with self.file_lock:
+            try:
+                self._file.write(data)
+                self._file.flush()
+                if sync:
+                    os.fsync(self._file.fileno())
+            except OSError:
+                # Drop what made it to the file so later frames stay readable
+                self._file.seek(self.size)
+                self._file.truncate()
+                raise
+            self.size += len(data)
+
+    def close(self):
+        """
+        Waits for a running batch and closes the log file.
+        """
+        with self.cond:
+            while self.writing:
+                self.cond.wait()
+            if self.unmarked:
+                try:
+                    self.done([])
+                except OSError:
+                    traceback.print_exc()
+            self._file.close()
@@ -0,0 +1,221 @@
+import heapq                                # Priority queue per workshop
+import sys                                  # Errors are reported on stderr
+import threading                            # Shared between request threads and the scheduler
+import time                                 # Short pause to batch releases
+import traceback
+from model.models import WaitlistEntry
+
+
+class Waitlist:
+    """
+    Queues of attendees waiting for a seat in full workshops. Each workshop
+    has a heap ordered by (priority, join number), so Full ticket holders
+    come first and everyone else is served first come, first served.
+
+    Leaving the queue only removes the entry from the index; its heap slot
+    is skipped when it reaches the top, and a heap is rebuilt once most of
+    it is stale. Joining, leaving and taking the next attendee are all
+    O(log n) even with thousands waiting for one workshop.
+    """
+
+    def __init__(self, entries=()):
+        self.entries = {}                       # (username, title) -> WaitlistEntry
+        self.by_attendee = {}                   # Username -> {title: WaitlistEntry}
+        self.by_workshop = {}                   # Title -> {username: WaitlistEntry}
+        self.queues = {}                        # Title -> heap of (priority, number, username)
+        self.next_number = 0
+        self.lock = threading.RLock()
+        for e in entries:
+            self._add(e)
+            self.next_number = max(self.next_number, e.number + 1)
+
+    def _add(self, e):
+        self.entries[(e.username, e.title)] = e
+        self.by_attendee.setdefault(e.username, {})[e.title] = e
+        self.by_workshop.setdefault(e.title, {})[e.username] = e
+        heapq.heappush(self.queues.setdefault(e.title, []), (e.priority, e.number, e.username))
+
+    def _remove(self, e):
+        del self.entries[(e.username, e.title)]
+        titles = self.by_attendee[e.username]
+        del titles[e.title]
+        if not titles:
+            del self.by_attendee[e.username]
+        waiting = self.by_workshop[e.title]
+        del waiting[e.username]
+
+        # Rebuild the heap once stale slots outnumber the attendees still waiting
+        queue = self.queues[e.title]
+        if len(queue) > 2 * len(waiting) + 32:
+            queue[:] = [(w.priority, w.number, w.username) for w in waiting.values()]
+            heapq.heapify(queue)
+
+    def _live(self, title, number, username):
+        """
+        True if a heap slot still belongs to a waiting entry
+        (not left, or left and joined again with a new number).
+        """
+        e = self.by_workshop.get(title, {}).get(username)
+        return e is not None and e.number == number
+
+    def join(self, username, title, priority):
+        """
+        Adds the attendee to the end of the workshop's queue (within its
+        priority) and returns the new entry.
+        """
+        with self.lock:
+            if (username, title) in self.entries:
+                raise ValueError("Already on the waitlist")
+            e = WaitlistEntry(username, title, priority, self.next_number)
+            self.next_number += 1
+            self._add(e)
+            return e
+
+    def leave(self, username, title):
+        """
+        Removes the attendee from the workshop's queue and returns the entry's key.
+        """
+        with self.lock:
+            e = self.entries.get((username, title))
+            if e is None:
+                raise ValueError("Not on the waitlist")
+            self._remove(e)
+            return (username, title)
+
+    def pop(self, title):
+        """
+        Removes and returns the next entry of the workshop's queue, or None.
+        """
+        with self.lock:
+            queue = self.queues.get(title)
+            while queue:
+                _, number, username = heapq.heappop(queue)
+                if self._live(title, number, username):
+                    e = self.by_workshop[title][username]
+                    self._remove(e)
+                    return e
+            return None
+
+    def restore(self, entries):
+        """
+        Puts entries taken by pop() back in their old places (used when
+        promoting them failed). Attendees who joined again meanwhile keep
+        their new entry.
+        """
+        with self.lock:
+            for e in entries:
+                if (e.username, e.title) not in self.entries:
+                    self._add(e)
+
+    def has(self, username, title):
+        return (username, title) in self.entries
+
+    def length(self, title):
+        """
+        Returns the number of attendees waiting for the workshop.
+        """
+        return len(self.by_workshop.get(title, ()))
+
+    def queue(self, title):
+        """
+        Returns the workshop's entries in the order they will be served.
+        """
+        with self.lock:
+            entries = list(self.by_workshop.get(title, {}).values())
+        return sorted(entries, key=lambda e: (e.priority, e.number))
+
+    def position(self, username, title):
+        """
+        Returns the attendee's 1-based place in the workshop's queue.
+        """
+        with self.lock:
+            e = self.entries[(username, title)]
+            return 1 + sum(
+                1 for other in self.by_workshop[title].values()
+                if (other.priority, other.number) < (e.priority, e.number)
+            )
+
+    def titles_for(self, username):
+        """
+        Returns the titles of the workshops the attendee is waiting for.
+        """
+        with self.lock:
+            return list(self.by_attendee.get(username, ()))
+
+    def data(self):
+        """
+        Live view of all entries, passed to the storage layer
+        (only read while holding the lock).
+        """
+        return self.entries.values()
+
+
+class PromotionScheduler:
+    """
+    Promotes waiting attendees on a background thread. Releasing a seat
+    only marks its workshop; the thread waits `delay` seconds so releases
+    arriving together are handled as one batch, then calls
+    promote(titles) with every marked workshop.
+    """
+
+    def __init__(self, promote, delay=0.05):
+        self.promote = promote                  # Called with a set of workshop titles
+        self.delay = delay                      # Seconds to gather releases into one batch
+        self.pending = set()                    # Titles with released seats
+        self.busy = False                       # True while a batch is being promoted
+        self.closed = False
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="greenwave-waitlist", daemon=True)
+        self.thread.start()
+
+    def release(self, titles):
+        """
+        Marks workshops whose seats were released or added.
+        """
+        with self.cond:
+            self.pending.update(titles)
+            self.cond.notify_all()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return                      # Closed and nothing left to promote
+                self.busy = True
+            if not self.closed:
+                time.sleep(self.delay)          # Let more releases join this batch
+            with self.cond:
+                titles, self.pending = self.pending, set()
+
+            try:
+                self.promote(titles)
+            except Exception:
+                # promote() put back the entries it had taken (see promote_waitlists), so
+                # waiting attendees keep their places until a seat of the workshop is released again
+                print("Could not promote waitlisted attendees:", file=sys.stderr)
+                traceback.print_exc()
+            finally:
+                with self.cond:
+                    self.busy = False
+                    self.cond.notify_all()
+
+    def flush(self):
+        """
+        Blocks until every marked workshop has been processed.
+        """
+        with self.cond:
+            while self.pending or self.busy:
+                self.cond.wait()
+
+    def close(self):
+        """
+        Processes everything still marked and stops the thread.
+        """
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
@@ -0,0 +1,108 @@
+import os                                   # Atomic rename and fsync
+import pickle                               # Snapshots are pickled
+import sys                                  # Errors are reported on stderr
+import threading                            # Background writer thread
+import time                                 # Times snapshot writes for the metrics
+import traceback
+
+
+def write_atomic(path, data, encode=None):
+    """
+    Pickles data (or turns it into bytes with `encode`) into a temp file
+    and renames it over path, so a crash can never leave a half-written
+    data file behind.
+    """
+    for attempt in range(3):
+        try:
+            if encode is not None:
+                payload = encode(data)
+            else:
+                payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            break
+        except RuntimeError:
+            # Another thread changed a dict while it was being pickled; try again
+            if attempt == 2:
+                raise
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(payload)
+
+
+class BackgroundWriter:
+    """
+    Writes whole data files on a background thread so GUI callbacks never
+    wait for large pickles. If the same file is submitted again before it
+    was written, only the newest snapshot is kept (writes are coalesced).
+    """
+
+    def __init__(self):
+        self.pending = {}                       # Path -> (snapshot, callback when written, encoder)
+        self.busy = False                       # True while a file is being written
+        self.observer = None                    # Called with (path, bytes, seconds) after each write
+        self.closed = False
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="greenwave-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, path, data, on_done=None, encode=None):
+        """
+        Queues a snapshot of data to be written to path (see write_atomic).
+        `data` must not be changed afterwards (pass a copy of live lists).
+        """
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("Writer is closed")
+            self.pending[path] = (data, on_done, encode)
+            self.cond.notify_all()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return                      # Closed and nothing left to write
+                path = next(iter(self.pending))
+                data, on_done, encode = self.pending.pop(path)
+                self.busy = True
+
+            try:
+                start = time.perf_counter()
+                nbytes = write_atomic(path, data, encode)
+                if self.observer is not None:
+                    self.observer(path, nbytes, time.perf_counter() - start)
+                if on_done is not None:
+                    on_done()
+            except Exception:
+                # The journal still holds every change, so nothing is lost;
+                # report it and keep serving other files
+                print(f"Could not write {path}:", file=sys.stderr)
+                traceback.print_exc()
+            finally:
+                with self.cond:
+                    self.busy = False
+                    self.cond.notify_all()
+
+    def flush(self):
+        """
+        Blocks until every queued snapshot has been written.
+        """
+        with self.cond:
+            while self.pending or self.busy:
+                self.cond.wait()
+
+    def close(self):
+        """
+        Writes everything still queued and stops the thread.
+        """
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
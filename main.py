@@ -1,5 +1,12 @@
+import argparse                          # Used to read command line options
+import time                              # Reports the startup time
 import tkinter as tk                     # Import the tkinter library to create the GUI window
 from view.gui import GreenWaveGUI       # Import the main GUI class from the view folder
+from controller.controller import GreenWaveController
+from controller.storage import SQLiteStorage
+from controller.passwords import PasswordHasher
+from controller.metrics import Metrics   # Opt-in timings and data file metrics
+from view.server import serve            # Headless HTTP/JSON server
 
 def main():
     """
@@ -7,9 +14,37 @@ def main():
     It creates the main window and launches the GUI.
     """
 
-    root = tk.Tk()                       # Create the main application window
-    app = GreenWaveGUI(root)             # Create an object of the GUI class and attach it to the window
-    root.mainloop()                      # Start the event loop to keep the window running
+    parser = argparse.ArgumentParser(description="GreenWave Conference System")
+    parser.add_argument("--db", help="use this SQLite database instead of the .pkl files")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="run the HTTP/JSON API instead of the GUI")
+    parser.add_argument("--host", default="127.0.0.1", help="address the API listens on")
+    parser.add_argument("--hash-cost", type=int, help="password hashing work factor (scrypt n = 2**cost, default 14)")
+    parser.add_argument("--metrics", action="store_true", help="time controller operations and data file loads/writes")
+    parser.add_argument("--metrics-file", default="metrics.prom", help="Prometheus text file written on exit (with --metrics)")
+    args = parser.parse_args()
+    start = time.perf_counter()
+
+    storage = SQLiteStorage(args.db) if args.db else None   # None means the default pickle files
+    metrics = Metrics(args.metrics_file) if args.metrics else None
+    controller = GreenWaveController(storage, PasswordHasher(cost=args.hash_cost), metrics)
+
+    try:
+        if args.serve:
+            print(f"Controller ready in {controller.startup_time * 1000:.1f} ms")
+            controller.start_scheduler()     # Promote waitlisted attendees off the request threads
+            serve(args.host, args.serve, controller)         # Blocks until Ctrl+C
+        else:
+            root = tk.Tk()                   # Create the main application window
+            app = GreenWaveGUI(root, controller)  # Create an object of the GUI class and attach it to the window
+            root.update()                    # Draw the first window before reporting the startup time
+            print(f"Controller ready in {controller.startup_time * 1000:.1f} ms, "
+                  f"first window in {(time.perf_counter() - start) * 1000:.1f} ms")
+            root.mainloop()                  # Start the event loop to keep the window running
+    finally:
+        controller.flush()                   # Wait for background writes before exiting
+        controller.close()                   # Close data files once the window is closed
+        if metrics is not None:
+            metrics.export()                 # Final Prometheus snapshot
 
 # This condition ensures that main() runs only when this file is executed directly,
 # and not when it is imported into another file.
@@ -4,94 +4,235 @@
 # These classes represent the core data structure of the system
 # -------------------------------
 
-class Account:
+class Model:
+    """
+    Base class for all model classes.
+    Models use __slots__ instead of a per-object __dict__ to save memory,
+    and are pickled as a plain tuple of their slot values.
+    Pickles written before slots were used (dict state) still load.
+    """
+
+    __slots__ = ()
+
+    def __getstate__(self):
+        return tuple(getattr(self, name, None) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            items = state.items()                          # Old pickle format
+        else:
+            items = zip(self.__slots__, state)
+        for name, value in items:
+            setattr(self, name, value)
+
+
+class Account(Model):
     """
     Account class stores login credentials and personal details
     for each attendee in the system.
     """
 
+    __slots__ = ("username", "password", "email")
+
     def __init__(self, username, password, email):
         self.username = username      # Stores the user's login username
         self.password = password      # Stores the user's login password
         self.email = email            # Stores the user's email address
 
 
-class TicketType:
+class TicketType(Model):
     """
     TicketType defines the rules of a ticket such as price
     and which exhibitions it grants access to.
+    Each ticket type exists only once (see shared()); tickets and passes
+    reference it, and pickles store just enough to find it again.
     """
 
+    __slots__ = ("name", "price", "exhibitions")
+
+    shared_types = {}                 # Name -> the shared TicketType with that name
+
     def __init__(self, name, price, exhibitions):
         self.name = name              # Name of the ticket (Single, Double, Full)
         self.price = price            # Ticket price in AED
         self.exhibitions = exhibitions  # List of exhibitions allowed (e.g., ["A", "B"])
 
+    @classmethod
+    def shared(cls, name, price, exhibitions):
+        """
+        Returns the shared TicketType with this name, creating it if needed.
+        An existing one is updated so the newest definition always wins.
+        """
+        t = cls.shared_types.get(name)
+        if t is None:
+            t = cls.shared_types[name] = cls(name, price, exhibitions)
+        else:
+            t.price = price
+            t.exhibitions = exhibitions
+        return t
+
+    def __reduce__(self):
+        return (load_ticket_type, (self.name, self.price, self.exhibitions))
+
 
-class Payment:
+def load_ticket_type(name, price, exhibitions):
+    """
+    Used by pickle: returns the shared TicketType with this name,
+    only creating it from the saved values if it does not exist yet.
+    """
+    t = TicketType.shared_types.get(name)
+    if t is None:
+        t = TicketType.shared(name, price, exhibitions)
+    return t
+
+
+def shared_ticket_type(t):
+    """
+    Swaps a separate TicketType copy (from old pickles) for the shared one.
+    """
+    return load_ticket_type(t.name, t.price, t.exhibitions) if t is not None else None
+
+
+class Payment(Model):
     """
     Payment class stores details of how a ticket was paid for.
     """
 
+    __slots__ = ("method", "amount")
+
     def __init__(self, method, amount):
         self.method = method          # Payment method (credit, debit, etc.)
         self.amount = amount          # Amount paid in AED
 
 
-class Ticket:
+class Ticket(Model):
     """
     Ticket class represents a purchased ticket created after payment.
     It links a TicketType with its Payment.
     """
 
+    __slots__ = ("ticket_type", "payment")
+
     def __init__(self, ticket_type, payment):
         self.ticket_type = ticket_type   # The type of ticket purchased
         self.payment = payment           # The payment record for this ticket
 
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.ticket_type = shared_ticket_type(self.ticket_type)
+
 
-class Pass:
+class Pass(Model):
     """
     Pass class is issued to an attendee after buying a ticket.
     It grants access to workshops based on the ticket type.
     """
 
+    __slots__ = ("ticket_type", "ticket")
+
     def __init__(self, ticket):
         self.ticket_type = ticket.ticket_type  # TicketType linked to this pass
         self.ticket = ticket                   # Reference to the original ticket
 
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.ticket_type = shared_ticket_type(self.ticket_type)
 
-class Workshop:
+
+class Workshop(Model):
     """
     Workshop class represents a single workshop event
     belonging to an exhibition.
     """
 
-    def __init__(self, title, exhibition, capacity):
+    __slots__ = ("title", "exhibition", "capacity", "seats")
+
+    def __init__(self, title, exhibition, capacity, seats=None):
         self.title = title              # Name of the workshop
         self.exhibition = exhibition   # Exhibition it belongs to (A, B, or C)
         self.capacity = capacity       # Number of available seats
+        self.seats = seats if seats is not None else capacity  # Total number of seats
 
 
-class Attendee:
+class Attendee(Model):
     """
     Attendee class represents a registered conference user.
     Each attendee has one Account, may have one Pass,
     and can make workshop reservations.
     """
 
+    __slots__ = ("account", "pass_ref", "reservations")
+
     def __init__(self, account):
         self.account = account         # Composition: Attendee owns an Account
         self.pass_ref = None           # Reference to the purchased Pass (if any)
-        self.reservations = []         # List of reserved Workshop objects
+        self.reservations = []         # Workshops reserved before the reservation ledger (read once to migrate)
+
+
+class Reservation(Model):
+    """
+    Reservation links an attendee (by username) to a workshop (by title).
+    All reservations are kept in the controller's reservation ledger.
+    """
+
+    __slots__ = ("username", "title")
+
+    def __init__(self, username, title):
+        self.username = username       # Username of the attendee holding the seat
+        self.title = title             # Title of the reserved workshop
 
 
-class SalesReport:
+class WaitlistEntry(Model):
+    """
+    WaitlistEntry holds an attendee's place in the queue of a full workshop.
+    Entries with a lower priority are served first, then in order of number.
+    """
+
+    __slots__ = ("username", "title", "priority", "number")
+
+    def __init__(self, username, title, priority, number):
+        self.username = username       # Username of the waiting attendee
+        self.title = title             # Title of the full workshop
+        self.priority = priority       # 0 = Full ticket holders, 1 = everyone else
+        self.number = number           # Increasing join number (first come, first served)
+
+
+class SaleEvent(Model):
+    """
+    SaleEvent records one ticket purchase or upgrade for the sales analytics.
+    Checkouts also keep the attendee and the idempotency key sent by the
+    client, so a retried checkout finds the sale instead of charging again.
+    """
+
+    __slots__ = ("time", "kind", "ticket_type", "payment_method", "amount", "previous_type", "username", "key")
+
+    def __init__(self, time, kind, ticket_type, payment_method, amount, previous_type=None,
+                 username=None, key=None):
+        self.time = time                   # When it happened (datetime)
+        self.kind = kind                   # "purchase" or "upgrade"
+        self.ticket_type = ticket_type     # Name of the ticket type bought or upgraded to
+        self.payment_method = payment_method
+        self.amount = amount               # Amount charged (the price difference for upgrades)
+        self.previous_type = previous_type  # Ticket type before an upgrade
+        self.username = username           # Attendee who checked out (None for imported sales)
+        self.key = key                     # Idempotency key of the checkout, if the client sent one
+
+    def __setstate__(self, state):
+        self.username = self.key = None    # Events saved before checkouts had neither
+        super().__setstate__(state)
+
+
+class SalesReport(Model):
     """
     SalesReport stores daily ticket sales statistics
     for the administrator.
     """
 
-    def __init__(self, date, tickets_sold, total_sales):
+    __slots__ = ("date", "tickets_sold", "total_sales", "by_ticket_type", "by_payment_method")
+
+    def __init__(self, date, tickets_sold, total_sales, by_ticket_type=None, by_payment_method=None):
         self.date = date               # Date of the sales report
         self.tickets_sold = tickets_sold  # Number of tickets sold on that date
         self.total_sales = total_sales    # Total revenue collected on that date
+        self.by_ticket_type = by_ticket_type or {}        # Ticket type name -> (count, revenue)
+        self.by_payment_method = by_payment_method or {}  # Payment method -> (count, revenue)
@@ -1,6 +1,10 @@
 import tkinter as tk                          # Import tkinter library to build the GUI
 from tkinter import messagebox              # Import messagebox for popup messages
+from tkinter import ttk                     # Themed widgets (combobox)
+from tkinter import filedialog              # Choose where to save exports
 from controller.controller import GreenWaveController  # Import controller (MVC logic)
+from view.widgets import PagedList          # Paged list that only builds visible rows
+from controller.analytics import bucket_label  # Formats analytics periods
 
 class GreenWaveGUI:
     """
@@ -9,9 +13,9 @@ class GreenWaveGUI:
     It communicates with the Controller to perform actions.
     """
 
-    def __init__(self, root):
+    def __init__(self, root, controller=None):
         # Create the controller object (connects GUI to Model)
-        self.controller = GreenWaveController()
+        self.controller = controller if controller is not None else GreenWaveController()
 
         # Store reference to the main application window
         self.root = root
@@ -86,6 +90,8 @@ class GreenWaveGUI:
         tk.Button(self.frame, text="Purchase Ticket", command=self.purchase_screen).pack()
         tk.Button(self.frame, text="Upgrade Ticket", command=self.upgrade_screen).pack()
         tk.Button(self.frame, text="Reserve Workshop", command=self.reserve_screen).pack()
+        tk.Button(self.frame, text="Cancel Reservation", command=self.cancel_screen).pack()
+        tk.Button(self.frame, text="My Waitlist", command=self.waitlist_screen).pack()
         tk.Button(self.frame, text="Delete Account", command=self.delete_account).pack()
         tk.Button(self.frame, text="Logout", command=self.logout).pack()
 
@@ -117,13 +123,15 @@ class GreenWaveGUI:
 
     def show_details(self):
         """
-        Displays the logged-in attendee's account and ticket information.
+        Displays the logged-in attendee's account, ticket and reserved workshops.
         """
         att = self.controller.logged_in
         ticket = att.pass_ref.ticket_type.name if att.pass_ref else "None"
+        workshops = ", ".join(w.title for w in self.controller.get_reservations()) or "None"
         messagebox.showinfo(
             "Details",
-            f"Username: {att.account.username}\nEmail: {att.account.email}\nTicket: {ticket}"
+            f"Username: {att.account.username}\nEmail: {att.account.email}\nTicket: {ticket}\n"
+            f"Workshops: {workshops}"
         )
 
     def delete_account(self):
@@ -205,31 +213,140 @@ class GreenWaveGUI:
     # ---------------- WORKSHOPS ----------------
     def reserve_screen(self):
         """
-        Displays all workshops and allows the user to reserve them.
+        Displays workshops page by page and allows the user to reserve them.
+        Workshops can be filtered by exhibition and searched by title.
         """
         self.clear_frame()
-        self.work_vars = []
+        self.exhibition_filter = tk.StringVar(value="All")
+        self.search_text = tk.StringVar()
+        self.only_available = tk.IntVar()
+
+        filters = tk.Frame(self.frame)
+        filters.pack()
+        tk.Label(filters, text="Exhibition").pack(side=tk.LEFT)
+        ttk.Combobox(
+            filters,
+            textvariable=self.exhibition_filter,
+            values=["All"] + self.controller.get_exhibitions(),
+            width=6,
+            state="readonly"
+        ).pack(side=tk.LEFT)
+        tk.Entry(filters, textvariable=self.search_text).pack(side=tk.LEFT)
+        tk.Button(filters, text="Search", command=lambda: self.workshop_list.reset()).pack(side=tk.LEFT)
+        tk.Checkbutton(
+            self.frame,
+            text="Only workshops my ticket can join (with free seats)",
+            variable=self.only_available,
+            command=lambda: self.workshop_list.reset()
+        ).pack()
+
+        self.workshop_list = PagedList(
+            self.frame,
+            columns=("Workshop", "Exhibition", "Seats"),
+            fetch=self.fetch_workshops,
+            render=lambda w: (w.title, w.exhibition, w.capacity),
+            key=lambda w: w.title
+        )
+        self.workshop_list.pack()
+
+        tk.Button(self.frame, text="Reserve", command=self.reserve).pack()
+        tk.Button(self.frame, text="Back", command=self.create_dashboard).pack()
+
+    def fetch_workshops(self, offset, limit):
+        """
+        Asks the controller for one page of workshops matching the filters.
+        """
+        exhibition = self.exhibition_filter.get()
+        pass_ref = self.controller.logged_in.pass_ref
+        ticket_type = pass_ref.ticket_type if pass_ref and self.only_available.get() else None
+        return self.controller.query_workshops(
+            None if exhibition == "All" else exhibition,
+            self.search_text.get().strip(),
+            offset,
+            limit,
+            ticket_type
+        )
 
-        for w in self.controller.get_all_workshops():
+    def reserve(self):
+        """
+        Reserves all selected workshops for the attendee.
+        """
+        selected = self.workshop_list.selected_items()
+        try:
+            self.controller.reserve_workshops(selected)
+            messagebox.showinfo("Reserved", "Workshops reserved")
+            self.create_dashboard()
+        except ValueError as e:
+            full = [w for w in selected if w.capacity <= 0 or self.controller.get_waitlist_queue(w.title)]
+            if str(e) == "Workshop full" and messagebox.askyesno(
+                "Workshop full",
+                "No seats left in: " + ", ".join(w.title for w in full) + ".\nJoin the waitlist?"
+            ):
+                self.join_waitlist(full)
+            else:
+                messagebox.showerror("Error", str(e))
+
+    def join_waitlist(self, workshops):
+        try:
+            self.controller.join_waitlist(workshops)
+            messagebox.showinfo("Waitlist", "You will get a seat as soon as one is free")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+
+    def waitlist_screen(self):
+        """
+        Displays the attendee's waitlists and their place in each queue.
+        """
+        self.clear_frame()
+        self.waitlist_vars = []
+
+        for w, position in self.controller.get_waitlist():
             v = tk.IntVar()
             tk.Checkbutton(
                 self.frame,
-                text=f"{w.title} | {w.exhibition} | Seats: {w.capacity}",
+                text=f"{w.title} | {w.exhibition} | Place {position}",
                 variable=v
             ).pack()
-            self.work_vars.append((v, w))
+            self.waitlist_vars.append((v, w))
 
-        tk.Button(self.frame, text="Reserve", command=self.reserve).pack()
+        tk.Button(self.frame, text="Leave Selected", command=self.leave_waitlist).pack()
         tk.Button(self.frame, text="Back", command=self.create_dashboard).pack()
 
-    def reserve(self):
+    def leave_waitlist(self):
+        selected = [w for v, w in self.waitlist_vars if v.get()]
+        try:
+            self.controller.leave_waitlist(selected)
+            self.waitlist_screen()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+
+    def cancel_screen(self):
         """
-        Reserves all selected workshops for the attendee.
+        Displays the attendee's reservations so they can be cancelled.
+        """
+        self.clear_frame()
+        self.cancel_vars = []
+
+        for w in self.controller.get_reservations():
+            v = tk.IntVar()
+            tk.Checkbutton(
+                self.frame,
+                text=f"{w.title} | {w.exhibition}",
+                variable=v
+            ).pack()
+            self.cancel_vars.append((v, w))
+
+        tk.Button(self.frame, text="Cancel Selected", command=self.cancel_reservation).pack()
+        tk.Button(self.frame, text="Back", command=self.create_dashboard).pack()
+
+    def cancel_reservation(self):
+        """
+        Cancels all selected reservations and frees their seats.
         """
-        selected = [w for v, w in self.work_vars if v.get()]
+        selected = [w for v, w in self.cancel_vars if v.get()]
         try:
-            self.controller.reserve_workshops(selected)
-            messagebox.showinfo("Reserved", "Workshops reserved")
+            self.controller.cancel_reservations(selected)
+            messagebox.showinfo("Cancelled", "Reservations cancelled")
             self.create_dashboard()
         except ValueError as e:
             messagebox.showerror("Error", str(e))
@@ -265,8 +382,193 @@ class GreenWaveGUI:
         Displays daily ticket sales and revenue for administrators.
         """
         self.clear_frame()
-        for r in self.controller.get_sales_reports():
+        for label, summary in (("This week", self.controller.get_week_summary()),
+                               ("This month", self.controller.get_month_summary())):
+            tk.Label(
+                self.frame,
+                text=f"{label} | Tickets: {summary['tickets_sold']} | Sales: {summary['total_sales']}"
+            ).pack()
+
+        for exhibition, s in self.controller.get_workshop_summary().items():
             tk.Label(
                 self.frame,
-                text=f"{r.date} | Tickets: {r.tickets_sold} | Sales: {r.total_sales}"
+                text=f"Exhibition {exhibition} | Workshops: {s['workshops']} | "
+                     f"Reserved: {s['reserved']}/{s['seats']} ({s['occupancy']}%)"
             ).pack()
+
+        PagedList(
+            self.frame,
+            columns=("Date", "Tickets", "Sales"),
+            fetch=self.controller.query_sales_reports,
+            render=lambda r: (r.date, r.tickets_sold, r.total_sales),
+            key=lambda r: r.date,
+            selectable=False
+        ).pack()
+
+        tk.Button(self.frame, text="Sales Analytics", command=self.analytics_screen).pack()
+        tk.Button(self.frame, text="Workshop Roster", command=self.roster_screen).pack()
+        tk.Button(self.frame, text="Backup Now", command=self.backup_now).pack()
+        if self.controller.metrics is not None:
+            tk.Button(self.frame, text="Metrics", command=self.metrics_screen).pack()
+
+    def analytics_screen(self, granularity="day"):
+        """
+        Shows overall sales, upgrade conversion, the top payment methods and
+        the revenue trend per hour, day or week, with a CSV export.
+        """
+        self.clear_frame()
+        summary = self.controller.get_sales_analytics()
+        tk.Label(
+            self.frame,
+            text=f"Tickets: {summary['tickets_sold']} | Upgrades: {summary['upgrades']} "
+                 f"({summary['upgrade_conversion']}%) | Revenue: {summary['revenue']}"
+        ).pack()
+        methods = ", ".join(f"{name} {revenue}" for name, _, revenue in summary["top_payment_methods"][:3])
+        tk.Label(self.frame, text=f"Top payment methods: {methods or 'None'}").pack()
+
+        self.analytics_granularity = tk.StringVar(value=granularity)
+        choice = ttk.Combobox(
+            self.frame,
+            textvariable=self.analytics_granularity,
+            values=["hour", "day", "week"],
+            width=6,
+            state="readonly"
+        )
+        choice.pack()
+        choice.bind("<<ComboboxSelected>>", lambda e: self.analytics_screen(self.analytics_granularity.get()))
+
+        table = ttk.Treeview(self.frame, columns=("Tickets", "Upgrades", "Revenue"), height=12)
+        table.heading("#0", text="Period")
+        for column in ("Tickets", "Upgrades", "Revenue"):
+            table.heading(column, text=column)
+            table.column(column, width=80, anchor=tk.E)
+        for start, r in reversed(self.controller.get_sales_trend(granularity, 24 if granularity == "hour" else 14)):
+            table.insert("", tk.END, text=bucket_label(granularity, start),
+                         values=(r.purchases, r.upgrades, r.revenue))
+        table.pack()
+
+        tk.Button(self.frame, text="Export CSV", command=self.export_sales).pack()
+        tk.Button(self.frame, text="Back", command=self.admin_dashboard).pack()
+
+    def export_sales(self):
+        path = filedialog.asksaveasfilename(defaultextension=".csv", initialfile="sales.csv")
+        if path:
+            self.controller.export_sales_csv(path)
+            messagebox.showinfo("Export", f"Sales written to {path}")
+
+    def backup_now(self):
+        """
+        Takes an incremental point-in-time backup while sales carry on.
+        """
+        m = self.controller.create_snapshot(incremental=True)
+        messagebox.showinfo(
+            "Backup",
+            f"{m['kind'].capitalize()} snapshot {m['id']} saved ({m['stored_bytes']} bytes, "
+            f"writes held for {m['paused_ms']} ms)"
+        )
+
+    def roster_screen(self):
+        """
+        Lists the attendees holding a seat in the chosen workshop and those
+        on its waitlist, and lets the admin change its number of seats.
+        """
+        self.clear_frame()
+        self.roster_title = tk.StringVar()
+        self.roster_seats = tk.StringVar()
+        titles = [w.title for w in self.controller.get_all_workshops()]
+
+        tk.Label(self.frame, text="Workshop").pack()
+        choice = ttk.Combobox(self.frame, textvariable=self.roster_title, values=titles, state="readonly")
+        choice.pack()
+        lists = tk.Frame(self.frame)
+        lists.pack()
+        tk.Label(lists, text="Reserved").grid(row=0, column=0)
+        tk.Label(lists, text="Waitlist").grid(row=0, column=1)
+        self.roster_list = tk.Listbox(lists, width=25, height=12)
+        self.roster_list.grid(row=1, column=0)
+        self.waiting_list = tk.Listbox(lists, width=25, height=12)
+        self.waiting_list.grid(row=1, column=1)
+        choice.bind("<<ComboboxSelected>>", lambda e: self.show_roster())
+
+        seats = tk.Frame(self.frame)
+        seats.pack()
+        tk.Label(seats, text="Seats").pack(side=tk.LEFT)
+        tk.Entry(seats, textvariable=self.roster_seats, width=6).pack(side=tk.LEFT)
+        tk.Button(seats, text="Set Seats", command=self.set_seats).pack(side=tk.LEFT)
+
+        tk.Button(self.frame, text="Back", command=self.admin_dashboard).pack()
+
+    def show_roster(self):
+        title = self.roster_title.get()
+        self.roster_list.delete(0, tk.END)
+        for username in self.controller.get_roster(title):
+            self.roster_list.insert(tk.END, username)
+        self.waiting_list.delete(0, tk.END)
+        for username in self.controller.get_waitlist_queue(title):
+            self.waiting_list.insert(tk.END, username)
+        w = self.controller.find_workshop(title)
+        self.roster_seats.set(str(w.seats) if w else "")
+
+    def set_seats(self):
+        """
+        Changes the seats of the chosen workshop; added seats go to its waitlist.
+        """
+        try:
+            self.controller.set_workshop_capacity(self.roster_title.get(), int(self.roster_seats.get()))
+            self.show_roster()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+
+    def metrics_screen(self):
+        """
+        Shows operation timings and data file loads/writes, with buttons to
+        capture a profile and export a Prometheus text snapshot.
+        """
+        self.clear_frame()
+        metrics = self.controller.metrics
+        operations, files = metrics.summary()
+
+        tk.Label(self.frame, text="Operations (ms)").pack()
+        table = ttk.Treeview(self.frame, columns=("Calls", "Mean", "p50", "p99", "Max"), height=8)
+        table.heading("#0", text="Operation")
+        for column in ("Calls", "Mean", "p50", "p99", "Max"):
+            table.heading(column, text=column)
+            table.column(column, width=60, anchor=tk.E)
+        for name, calls, mean, p50, p99, slowest in operations:
+            table.insert("", tk.END, text=name,
+                         values=(calls, f"{mean:.3f}", f"{p50:.3f}", f"{p99:.3f}", f"{slowest:.3f}"))
+        table.pack()
+
+        tk.Label(self.frame, text="Data files").pack()
+        table = ttk.Treeview(self.frame, columns=("File", "Count", "Bytes", "ms"), height=5)
+        table.heading("#0", text="Operation")
+        for column in ("File", "Count", "Bytes", "ms"):
+            table.heading(column, text=column)
+            table.column(column, width=80, anchor=tk.E)
+        for operation, filename, count, nbytes, ms in files:
+            table.insert("", tk.END, text=operation, values=(filename, count, nbytes, f"{ms:.1f}"))
+        table.pack()
+
+        profiling = metrics.profiler is not None
+        tk.Button(self.frame, text="Stop Profiling" if profiling else "Start Profiling",
+                  command=self.toggle_profile).pack()
+        tk.Button(self.frame, text="Export Metrics", command=self.export_metrics).pack()
+        tk.Button(self.frame, text="Refresh", command=self.metrics_screen).pack()
+        tk.Button(self.frame, text="Back", command=self.admin_dashboard).pack()
+
+    def toggle_profile(self):
+        metrics = self.controller.metrics
+        if metrics.profiler is None:
+            metrics.start_profile()
+        else:
+            report = metrics.stop_profile()
+            window = tk.Toplevel(self.root)
+            window.title(f"Profile (saved to {metrics.profile_path})")
+            text = tk.Text(window, width=120, height=40)
+            text.insert(tk.END, report)
+            text.pack()
+        self.metrics_screen()
+
+    def export_metrics(self):
+        path = self.controller.metrics.export()
+        messagebox.showinfo("Metrics", f"Metrics written to {path}")
@@ -0,0 +1,495 @@
+import json                                 # Request and response bodies are JSON
+import traceback                            # Unexpected handler errors are logged on stderr
+from datetime import date                   # Date range parameters
+from urllib.parse import parse_qs, urlparse  # Query string parameters
+from concurrent.futures import ThreadPoolExecutor  # Fixed pool of request handler threads
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from controller.controller import GreenWaveController  # Import controller (MVC logic)
+from controller.sessions import SessionError
+from controller.dataformat import DataFormatError
+
+
+class GreenWaveServer(HTTPServer):
+    """
+    Headless HTTP/JSON front end (View layer) for the GreenWave system.
+    Requests are handled by a fixed pool of threads that all share one
+    controller, and every client is identified by a session token from
+    the controller's session manager instead of its single logged_in attendee.
+    """
+
+    def __init__(self, address, controller=None, workers=32):
+        super().__init__(address, GreenWaveRequestHandler)
+        self.controller = controller if controller is not None else GreenWaveController()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        """
+        Hands each connection to the thread pool instead of handling it inline.
+        """
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+class HTTPError(Exception):
+    """
+    Error that is sent back to the client with the given status code.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------- JSON HELPERS ----------------
+def ticket_type_json(t):
+    return {"name": t.name, "price": t.price, "exhibitions": list(t.exhibitions)}
+
+
+def workshop_json(w):
+    return {"title": w.title, "exhibition": w.exhibition, "capacity": w.capacity, "seats": w.seats}
+
+
+def attendee_json(a, reservations):
+    return {
+        "username": a.account.username,
+        "email": a.account.email,
+        "ticket": a.pass_ref.ticket_type.name if a.pass_ref else None,
+        "reservations": [w.title for w in reservations]
+    }
+
+
+def report_json(r):
+    return {"date": str(r.date), "tickets_sold": r.tickets_sold, "total_sales": r.total_sales}
+
+
+class GreenWaveRequestHandler(BaseHTTPRequestHandler):
+    """
+    Maps HTTP routes to controller operations.
+    Clients send their session token in the "Authorization: Bearer <token>" header.
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = 10                                # Idle keep-alive connections are dropped so they don't hold a pool thread
+
+    # (method, path) -> handler method name
+    routes = {
+        ("POST", "/accounts"): "create_account",
+        ("POST", "/login"): "login",
+        ("POST", "/logout"): "logout",
+        ("GET", "/me"): "show_details",
+        ("DELETE", "/me"): "delete_account",
+        ("GET", "/tickets"): "ticket_types",
+        ("POST", "/tickets/purchase"): "purchase_ticket",
+        ("POST", "/tickets/upgrade"): "upgrade_ticket",
+        ("GET", "/workshops"): "workshops",
+        ("POST", "/workshops/reserve"): "reserve",
+        ("POST", "/workshops/cancel"): "cancel_reservation",
+        ("GET", "/workshops/waitlist"): "my_waitlist",
+        ("POST", "/workshops/waitlist"): "join_waitlist",
+        ("POST", "/workshops/waitlist/leave"): "leave_waitlist",
+        ("POST", "/admin/login"): "admin_login",
+        ("GET", "/admin/sales"): "sales_reports",
+        ("GET", "/admin/sales/summary"): "sales_summary",
+        ("GET", "/admin/workshops"): "workshop_summary",
+        ("GET", "/admin/workshops/roster"): "workshop_roster",
+        ("POST", "/admin/workshops/capacity"): "workshop_capacity",
+        ("GET", "/admin/analytics"): "sales_analytics",
+        ("GET", "/admin/analytics/export"): "export_sales",
+        ("GET", "/admin/metrics"): "metrics",
+        ("GET", "/admin/snapshots"): "snapshots",
+        ("POST", "/admin/snapshots"): "create_snapshot"
+    }
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def dispatch(self, method):
+        """
+        Runs the handler for the route and sends its result as JSON
+        (as plain text when the handler returns a string, and streamed
+        as CSV when it returns an iterator of text chunks).
+        Session errors become 401, damaged data files 500 and other
+        ValueErrors 400 responses; any other error is logged and sent
+        as a 500 response instead of dropping the connection.
+        """
+        try:
+            data = self.read_data()
+            name = self.routes.get((method, self.path.split("?")[0]))
+            if name is None:
+                raise HTTPError(404, "Not found")
+            self.body = self.read_body(data)
+            status, result = getattr(self, name)()
+        except HTTPError as e:
+            status, result = e.status, {"error": str(e)}
+        except SessionError as e:
+            status, result = 401, {"error": str(e)}
+        except DataFormatError as e:
+            status, result = 500, {"error": str(e)}
+        except ValueError as e:
+            status, result = 400, {"error": str(e)}
+        except Exception:
+            traceback.print_exc()
+            status, result = 500, {"error": "Internal server error"}
+        if isinstance(result, str):
+            self.send_text(status, result)
+        elif isinstance(result, (dict, list)):
+            self.send_json(status, result)
+        else:
+            self.send_csv(status, result)
+
+    def read_data(self):
+        """
+        Reads the raw request body before anything else, so that an early
+        error response never leaves it behind to be parsed as the next
+        request of a kept-alive connection.
+        """
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or "Transfer-Encoding" in self.headers:
+            self.close_connection = True        # Where the body ends is unknown
+            raise HTTPError(400, "Invalid Content-Length")
+        return self.rfile.read(length) if length else b""
+
+    def read_body(self, data):
+        """
+        Returns the JSON object sent as the request body ({} if there is none).
+        """
+        if not data:
+            return {}
+        try:
+            body = json.loads(data)
+        except ValueError:
+            raise HTTPError(400, "Invalid JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return body
+
+    def send_json(self, status, result):
+        data = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_text(self, status, text):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_csv(self, status, chunks):
+        """
+        Sends text chunks as they are produced (chunked transfer encoding),
+        so large exports are never held in memory.
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Disposition", 'attachment; filename="sales.csv"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            data = chunk.encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass                                    # Keep the console quiet under load
+
+    # ---------------- REQUEST HELPERS ----------------
+    @property
+    def controller(self):
+        return self.server.controller
+
+    def field(self, name, kind=str, required=True):
+        """
+        Returns a field of the JSON body, which must be of the given type
+        (a string by default). Optional fields that are missing give None.
+        """
+        if name not in self.body:
+            if required:
+                raise HTTPError(400, f"Missing field: {name}")
+            return None
+        value = self.body[name]
+        if not isinstance(value, kind) or (isinstance(value, bool) and kind is not bool):
+            raise HTTPError(400, f"Invalid field: {name}")
+        return value
+
+    def query(self, name, default=None):
+        """
+        Returns a query string parameter of the URL.
+        """
+        return parse_qs(urlparse(self.path).query).get(name, [default])[0]
+
+    def token(self):
+        auth = self.headers.get("Authorization", "")
+        return auth[7:] if auth.startswith("Bearer ") else None
+
+    def attendee(self):
+        """
+        Returns the attendee of the request's session token.
+        """
+        return self.controller.session_attendee(self.token())
+
+    def attendee_json(self, a=None):
+        """
+        Returns the attendee (of the session by default) with its reservations.
+        """
+        a = a or self.attendee()
+        return attendee_json(a, self.controller.get_reservations(a))
+
+    def idempotency_key(self):
+        """
+        Returns the client's idempotency key (Idempotency-Key header or
+        "idempotency_key" field), so a retried checkout is not charged twice.
+        """
+        return self.headers.get("Idempotency-Key") or self.field("idempotency_key", required=False)
+
+    def ticket_type(self):
+        t = self.controller.find_ticket_type(self.field("ticket_type"))
+        if t is None:
+            raise ValueError("Unknown ticket type")
+        return t
+
+    def workshops_from_titles(self):
+        selected = []
+        titles = self.field("titles", list)
+        if not all(isinstance(title, str) for title in titles):
+            raise HTTPError(400, "Invalid field: titles")
+        for title in titles:
+            w = self.controller.find_workshop(title)
+            if w is None:
+                raise ValueError(f"Unknown workshop: {title}")
+            selected.append(w)
+        return selected
+
+    # ---------------- ACCOUNTS ----------------
+    def create_account(self):
+        self.controller.create_account(
+            self.field("username"),
+            self.field("password"),
+            self.field("email", required=False) or ""
+        )
+        return 201, {"status": "created"}
+
+    def login(self):
+        token = self.controller.open_session(self.field("username"), self.field("password"))
+        return 200, {"token": token}
+
+    def logout(self):
+        self.controller.close_session(self.token())
+        return 200, {"status": "logged out"}
+
+    def show_details(self):
+        return 200, self.attendee_json()
+
+    def delete_account(self):
+        self.controller.session_delete_account(self.token())
+        return 200, {"status": "deleted"}
+
+    # ---------------- TICKETS ----------------
+    def ticket_types(self):
+        return 200, [ticket_type_json(t) for t in self.controller.ticket_types]
+
+    def purchase_ticket(self):
+        self.controller.session_purchase_ticket(
+            self.token(), self.ticket_type(), self.field("payment_method"), self.idempotency_key()
+        )
+        return 200, self.attendee_json()
+
+    def upgrade_ticket(self):
+        a = self.attendee()
+        t = self.ticket_type()
+        key = self.idempotency_key()
+        if key is None or key not in self.controller.checkouts:   # A retry was already checked
+            if a.pass_ref is None:
+                raise ValueError("No ticket to upgrade")
+            if t.price <= a.pass_ref.ticket_type.price:
+                raise ValueError("Not an upgrade")
+        self.controller.session_upgrade_ticket(self.token(), t, key)
+        return 200, self.attendee_json(a)
+
+    # ---------------- WORKSHOPS ----------------
+    def workshops(self):
+        """
+        All workshops, or with ?available=1 only those the session's ticket
+        can join that still have free seats.
+        """
+        if self.query("available"):
+            a = self.attendee()
+            if a.pass_ref is None:
+                raise ValueError("Buy a ticket first")
+            found = self.controller.get_available_workshops(a.pass_ref.ticket_type, self.query("exhibition"))
+        else:
+            found = self.controller.get_all_workshops()
+        return 200, [workshop_json(w) for w in found]
+
+    def reserve(self):
+        a = self.attendee()
+        if a.pass_ref is None:
+            raise ValueError("Buy a ticket first")
+        self.controller.session_reserve_workshops(self.token(), self.workshops_from_titles())
+        return 200, self.attendee_json(a)
+
+    def cancel_reservation(self):
+        self.controller.session_cancel_reservations(self.token(), self.workshops_from_titles())
+        return 200, self.attendee_json()
+
+    def my_waitlist(self):
+        return 200, [
+            {"title": w.title, "position": position}
+            for w, position in self.controller.get_waitlist(self.attendee())
+        ]
+
+    def join_waitlist(self):
+        if self.attendee().pass_ref is None:
+            raise ValueError("Buy a ticket first")
+        self.controller.session_join_waitlist(self.token(), self.workshops_from_titles())
+        return self.my_waitlist()
+
+    def leave_waitlist(self):
+        self.controller.session_leave_waitlist(self.token(), self.workshops_from_titles())
+        return self.my_waitlist()
+
+    # ---------------- ADMIN ----------------
+    def admin_login(self):
+        token = self.controller.open_admin_session(self.field("username"), self.field("password"))
+        return 200, {"token": token}
+
+    def sales_reports(self):
+        self.controller.require_admin(self.token())
+        return 200, [report_json(r) for r in self.controller.get_sales_reports()]
+
+    def sales_summary(self):
+        """
+        Totals and breakdowns between ?start=YYYY-MM-DD and ?end=YYYY-MM-DD
+        (both default to today).
+        """
+        self.controller.require_admin(self.token())
+        today = date.today().isoformat()
+        start = date.fromisoformat(self.query("start", today))
+        end = date.fromisoformat(self.query("end", today))
+        summary = self.controller.get_sales_summary(start, end)
+        for field in ("by_ticket_type", "by_payment_method"):
+            summary[field] = {
+                name: {"count": count, "total": total}
+                for name, (count, total) in summary[field].items()
+            }
+        return 200, summary
+
+    def workshop_summary(self):
+        self.controller.require_admin(self.token())
+        return 200, self.controller.get_workshop_summary()
+
+    def workshop_roster(self):
+        """
+        Usernames holding a seat in the workshop ?title=... and those
+        on its waitlist (in promotion order).
+        """
+        self.controller.require_admin(self.token())
+        title = self.query("title")
+        if self.controller.find_workshop(title or "") is None:
+            raise HTTPError(404, "Workshop not found")
+        return 200, {
+            "title": title,
+            "attendees": self.controller.get_roster(title),
+            "waitlist": self.controller.get_waitlist_queue(title)
+        }
+
+    def workshop_capacity(self):
+        """
+        Sets the total seats of a workshop; added seats go to its waitlist.
+        """
+        self.controller.require_admin(self.token())
+        seats = self.field("seats", int)
+        self.controller.set_workshop_capacity(self.field("title"), seats)
+        return 200, workshop_json(self.controller.find_workshop(self.field("title")))
+
+    def sales_analytics(self):
+        """
+        Overall sales, upgrade conversion, top payment methods and the trend
+        of the last ?periods=14 periods of ?granularity=hour|day|week.
+        """
+        self.controller.require_admin(self.token())
+        granularity = self.query("granularity", "day")
+        try:
+            periods = int(self.query("periods", "14"))
+        except ValueError:
+            raise HTTPError(400, "periods must be a whole number")
+        summary = self.controller.get_sales_analytics()
+        summary["upgrade_paths"] = {f"{old}->{new}": n for (old, new), n in summary["upgrade_paths"].items()}
+        summary["top_payment_methods"] = [
+            {"method": name, "count": count, "revenue": revenue}
+            for name, count, revenue in summary["top_payment_methods"]
+        ]
+        summary["trend"] = [
+            {"start": start.isoformat(), "tickets_sold": r.purchases, "upgrades": r.upgrades, "revenue": r.revenue}
+            for start, r in self.controller.get_sales_trend(granularity, min(max(periods, 1), 1000))
+        ]
+        return 200, summary
+
+    def export_sales(self):
+        """
+        Streams every sale event (or ?granularity=hour|day|week rollups) as CSV.
+        """
+        self.controller.require_admin(self.token())
+        return 200, self.controller.sales_csv_chunks(self.query("granularity", "events"))
+
+    def metrics(self):
+        """
+        Prometheus text snapshot (404 unless the server runs with metrics turned on).
+        """
+        self.controller.require_admin(self.token())
+        if self.controller.metrics is None:
+            raise HTTPError(404, "Metrics are turned off")
+        return 200, self.controller.metrics.prometheus()
+
+    def snapshots(self):
+        self.controller.require_admin(self.token())
+        return 200, [
+            {"id": snapshot_id, "time": taken, "kind": kind, "stored_bytes": stored, "paused_ms": paused}
+            for snapshot_id, taken, kind, stored, paused in self.controller.list_snapshots()
+        ]
+
+    def create_snapshot(self):
+        """
+        Takes a point-in-time backup ({"incremental": true} to store only what changed).
+        """
+        self.controller.require_admin(self.token())
+        m = self.controller.create_snapshot(bool(self.field("incremental", bool, required=False)))
+        return 201, {key: m[key] for key in ("id", "time", "kind", "stored_bytes", "paused_ms")}
+
+
+def serve(host="127.0.0.1", port=8080, controller=None, workers=32):
+    """
+    Runs the HTTP server until interrupted.
+    """
+    server = GreenWaveServer((host, port), controller, workers)
+    print(f"GreenWave API listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,98 @@
+import tkinter as tk                          # Import tkinter library to build the GUI
+from tkinter import ttk                     # Treeview widget for table-like lists
+
+
+class PagedList(tk.Frame):
+    """
+    Virtualized list widget: only the rows of the current page exist as
+    Treeview items, no matter how many items the controller holds.
+    Rows are fetched page by page through a callback, and selections are
+    remembered across pages.
+    """
+
+    def __init__(self, parent, columns, fetch, render, key, page_size=15, selectable=True):
+        super().__init__(parent)
+        self.fetch = fetch              # fetch(offset, limit) -> (items, total)
+        self.render = render            # render(item) -> tuple of column values
+        self.key = key                  # key(item) -> unique id of an item
+        self.page_size = page_size
+        self.page = 0
+        self.total = 0
+        self.items = {}                 # Treeview row id -> item on the current page
+        self.selected = {}              # key -> item, kept when changing pages
+
+        mode = "extended" if selectable else "none"
+        self.tree = ttk.Treeview(self, columns=columns, show="headings",
+                                 height=page_size, selectmode=mode)
+        for c in columns:
+            self.tree.heading(c, text=c)
+            self.tree.column(c, width=140)
+        self.tree.pack()
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+        nav = tk.Frame(self)
+        nav.pack()
+        tk.Button(nav, text="< Prev", command=self.prev_page).pack(side=tk.LEFT)
+        self.page_label = tk.Label(nav)
+        self.page_label.pack(side=tk.LEFT)
+        tk.Button(nav, text="Next >", command=self.next_page).pack(side=tk.LEFT)
+
+        self.refresh()
+
+    def refresh(self):
+        """
+        Reloads the current page from the controller.
+        """
+        items, self.total = self.fetch(self.page * self.page_size, self.page_size)
+        if not items and self.page > 0:         # Page disappeared (e.g. after filtering)
+            self.page = 0
+            items, self.total = self.fetch(0, self.page_size)
+
+        self.tree.delete(*self.tree.get_children())
+        self.items = {}
+        keep = []
+        for item in items:
+            row = self.tree.insert("", tk.END, values=self.render(item))
+            self.items[row] = item
+            if self.key(item) in self.selected:
+                keep.append(row)
+        if keep:
+            self.tree.selection_set(keep)
+
+        pages = max((self.total + self.page_size - 1) // self.page_size, 1)
+        self.page_label.config(text=f"Page {self.page + 1} of {pages} ({self.total} items)")
+
+    def reset(self):
+        """
+        Goes back to the first page and forgets the selection (used when filters change).
+        """
+        self.page = 0
+        self.selected = {}
+        self.refresh()
+
+    def next_page(self):
+        if (self.page + 1) * self.page_size < self.total:
+            self.page += 1
+            self.refresh()
+
+    def prev_page(self):
+        if self.page > 0:
+            self.page -= 1
+            self.refresh()
+
+    def on_select(self, event=None):
+        """
+        Updates the remembered selection for the rows on this page.
+        """
+        chosen = set(self.tree.selection())
+        for row, item in self.items.items():
+            if row in chosen:
+                self.selected[self.key(item)] = item
+            else:
+                self.selected.pop(self.key(item), None)
+
+    def selected_items(self):
+        """
+        Returns every selected item, across all pages.
+        """
+        return list(self.selected.values())